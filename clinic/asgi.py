@@ -8,9 +8,32 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import threading
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'clinic.settings')
 
 application = get_asgi_application()
+
+# Прогрев каждого процесса uvicorn/daphne до приема запросов, как в clinic.wsgi.
+# uvicorn загружает приложение внутри работающего цикла событий, где синхронные
+# запросы к базе запрещены, поэтому прогрев выполняется в отдельном потоке;
+# страницы прогоняются через WSGI-обработчик с теми же промежуточными слоями
+if getattr(settings, 'WARMUP_ON_START', False):
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connections
+
+    from core.warmup import warm_up
+
+    def _warm_up():
+        try:
+            warm_up(get_wsgi_application())
+        finally:
+            # Соединения потока прогрева запросы обслуживать не будут
+            connections.close_all()
+
+    _warmup_thread = threading.Thread(target=_warm_up, name='warmup')
+    _warmup_thread.start()
+    _warmup_thread.join()
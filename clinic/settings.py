@@ -28,10 +28,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.DoctorMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -42,13 +44,20 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Скомпилированные шаблоны хранятся в памяти процесса независимо от DEBUG;
+            # runserver сбрасывает этот кэш при изменении файлов шаблонов
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -59,6 +68,10 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Ожидание блокировки вместо немедленной ошибки при параллельной записи
+            'timeout': 20,
+        },
     }
 }
 
@@ -87,6 +100,16 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# Статика с хешами в именах и копиями .gz/.br (core.storage)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'core.storage.PrecompressedManifestStaticFilesStorage'},
+}
+
+# Раздавать STATIC_ROOT самим приложением (core.assets.serve_static), если перед ним нет nginx
+SERVE_STATIC = os.environ.get('CLINIC_SERVE_STATIC', '1') == '1'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -97,8 +120,163 @@ LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
 
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'info@clinic-zdorovie.ru'
+
+# Уведомления пациентов (core.notifications)
+NOTIFICATION_TRANSPORTS = {
+    'email': 'core.notifications.EmailTransport',
+    'sms': 'core.notifications.FileSMSTransport',
+}
+NOTIFICATION_CHUNK_SIZE = 1000
+SMS_OUTBOX_FILE = BASE_DIR / 'var' / 'sms_outbox.log'
+
+# Каталог для локальных файловых кэшей
+CACHE_DIR = BASE_DIR / 'var' / 'cache'
+
+# Ежемесячные отчеты по врачам (core.reports, manage.py build_reports)
+REPORTS_ROOT = BASE_DIR / 'var' / 'reports'
+# Процессов построения отчетов (None - по числу ядер)
+REPORT_WORKERS = None
 
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'clinic-default',
+    },
+    # Отдельный кэш сессий: файлы разделяются всеми процессами на сервере,
+    # память подходит для разработки и одиночного процесса
+    'sessions': {
+        'BACKEND': (
+            'django.core.cache.backends.locmem.LocMemCache'
+            if os.environ.get('CLINIC_SESSION_CACHE') == 'memory'
+            else 'django.core.cache.backends.filebased.FileBasedCache'
+        ),
+        'LOCATION': str(CACHE_DIR / 'sessions'),
+        'TIMEOUT': 1209600,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+# Режим хранения сессий: 'db', 'cache' или 'cached_db'
+SESSION_STORAGE = os.environ.get('CLINIC_SESSION_STORAGE', 'cached_db')
+SESSION_ENGINE = f'core.sessions.{SESSION_STORAGE}'
+SESSION_CACHE_ALIAS = 'sessions'
 SESSION_COOKIE_AGE = 1209600
+SESSION_SAVE_EVERY_REQUEST = False
+
+# Размер LRU-кэша врачей в каждом процессе (core.identity)
+DOCTOR_CACHE_SIZE = 128
 
 CSRF_TRUSTED_ORIGINS = ['http://localhost:8000', 'http://127.0.0.1:8000']
+
+# Очередь фоновых задач (core.jobs)
+JOB_WORKERS = 2
+JOB_RETRY_BASE_DELAY = 10
+JOB_RETRY_MAX_DELAY = 3600
+JOB_STALE_TIMEOUT = 600
+# Как часто обработчик отмечает, что задача еще выполняется (секунды)
+JOB_HEARTBEAT_INTERVAL = 30
+
+# Ограничение частоты запросов (core.throttling): (количество, окно в секундах)
+THROTTLE_RATES = {
+    'login_ip': (30, 300),
+    'login_username': (5, 300),
+    'appointment_ip': (10, 600),
+    'appointment_phone': (5, 3600),
+    'testimonial_ip': (5, 600),
+}
+
+# Защита публичных форм от спама (core.forms.SpamProtectionMixin)
+SPAM_MIN_SUBMIT_SECONDS = 3
+SPAM_MAX_FORM_AGE = 86400
+SPAM_RETRY_AFTER = 60
+
+# Максимальное количество дней вперед для записи на прием
+APPOINTMENT_BOOKING_HORIZON_DAYS = 180
+
+# Живые обновления кабинета врача (Server-Sent Events, только под ASGI)
+LIVE_HEARTBEAT = 20        # секунд между пингами открытого соединения
+LIVE_POLL_INTERVAL = 15    # секунд между опросами записей из других процессов (0 - отключить)
+LIVE_MAX_AGE = 3600        # секунд до переподключения с повторной проверкой сессии
+LIVE_QUEUE_SIZE = 100      # событий в очереди медленного клиента до просьбы перезагрузки
+LIVE_CATCHUP_LIMIT = 100   # записей, догоняемых после переподключения
+
+# Асинхронные варианты публичных страниц (core.async_views) для запуска под ASGI
+ASYNC_PUBLIC_VIEWS = os.environ.get('CLINIC_ASYNC_VIEWS') == '1'
+
+# Публичный список отзывов
+TESTIMONIALS_PAGE_SIZE = 10
+TESTIMONIALS_CACHE_TIMEOUT = 60 * 60
+
+# Журнал доступа к медицинским данным (core.audit)
+AUDIT_ENABLED = True
+AUDIT_BUFFER_SIZE = 200      # записей в буфере процесса до немедленного сохранения
+AUDIT_FLUSH_INTERVAL = 5     # секунд между сохранениями буфера
+AUDIT_MAX_BUFFER = 10000     # записей, удерживаемых в буфере при недоступной базе
+
+# Архив старых приемов и медицинских записей (core.archive)
+ARCHIVE_AFTER_DAYS = 365     # переносить завершенные и отмененные приемы старше стольких дней
+ARCHIVE_BATCH_SIZE = 500     # приемов в одной транзакции переноса
+ARCHIVE_DATABASE = 'default'
+
+# Отдельная база SQLite для архива: CLINIC_ARCHIVE_DB=/path/archive.sqlite3,
+# затем manage.py migrate --database archive
+if os.environ.get('CLINIC_ARCHIVE_DB'):
+    DATABASES['archive'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['CLINIC_ARCHIVE_DB'],
+        'OPTIONS': {'timeout': 20},
+    }
+    ARCHIVE_DATABASE = 'archive'
+
+# Отдельные базы филиалов (core.branches): код филиала -> имя подключения.
+# CLINIC_BRANCH_DBS=north=/path/north.sqlite3,south=/path/south.sqlite3 создает
+# подключения branch_north и branch_south; затем manage.py migrate --database
+# branch_<код> для каждой базы и manage.py sync_branches
+BRANCH_DATABASES = {}
+BRANCH_SCATTER_WORKERS = 8   # потоков для запросов по всем базам филиалов
+for _item in filter(None, os.environ.get('CLINIC_BRANCH_DBS', '').split(',')):
+    _code, _, _path = (_part.strip() for _part in _item.partition('='))
+    DATABASES[f'branch_{_code}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': _path,
+        'OPTIONS': {'timeout': 20},
+    }
+    BRANCH_DATABASES[_code] = f'branch_{_code}'
+if BRANCH_DATABASES and ARCHIVE_DATABASE != 'default':
+    # ID приемов разных филиалов совпадают: архив хранится в базе каждого филиала
+    raise RuntimeError('CLINIC_ARCHIVE_DB не используется вместе с CLINIC_BRANCH_DBS')
+
+DATABASE_ROUTERS = ['core.routers.ArchiveRouter', 'core.routers.BranchRouter']
+
+# Фоновое удаление врачей и пациентов с зависимыми данными (core.purge)
+PURGE_BATCH_SIZE = 500       # строк в одной транзакции удаления
+PURGE_PAUSE = 0.05           # секунд между пакетами
+
+# Фотографии врачей (core.images): уменьшенные копии WebP и JPEG
+DOCTOR_PHOTO_WIDTHS = (160, 320, 480, 640)  # ширины копий в пикселях
+DOCTOR_PHOTO_ASPECT = (4, 5)                # пропорции обрезки (ширина, высота)
+DOCTOR_PHOTO_QUALITY = 80
+DOCTOR_PHOTO_FALLBACK_WIDTH = 320           # копия для атрибута src
+DOCTOR_PHOTO_MAX_UPLOAD_SIZE = 10 * 2 ** 20
+
+# JSON API (core.api): размер страницы списков
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+# Прогрев процесса до приема запросов (core.warmup): serve, clinic.wsgi
+# и clinic.asgi; в рабочем окружении включается в clinic.settings_prod.
+# Без прогрева (runserver) /readyz отвечает 503
+WARMUP_ON_START = False
+WARMUP_PATHS = ('/', '/appointment/', '/testimonials/all/')
+
+# Ленты приемов врачей для календарей (core.calendar)
+CALENDAR_PAST_DAYS = 30            # дней прошедших приемов в ленте
+CALENDAR_FUTURE_DAYS = 180         # дней предстоящих приемов в ленте
+CALENDAR_CACHE_TIMEOUT = 86400     # секунд хранения готовой ленты
+CALENDAR_UID_DOMAIN = 'clinic-zdorovie.ru'
+
+# Сжатие ответов (core.middleware.CompressionMiddleware) и минификация HTML
+COMPRESS_MIN_SIZE = 500         # байт; меньшие ответы не сжимаются
+COMPRESS_BREACH_PADDING = 100   # максимальная длина случайного заголовка gzip на страницах с CSRF-токеном
+HTML_MINIFY = True              # тег {% minify %} (core.templatetags.clinic_html)
@@ -0,0 +1,79 @@
+"""
+Настройки рабочего окружения клиники.
+
+Наследуют clinic.settings и переопределяют параметры, небезопасные или
+медленные в рабочем режиме. Секреты и адреса задаются переменными
+окружения::
+
+    DJANGO_SETTINGS_MODULE=clinic.settings_prod
+    CLINIC_SECRET_KEY=...
+    CLINIC_ALLOWED_HOSTS=clinic-zdorovie.ru,www.clinic-zdorovie.ru
+    CLINIC_REDIS_URL=redis://127.0.0.1:6379/0  # необязательно, общий кэш в Redis
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+
+
+DEBUG = False
+
+try:
+    SECRET_KEY = os.environ['CLINIC_SECRET_KEY']
+except KeyError:
+    raise RuntimeError('Для рабочего окружения задайте переменную CLINIC_SECRET_KEY')
+
+ALLOWED_HOSTS = [host.strip() for host in os.environ.get('CLINIC_ALLOWED_HOSTS', '').split(',') if host.strip()]
+CSRF_TRUSTED_ORIGINS = [f'https://{host.lstrip(".")}' for host in ALLOWED_HOSTS if host != '*']
+
+# Соединения с базами (основной, архива и филиалов) переиспользуются
+# рабочим процессом между запросами
+for _database in DATABASES.values():  # noqa: F405
+    _database['CONN_MAX_AGE'] = 600
+    _database['CONN_HEALTH_CHECKS'] = True
+
+# Общий кэш рабочих процессов serve: версии ключей (врачи, каталог,
+# отзывы, календари) и счетчики лимитов частоты должны быть видны всем
+# процессам. Redis атомарно увеличивает счетчики лимитов; файловый кэш
+# годится для одного сервера без Redis
+if os.environ.get('CLINIC_REDIS_URL'):
+    CACHES['default'] = {  # noqa: F405
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['CLINIC_REDIS_URL'],
+    }
+else:
+    CACHES['default'] = {  # noqa: F405
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': str(CACHE_DIR / 'default'),  # noqa: F405
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    }
+
+# HTTPS на балансировщике
+HTTPS = os.environ.get('CLINIC_HTTPS', '1') == '1'
+SESSION_COOKIE_SECURE = HTTPS
+CSRF_COOKIE_SECURE = HTTPS
+SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https') if HTTPS else None
+
+# Прогрев процесса до приема запросов (core.warmup, команда serve, clinic.wsgi)
+WARMUP_ON_START = True
+WARMUP_PATHS = ('/', '/appointment/', '/testimonials/all/')
+
+# Команда serve
+SERVE_BIND = os.environ.get('CLINIC_BIND', '0.0.0.0:8000')
+SERVE_WORKERS = int(os.environ.get('CLINIC_WORKERS', os.cpu_count() or 1))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(asctime)s %(process)d %(levelname)s %(name)s: %(message)s'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'plain'},
+    },
+    'root': {'handlers': ['console'], 'level': 'INFO'},
+    'loggers': {
+        # Журнал запросов serve (django.server) выводится как WARNING и выше
+        'django.server': {'level': 'WARNING'},
+    },
+}
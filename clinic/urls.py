@@ -9,7 +9,7 @@ URL Configuration for clinic project.
 
 from django.contrib import admin
 from django.conf.urls.static import static 
-from django.urls import path
+from django.urls import path, re_path
 from clinic import settings
 from core.views import (
     appointment_success, 
@@ -20,11 +20,25 @@ from core.views import (
     staff_login, 
     doctor_login, 
     doctor_dashboard, 
+    doctor_events, 
     doctor_logout, 
+    doctor_calendar,
+    doctor_calendar_reset,
+    doctor_report,
     patient_card, 
     create_medical_record, 
+    create_medical_records_batch, 
     medical_records_list
 )
+from core import api, health
+from core.assets import serve_static
+from core.async_views import aall_testimonials, aappointment_success, aappointment_view, ahome
+
+# Под ASGI публичные страницы обслуживаются асинхронными представлениями
+if settings.ASYNC_PUBLIC_VIEWS:
+    home, appointment_view, appointment_success, all_testimonials = (
+        ahome, aappointment_view, aappointment_success, aall_testimonials
+    )
 
 # Основные URL patterns приложения
 urlpatterns = [
@@ -46,11 +60,31 @@ urlpatterns = [
     path('staff/login/', staff_login, name='staff_login'), 
     path('doctor/login/', doctor_login, name='doctor_login'),
     path('doctor/dashboard/', doctor_dashboard, name='doctor_dashboard'),
+    path('doctor/events/', doctor_events, name='doctor_events'),
     path('doctor/logout/', doctor_logout, name='doctor_logout'),    
+    path('doctor/calendar/reset/', doctor_calendar_reset, name='doctor_calendar_reset'),
+    path('calendar/<str:token>.ics', doctor_calendar, name='doctor_calendar'),
+    path('reports/<str:month>/doctor-<int:doctor_id>.<str:fmt>', doctor_report, name='doctor_report'),
     
     # Медицинские карты и записи
     path('patient-card/<int:appointment_id>/', patient_card, name='patient_card'),
     path('appointment/<int:appointment_id>/create-record/', create_medical_record, name='create_medical_record'),
+    path('doctor/records/batch/', create_medical_records_batch, name='create_medical_records_batch'),
     path('appointment/<int:appointment_id>/medical-records/', medical_records_list, name='medical_records_list'),
+    
+    # Проверки живости и готовности процесса (core.health)
+    path('healthz', health.healthz, name='healthz'),
+    path('readyz', health.readyz, name='readyz'),
+    
+    # JSON API (core.api)
+    path('api/v1/doctors/', api.doctors, name='api_doctors'),
+    path('api/v1/doctors/<int:doctor_id>/availability/', api.availability, name='api_availability'),
+    path('api/v1/services/', api.services, name='api_services'),
+    path('api/v1/appointments/', api.create_appointment, name='api_create_appointment'),
+    path('api/v1/doctor/appointments/', api.doctor_appointments, name='api_doctor_appointments'),
+
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+# Собранная статика с долгим кэшированием; при DEBUG ее раздает runserver из исходных каталогов
+if settings.SERVE_STATIC and not settings.DEBUG:
+    urlpatterns.append(re_path(r'^static/(?P<path>.+)$', serve_static))
\ No newline at end of file
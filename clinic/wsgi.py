@@ -9,8 +9,17 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'clinic.settings')
 
 application = get_wsgi_application()
+
+# Прогрев при загрузке внешним сервером (например, gunicorn --preload);
+# команда serve не импортирует этот модуль и прогревает процесс сама
+if getattr(settings, 'WARMUP_ON_START', False):
+    from core.warmup import prepare_fork, warm_up
+
+    warm_up(application)
+    prepare_fork()
@@ -7,8 +7,18 @@
 """
 
 from django.contrib import admin
-from .models import Doctor, Service, Appointment, Testimonial, MedicalRecord
+from .models import Doctor, Service, Appointment, Testimonial, MedicalRecord, Notification, Job, AccessLog
+from .models import ArchivedAppointment, ArchivedMedicalRecord, Branch, WaitlistEntry
 from django import forms
+from django.conf import settings
+from django.db import transaction
+from django.http import QueryDict
+from django.utils import timezone
+from .branches import branch_aliases, branch_database, is_sharded, scatter, shard_databases, use_database
+from .purge import estimate_dependents
+from .routers import is_branch_model
+from .tasks import process_doctor_photo, purge_deleted
+from .testimonials import bump_testimonials_version
 
 class DoctorAdminForm(forms.ModelForm):
     """
@@ -22,9 +32,141 @@ class DoctorAdminForm(forms.ModelForm):
     class Meta:
         model = Doctor
         fields = '__all__'
+    
+    def clean_photo(self):
+        """Ограничение размера загружаемой фотографии."""
+        photo = self.cleaned_data.get('photo')
+        max_size = getattr(settings, 'DOCTOR_PHOTO_MAX_UPLOAD_SIZE', 10 * 2 ** 20)
+        if photo and getattr(photo, 'size', 0) > max_size:
+            raise forms.ValidationError(f'Размер фотографии не должен превышать {max_size // 2 ** 20} МБ.')
+        return photo
+
+class BackgroundDeleteAdminMixin:
+    """
+    Удаление через пометку и фоновую задачу (core.purge).
+    
+    Страница подтверждения показывает количество зависимых строк
+    по моделям вместо списка всех связанных объектов, а удаление только
+    помечает строки: зависимые данные удаляются в фоне пакетами.
+    """
+    
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        counts = estimate_dependents(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        perms_needed = set()
+        for model, count in counts.items():
+            model_count[model._meta.verbose_name_plural] = count
+            if not request.user.has_perm(f'{model._meta.app_label}.delete_{model._meta.model_name}'):
+                perms_needed.add(model._meta.verbose_name)
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+    
+    def delete_model(self, request, obj):
+        obj.soft_delete()
+        purge_deleted.enqueue(obj._meta.label_lower, obj.pk, database=obj._state.db)
+    
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.delete_model(request, obj)
+    
+    def response_delete(self, request, obj_display, obj_id):
+        self.message_user(request, 'Связанные данные будут удалены в фоновом режиме.')
+        return super().response_delete(request, obj_display, obj_id)
+
+class BranchListFilter(admin.SimpleListFilter):
+    """
+    Выбор базы филиала в списке данных филиалов (core.branches).
+    
+    Показывается только при отдельных базах филиалов. Количество строк
+    считается параллельно во всех базах; саму базу для списка выбирает
+    BranchAdminMixin.
+    """
+    title = 'филиал'
+    parameter_name = 'branch'
+    
+    def lookups(self, request, model_admin):
+        if not is_sharded():
+            return ()
+        databases = shard_databases()
+        counts = dict(zip(databases, scatter(lambda database: model_admin.model._default_manager.count())))
+        self.default_count = counts['default']
+        names = Branch.objects.in_bulk(list(branch_aliases()))
+        return [
+            (code, f'{names[code] if code in names else code} ({counts[database]})')
+            for code, database in branch_aliases().items()
+        ]
+    
+    def choices(self, changelist):
+        choices = list(super().choices(changelist))
+        # Без выбранного филиала показывается основная база, а не все филиалы
+        choices[0]['display'] = f'Основная база ({self.default_count})'
+        return choices
+    
+    def queryset(self, request, queryset):
+        return queryset
+
+class BranchAdminMixin:
+    """
+    Данные филиалов в админке: список и страницы строк из базы филиала.
+    
+    База выбирается фильтром «филиал»; страницы строк получают его через
+    сохраненные фильтры списка (_changelist_filters). Новые строки
+    записываются в базу филиала своего врача.
+    """
+    
+    def admin_database(self, request):
+        """База выбранного филиала (None - у филиалов нет отдельных баз)."""
+        if not is_sharded():
+            return None
+        code = request.GET.get(BranchListFilter.parameter_name)
+        if code is None:
+            filters = QueryDict(request.GET.get('_changelist_filters', ''))
+            code = filters.get(BranchListFilter.parameter_name)
+        return branch_database(code)
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        database = self.admin_database(request)
+        return queryset if database is None else queryset.using(database)
+    
+    def get_list_filter(self, request):
+        return (BranchListFilter, *super().get_list_filter(request))
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        database = self.admin_database(request)
+        if database is not None and is_branch_model(db_field.related_model):
+            kwargs.setdefault('queryset', db_field.related_model._default_manager.using(database))
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+    
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        database = self.admin_database(request)
+        if database is None:
+            return super().changeform_view(request, object_id, form_url, extra_context)
+        with use_database(database):
+            return super().changeform_view(request, object_id, form_url, extra_context)
+
+@admin.register(Branch)
+class BranchAdmin(admin.ModelAdmin):
+    """
+    Административный интерфейс для управления филиалами.
+    
+    Включает:
+    - Отображение кода, названия, адреса и базы данных филиала
+    - Код нельзя изменить после создания: по нему выбирается база
+    """
+    list_display = ('code', 'name', 'address', 'database')
+    search_fields = ('code', 'name', 'address')
+    
+    def get_readonly_fields(self, request, obj=None):
+        return ('code',) if obj is not None else ()
+    
+    def database(self, obj):
+        """Имя подключения к базе филиала."""
+        return branch_database(obj.code)
+    database.short_description = 'База данных'
 
 @admin.register(Doctor)
-class DoctorAdmin(admin.ModelAdmin):
+class DoctorAdmin(BackgroundDeleteAdminMixin, admin.ModelAdmin):
     """
     Административный интерфейс для управления врачами.
     
@@ -34,17 +176,32 @@ class DoctorAdmin(admin.ModelAdmin):
     - Поиск по имени, специализации и логину
     - Фильтрацию по специализации
     - Хеширование пароля при сохранении
+    - Фоновое создание уменьшенных копий фотографии
+    - Фоновое удаление врача с приемами, отзывами и медицинскими записями
+    - Филиал нельзя сменить при отдельных базах филиалов: данные врача
+      не переносятся между базами
     """
     form = DoctorAdminForm
-    list_display = ('name', 'specialization', 'experience', 'username')
+    list_display = ('name', 'specialization', 'experience', 'username', 'branch')
     search_fields = ('name', 'specialization', 'username')
-    list_filter = ('specialization',)
+    list_filter = ('specialization', 'branch')
+    
+    def get_readonly_fields(self, request, obj=None):
+        if obj is not None and is_sharded():
+            return ('branch',)
+        return ()
     
     def save_model(self, request, obj, form, change):
-        """Переопределение метода сохранения для хеширования пароля."""
+        """Переопределение метода сохранения для хеширования пароля и обработки фотографии."""
         if form.cleaned_data.get('password'):
             obj.set_password(form.cleaned_data['password'])
+        photo_changed = 'photo' in form.changed_data
+        if photo_changed:
+            obj.photo_renditions = {}
         super().save_model(request, obj, form, change)
+        if photo_changed and obj.photo:
+            # Уменьшенные копии создаются в фоне после фиксации транзакции
+            transaction.on_commit(lambda: process_doctor_photo.enqueue(obj.pk, obj.photo.name))
 
 @admin.register(Service)
 class ServiceAdmin(admin.ModelAdmin):
@@ -61,7 +218,7 @@ class ServiceAdmin(admin.ModelAdmin):
     list_filter = ('order',)    
 
 @admin.register(Appointment)
-class AppointmentAdmin(admin.ModelAdmin):
+class AppointmentAdmin(BranchAdminMixin, admin.ModelAdmin):
     """
     Административный интерфейс для управления записями на прием.
     
@@ -71,13 +228,38 @@ class AppointmentAdmin(admin.ModelAdmin):
     - Поиск по имени и телефону пациента
     - Иерархический навигатор по датам
     """
-    list_display = ('name', 'phone', 'doctor', 'date', 'message', 'created_at')
+    list_display = ('name', 'phone', 'email', 'doctor', 'date', 'status', 'message', 'created_at')
     list_filter = ('doctor', 'date', 'created_at')
     search_fields = ('name', 'phone')
     date_hierarchy = 'date'
 
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(BranchAdminMixin, admin.ModelAdmin):
+    """
+    Административный интерфейс для управления листом ожидания.
+    
+    Включает:
+    - Отображение пациента, врача, даты, приоритета и статуса
+    - Фильтрацию по статусу и дате
+    - Поиск по имени и телефону пациента
+    - Массовое исключение из листа ожидания
+    - Ссылки на отмененную и созданную записи на прием
+    """
+    list_display = ('name', 'phone', 'doctor', 'date', 'priority', 'status', 'created_at', 'appointment')
+    list_filter = ('status', 'date')
+    list_select_related = ('doctor',)
+    search_fields = ('name', 'phone')
+    readonly_fields = ('created_at', 'promoted_at', 'freed_by', 'appointment')
+    actions = ['withdraw']
+    
+    @admin.action(description='Исключить из листа ожидания')
+    def withdraw(self, request, queryset):
+        """Исключает ожидающих пациентов; уже записанные не изменяются."""
+        updated = queryset.filter(status=WaitlistEntry.STATUS_WAITING).update(status=WaitlistEntry.STATUS_WITHDRAWN)
+        self.message_user(request, f'Исключено из листа ожидания: {updated}')
+
 @admin.register(Testimonial)
-class TestimonialAdmin(admin.ModelAdmin):
+class TestimonialAdmin(BranchAdminMixin, admin.ModelAdmin):
     """
     Административный интерфейс для управления отзывами пациентов.
     
@@ -85,14 +267,17 @@ class TestimonialAdmin(admin.ModelAdmin):
     - Отображение основных полей отзыва
     - Фильтрацию по статусу одобрения, рейтингу и дате
     - Возможность быстрого редактирования статуса одобрения
+    - Массовое одобрение и снятие с публикации со сбросом кэша списка отзывов
     - Поиск по имени пациента, врачу и тексту отзыва
     - Группировку полей в логические блоки
     """
     list_display = ['name', 'doctor', 'rating', 'created_at', 'is_approved']
     list_filter = ['is_approved', 'rating', 'created_at']
     list_editable = ['is_approved']
-    search_fields = ['name', 'doctor', 'message']
+    list_select_related = ['doctor']
+    search_fields = ['name', 'doctor__name', 'message']
     readonly_fields = ['created_at']
+    actions = ['approve', 'unapprove']
     
     fieldsets = (
         ('Информация о пациенте', {
@@ -105,9 +290,26 @@ class TestimonialAdmin(admin.ModelAdmin):
             'fields': ('is_approved', 'created_at')
         }),
     )
+    
+    @admin.action(description='Одобрить выбранные отзывы')
+    def approve(self, request, queryset):
+        """Публикует выбранные отзывы одним запросом."""
+        updated = queryset.filter(is_approved=False).update(is_approved=True)
+        if updated:
+            # update() не отправляет сигналы, поэтому кэш сбрасывается явно после фиксации
+            transaction.on_commit(bump_testimonials_version, using=queryset.db)
+        self.message_user(request, f'Одобрено отзывов: {updated}')
+    
+    @admin.action(description='Снять выбранные отзывы с публикации')
+    def unapprove(self, request, queryset):
+        """Снимает выбранные отзывы с публикации одним запросом."""
+        updated = queryset.filter(is_approved=True).update(is_approved=False)
+        if updated:
+            transaction.on_commit(bump_testimonials_version, using=queryset.db)
+        self.message_user(request, f'Снято с публикации отзывов: {updated}')
 
 @admin.register(MedicalRecord)
-class MedicalRecordAdmin(admin.ModelAdmin):
+class MedicalRecordAdmin(BranchAdminMixin, admin.ModelAdmin):
     """
     Административный интерфейс для управления медицинскими картами.
     
@@ -161,5 +363,100 @@ class MedicalRecordAdmin(admin.ModelAdmin):
         }),
     )
 
+@admin.register(Notification)
+class NotificationAdmin(BranchAdminMixin, admin.ModelAdmin):
+    """
+    Административный интерфейс для контроля доставки уведомлений.
+    
+    Включает:
+    - Отображение типа, канала и статуса доставки
+    - Фильтрацию по статусу, типу и каналу
+    - Поиск по имени и телефону пациента
+    """
+    list_display = ('appointment', 'kind', 'channel', 'status', 'attempts', 'sent_at')
+    list_filter = ('status', 'kind', 'channel')
+    search_fields = ('appointment__name', 'appointment__phone')
+    list_select_related = ('appointment__doctor',)
+    raw_id_fields = ('appointment',)
+    readonly_fields = ('created_at', 'sent_at', 'claimed_at', 'batch', 'error')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """
+    Административный интерфейс для просмотра очереди фоновых задач.
+    
+    Включает:
+    - Отображение статуса, приоритета и количества попыток
+    - Фильтрацию по статусу, очереди и задаче
+    - Действие повторного запуска невыполненных задач
+    """
+    list_display = ('id', 'task', 'queue', 'priority', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'queue', 'task')
+    search_fields = ('task', 'last_error')
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at', 'heartbeat_at', 'last_error')
+    actions = ['requeue']
+    
+    @admin.action(description='Повторно поставить в очередь')
+    def requeue(self, request, queryset):
+        """Возвращает выбранные задачи в очередь с обнулением попыток."""
+        updated = queryset.exclude(status=Job.STATUS_RUNNING).update(
+            status=Job.STATUS_QUEUED, attempts=0, run_at=timezone.now(), last_error=''
+        )
+        self.message_user(request, f'Поставлено в очередь задач: {updated}')
+
+class ReadOnlyAdminMixin:
+    """Только просмотр: строки нельзя добавлять, изменять и удалять."""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+@admin.register(AccessLog)
+class AccessLogAdmin(ReadOnlyAdminMixin, admin.ModelAdmin):
+    """
+    Административный интерфейс журнала доступа к медицинским данным.
+    
+    Включает:
+    - Отображение врача, пациента, базы филиала, страницы и времени обращения
+    - Фильтрацию по месяцу, базе филиала и странице
+    - Только просмотр: журнал нельзя изменять и удалять
+    """
+    list_display = ('accessed_at', 'doctor_id', 'patient_id', 'appointment_id', 'database', 'action', 'ip')
+    list_filter = ('month', 'database', 'action')
+    # Без JOIN: строки удаленных врачей и пациентов остаются в списке
+    search_fields = ('=doctor__id', '=patient__id', '=appointment__id')
+    date_hierarchy = 'accessed_at'
+
+@admin.register(ArchivedAppointment)
+class ArchivedAppointmentAdmin(BranchAdminMixin, ReadOnlyAdminMixin, admin.ModelAdmin):
+    """
+    Административный интерфейс архива записей на прием.
+    
+    Включает:
+    - Отображение пациента, даты приема и статуса
+    - Поиск по имени и телефону пациента
+    """
+    list_display = ('id', 'name', 'phone', 'date', 'doctor_id', 'status', 'archived_at')
+    list_filter = ('status',)
+    search_fields = ('name', 'phone')
+
+@admin.register(ArchivedMedicalRecord)
+class ArchivedMedicalRecordAdmin(BranchAdminMixin, ReadOnlyAdminMixin, admin.ModelAdmin):
+    """
+    Административный интерфейс архива медицинских записей.
+    
+    Включает:
+    - Отображение приема, врача и даты создания
+    - Поиск по имени пациента и диагнозу
+    """
+    list_display = ('id', 'appointment', 'doctor_id', 'created_at', 'archived_at')
+    search_fields = ('appointment__name', 'diagnosis')
+    list_select_related = ('appointment',)
+
 # Настройка заголовка административной панели
 admin.site.site_header = "Администрирование клиники"
\ No newline at end of file
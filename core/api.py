@@ -0,0 +1,349 @@
+"""
+JSON API версии 1 для мобильного приложения и колл-центра.
+
+Адреса (префикс /api/v1/):
+
+- ``doctors/`` - врачи;
+- ``services/`` - услуги;
+- ``doctors/<id>/availability/`` - даты, доступные для записи к врачу,
+  с количеством уже занятых записей;
+- ``appointments/`` (POST) - запись на прием;
+- ``doctor/appointments/`` - записи вошедшего врача (сессия кабинета).
+
+Списки отдаются страницами с курсором (параметры ``cursor`` и ``limit``):
+следующая страница выбирается по индексу условием «после последней
+строки», без OFFSET. Параметр ``fields`` ограничивает выбираемые
+столбцы (``?fields=id,name``): строки читаются через values() без
+создания объектов моделей. На каждый ответ выдается ETag по содержимому,
+и повторный запрос с If-None-Match получает 304 без тела.
+
+Запись на прием проверяется той же формой AppointmentForm, что
+и страница записи, с теми же лимитами частоты.
+"""
+
+import base64
+import binascii
+import datetime
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .branches import doctor_database
+from .forms import AppointmentForm
+from .models import Appointment, Doctor, Service
+from .tasks import send_appointment_confirmation
+from .throttling import acquire_limits, client_ip
+from .views import DUPLICATE_APPOINTMENT_MESSAGE, _duplicate_appointments, _normalize_phone
+
+
+class ApiError(Exception):
+    """Ошибка запроса к API с HTTP-статусом и описанием для клиента."""
+
+    def __init__(self, status, message, details=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.details = details
+
+
+class Listing:
+    """
+    Описание списка API: набор строк, порядок и допустимые поля.
+
+    Attributes:
+        fields (tuple): Поля, доступные в ``?fields=`` (по умолчанию выводятся все)
+        ordering (tuple): Порядок строк; ``-`` означает убывание. Последнее
+                          поле должно быть уникальным (обычно ``id``)
+    """
+
+    def __init__(self, fields, ordering):
+        self.fields = fields
+        self.ordering = ordering
+
+    def selected_fields(self, request):
+        """Поля из параметра ``fields``; неизвестные поля - ошибка 400."""
+        value = request.GET.get('fields')
+        if not value:
+            return self.fields
+        fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+        unknown = [name for name in fields if name not in self.fields]
+        if unknown or not fields:
+            raise ApiError(400, 'Неизвестные поля.', {'fields': unknown, 'allowed': list(self.fields)})
+        return fields
+
+    def page(self, request, queryset):
+        """
+        Страница списка по курсору.
+
+        Args:
+            request: HTTP-запрос с параметрами fields, cursor, limit
+            queryset: Отфильтрованный набор строк
+
+        Returns:
+            dict: ``results`` и ``next`` (курсор следующей страницы или None)
+        """
+        fields = self.selected_fields(request)
+        keys = [name.lstrip('-') for name in self.ordering]
+        limit = _page_limit(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.GET.get('cursor')
+        if cursor:
+            values = _decode_cursor(cursor, [queryset.model._meta.get_field(key) for key in keys])
+            queryset = queryset.filter(self._after(values))
+        # Поля курсора выбираются всегда, но в ответ попадают только запрошенные
+        rows = list(queryset.values(*dict.fromkeys(fields + tuple(keys)))[:limit + 1])
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = _encode_cursor([rows[-1][key] for key in keys])
+        results = [{name: row[name] for name in fields} for row in rows]
+        return {'results': results, 'next': next_cursor}
+
+    def _after(self, values):
+        """Условие «строка после курсора» для составного порядка."""
+        condition = Q()
+        equal = Q()
+        for name, value in zip(self.ordering, values):
+            key = name.lstrip('-')
+            lookup = f'{key}__lt' if name.startswith('-') else f'{key}__gt'
+            condition |= equal & Q(**{lookup: value})
+            equal &= Q(**{key: value})
+        return condition
+
+
+DOCTORS = Listing(fields=('id', 'name', 'specialization', 'experience', 'description'), ordering=('id',))
+SERVICES = Listing(fields=('id', 'title', 'description', 'order'), ordering=('order', 'id'))
+DOCTOR_APPOINTMENTS = Listing(
+    fields=('id', 'name', 'phone', 'email', 'date', 'status', 'message', 'patient_id', 'created_at'),
+    ordering=('-date', '-id'),
+)
+
+
+def _page_limit(request):
+    default = getattr(settings, 'API_PAGE_SIZE', 50)
+    maximum = getattr(settings, 'API_MAX_PAGE_SIZE', 200)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise ApiError(400, 'Параметр limit должен быть числом.')
+    return max(1, min(limit, maximum))
+
+
+def _encode_cursor(values):
+    data = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+def _decode_cursor(cursor, fields):
+    """
+    Значения курсора, приведенные к типам полей порядка.
+
+    Args:
+        cursor: Курсор из параметра ``cursor``
+        fields: Поля модели в порядке списка
+
+    Raises:
+        ApiError: Курсор поврежден или его значения не подходят к полям (400)
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (binascii.Error, ValueError):
+        raise ApiError(400, 'Некорректный курсор.')
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ApiError(400, 'Некорректный курсор.')
+    # Курсор приходит от клиента: допускаются только строки и числа, которые принимает поле
+    if not all(isinstance(value, (str, int, float)) and not isinstance(value, bool) for value in values):
+        raise ApiError(400, 'Некорректный курсор.')
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except (TypeError, ValueError, ValidationError):
+        raise ApiError(400, 'Некорректный курсор.')
+
+
+def json_response(request, data, status=200, cache_control=None):
+    """
+    JSON-ответ с ETag по содержимому; при совпадении If-None-Match - 304.
+
+    Args:
+        request: HTTP-запрос
+        data: Данные ответа
+        status: HTTP-статус
+        cache_control: Параметры заголовка Cache-Control
+
+    Returns:
+        HttpResponse: Ответ API
+    """
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False, separators=(',', ':')).encode()
+    if status == 200:
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+    else:
+        response = HttpResponse(body, status=status, content_type='application/json')
+    if cache_control:
+        patch_cache_control(response, **cache_control)
+    return response
+
+
+def api_view(view_func):
+    """Преобразует ApiError в JSON-ответ с описанием ошибки."""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except ApiError as error:
+            data = {'error': error.message}
+            if error.details is not None:
+                data['details'] = error.details
+            response = json_response(request, data, status=error.status)
+            if error.status == 429:
+                response['Retry-After'] = str(error.details['retry_after'])
+            return response
+    return wrapper
+
+
+PUBLIC_CACHE = {'public': True, 'max_age': 60}
+
+
+@require_GET
+@api_view
+def doctors(request):
+    """Список врачей (без помеченных на удаление)."""
+    return json_response(request, DOCTORS.page(request, Doctor.objects.all()), cache_control=PUBLIC_CACHE)
+
+
+@require_GET
+@api_view
+def services(request):
+    """Список услуг в порядке отображения на сайте."""
+    return json_response(request, SERVICES.page(request, Service.objects.all()), cache_control=PUBLIC_CACHE)
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ApiError(400, f'Параметр {name} должен быть датой в формате ГГГГ-ММ-ДД.')
+
+
+@require_GET
+@api_view
+def availability(request, doctor_id):
+    """
+    Даты, на которые можно записаться к врачу.
+
+    Период ограничен горизонтом записи AppointmentForm.date_bounds()
+    и параметрами ``from`` и ``to``. Занятость по датам считается
+    одним запросом GROUP BY по индексу (doctor, date).
+    """
+    if not Doctor.objects.filter(pk=doctor_id).exists():
+        raise ApiError(404, 'Врач не найден.')
+    min_date, max_date = AppointmentForm.date_bounds()
+    start = max(_parse_date(request.GET['from'], 'from'), min_date) if 'from' in request.GET else min_date
+    end = min(_parse_date(request.GET['to'], 'to'), max_date) if 'to' in request.GET else max_date
+
+    booked = dict(
+        Appointment.objects.using(doctor_database(doctor_id))
+        .filter(doctor_id=doctor_id, date__range=(start, end))
+        .exclude(status='cancelled')
+        .values_list('date')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    days = []
+    day = start
+    while day <= end:
+        days.append({'date': day, 'booked': booked.get(day, 0)})
+        day += datetime.timedelta(days=1)
+    return json_response(
+        request,
+        {'doctor': doctor_id, 'from': start, 'to': end, 'days': days},
+        cache_control={'public': True, 'max_age': 30},
+    )
+
+
+def _appointment_checks(request, data):
+    """Ограничения частоты заявок, общие со страницей записи."""
+    return [
+        ('appointment_ip', client_ip(request)),
+        ('appointment_phone', _normalize_phone(str(data.get('phone', '')))),
+    ]
+
+
+@csrf_exempt
+@require_POST
+@api_view
+def create_appointment(request):
+    """
+    Запись на прием.
+
+    Тело запроса - JSON с полями формы записи: name, phone, email,
+    doctor (ID врача), date (ГГГГ-ММ-ДД), message. Запрос не связан
+    с сессией, поэтому CSRF-токен не требуется.
+
+    Returns:
+        HttpResponse: 201 с данными записи, 400 с ошибками формы,
+        409 для повторной записи, 429 при превышении лимита
+    """
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        raise ApiError(400, 'Тело запроса должно быть JSON-объектом.')
+    if not isinstance(data, dict):
+        raise ApiError(400, 'Тело запроса должно быть JSON-объектом.')
+
+    checks = _appointment_checks(request, data)
+    retry_after = acquire_limits(checks)
+    if retry_after:
+        raise ApiError(429, 'Слишком много заявок.', {'retry_after': retry_after})
+
+    fields = AppointmentForm.Meta.fields
+    form = AppointmentForm({name: data[name] for name in fields if name in data and data[name] is not None})
+    if not form.is_valid():
+        raise ApiError(400, 'Проверьте данные заявки.', form.errors.get_json_data())
+    if _duplicate_appointments(form.cleaned_data).exists():
+        raise ApiError(409, DUPLICATE_APPOINTMENT_MESSAGE)
+
+    appointment = form.save()
+    send_appointment_confirmation.enqueue(appointment.id, database=appointment._state.db)
+    return json_response(request, {
+        'id': appointment.id,
+        'doctor': appointment.doctor_id,
+        'date': appointment.date,
+        'status': appointment.status,
+    }, status=201)
+
+
+@require_GET
+@api_view
+def doctor_appointments(request):
+    """
+    Записи вошедшего врача, новые даты первыми.
+
+    Доступ по сессии личного кабинета; параметр ``status`` фильтрует
+    по статусу записи.
+    """
+    if not request.doctor:
+        raise ApiError(401, 'Требуется вход врача.')
+    queryset = Appointment.objects.using(doctor_database(request.doctor)).filter(doctor_id=request.doctor.id)
+    status = request.GET.get('status')
+    if status:
+        if status not in dict(Appointment.STATUS_CHOICES):
+            raise ApiError(400, 'Неизвестный статус.', {'allowed': [key for key, _ in Appointment.STATUS_CHOICES]})
+        queryset = queryset.filter(status=status)
+    return json_response(
+        request, DOCTOR_APPOINTMENTS.page(request, queryset), cache_control={'private': True, 'no_cache': True},
+    )
@@ -35,3 +35,7 @@ class CoreConfig(AppConfig):
     
     # Короткое имя приложения для использования в проекте
     label = 'core'
+
+    def ready(self):
+        """Подключение обработчиков сигналов моделей."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,146 @@
+"""
+Перенос старых записей на прием и медицинских записей в архив.
+
+Завершенные и отмененные приемы старше ARCHIVE_AFTER_DAYS дней
+переносятся вместе с медицинскими записями в архивные таблицы
+(ArchivedAppointment, ArchivedMedicalRecord) короткими пакетами.
+Архивные строки сохраняют исходные ID, а связи с услугами хранятся
+списком их ID. Уведомления о перенесенных приемах удаляются вместе
+с ними: это служебное состояние рассылки, а не медицинские данные.
+
+Каждый пакет - отдельная транзакция основной базы. Если архив лежит
+в отдельной базе (ARCHIVE_DATABASE), копия фиксируется раньше удаления
+горячих строк; при сбое между ними повторный запуск не создаст
+дубликатов, а чтение истории отдает горячей строке приоритет.
+
+Если у филиалов отдельные базы (core.branches), архивные таблицы есть
+в базе каждого филиала и приемы переносятся внутри своей базы: ID
+приемов разных филиалов совпадают, поэтому общей базы архива
+в этом режиме нет.
+"""
+
+import datetime
+import heapq
+from operator import attrgetter
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .branches import scatter, use_database
+from .models import Appointment, ArchivedAppointment, ArchivedMedicalRecord, Doctor, MedicalRecord
+from .routers import archive_database
+
+
+# Статусы, после которых запись на прием больше не изменяется
+FINAL_STATUSES = ('completed', 'cancelled')
+
+APPOINTMENT_FIELDS = ('id', 'name', 'phone', 'email', 'doctor_id', 'patient_id', 'date', 'message', 'status', 'created_at')
+RECORD_FIELDS = (
+    'id', 'appointment_id', 'doctor_id', 'patient_id', 'diagnosis', 'treatment',
+    'recommendations', 'fingerprint', 'created_at',
+)
+
+
+def archive_cutoff(days=None):
+    """
+    Дата, раньше которой приемы переносятся в архив.
+
+    Args:
+        days: Горизонт в днях (по умолчанию ARCHIVE_AFTER_DAYS)
+    """
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 365)
+    return timezone.localdate() - datetime.timedelta(days=days)
+
+
+def archivable(cutoff):
+    """Приемы, подлежащие переносу в архив."""
+    return Appointment.objects.filter(date__lt=cutoff, status__in=FINAL_STATUSES)
+
+
+def archive_batch(cutoff, batch_size=None, database='default'):
+    """
+    Переносит в архив один пакет приемов с их медицинскими записями.
+
+    Args:
+        cutoff: Дата, раньше которой приемы переносятся
+        batch_size: Количество приемов в пакете (по умолчанию ARCHIVE_BATCH_SIZE)
+        database: База приемов (основная или база филиала)
+
+    Returns:
+        tuple: Количество перенесенных приемов и медицинских записей
+    """
+    batch_size = batch_size or getattr(settings, 'ARCHIVE_BATCH_SIZE', 500)
+    archived_at = timezone.now()
+    archive = database if archive_database() == 'default' else archive_database()
+
+    with use_database(database), transaction.atomic(using=database):
+        appointments = list(
+            archivable(cutoff).select_for_update().order_by('id').values(*APPOINTMENT_FIELDS)[:batch_size]
+        )
+        if not appointments:
+            return 0, 0
+        ids = [row['id'] for row in appointments]
+        records = list(MedicalRecord.objects.filter(appointment_id__in=ids).values(*RECORD_FIELDS))
+        services = {}
+        Through = MedicalRecord.services.through
+        for record_id, service_id in Through.objects.filter(
+            medicalrecord_id__in=[row['id'] for row in records]
+        ).values_list('medicalrecord_id', 'service_id'):
+            services.setdefault(record_id, []).append(service_id)
+
+        # Вложенная транзакция: точка сохранения, если архив в той же базе
+        with transaction.atomic(using=archive):
+            ArchivedAppointment.objects.bulk_create(
+                [ArchivedAppointment(archived_at=archived_at, **row) for row in appointments],
+                ignore_conflicts=True,
+            )
+            ArchivedMedicalRecord.objects.bulk_create(
+                [
+                    ArchivedMedicalRecord(archived_at=archived_at, service_ids=services.get(row['id'], []), **row)
+                    for row in records
+                ],
+                ignore_conflicts=True,
+            )
+
+        # Каскадно удаляет медицинские записи, связи с услугами и уведомления
+        archivable(cutoff).filter(id__in=ids).delete()
+    return len(appointments), len(records)
+
+
+def patient_history(appointment, include_archive=False):
+    """
+    История записей пациента для карты пациента.
+
+    Горячие записи выбираются всегда; архивные добавляются только по
+    запросу, чтобы обычный просмотр карты не обращался к архиву.
+    Пациент мог обращаться в разные филиалы, поэтому история собирается
+    из всех баз филиалов (core.branches.scatter).
+
+    Args:
+        appointment: Текущая запись на прием
+        include_archive: Добавить записи из архива
+
+    Returns:
+        list: Записи на прием (горячие и архивные) по убыванию даты приема
+    """
+    def load(database):
+        history = list(
+            Appointment.objects.filter(phone=appointment.phone).select_related('doctor').order_by('-date')
+        )
+        if not include_archive:
+            return history
+
+        hot_ids = {record.id for record in history}
+        archived = [
+            record for record in ArchivedAppointment.objects.filter(phone=appointment.phone)
+            if record.id not in hot_ids
+        ]
+        # Архив может лежать в другой базе, поэтому врачи загружаются отдельно
+        doctors = Doctor.objects.in_bulk({record.doctor_id for record in archived})
+        for record in archived:
+            record.doctor = doctors.get(record.doctor_id)
+        return sorted(history + archived, key=attrgetter('date'), reverse=True)
+
+    return list(heapq.merge(*scatter(load), key=attrgetter('date'), reverse=True))
@@ -0,0 +1,126 @@
+"""
+Статические файлы: сторонние библиотеки и раздача собранной статики.
+
+Bootstrap и Font Awesome хранятся в STATICFILES_DIRS (static/vendor),
+куда их скачивает команда ``manage.py vendor_assets``. Пока файлов нет,
+шаблоны подключают те же версии с CDN, чтобы страницы не остались без
+стилей.
+
+Собранная статика (collectstatic) раздается представлением
+serve_static: файлы с хешем в имени кэшируются браузером бессрочно
+(immutable), а заранее сжатые копии .br и .gz отдаются без сжатия
+на лету.
+"""
+
+import mimetypes
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+from .compression import accepted_encodings
+
+
+# Имя -> (путь в static, адрес на CDN)
+VENDOR_ASSETS = {
+    'bootstrap-css': (
+        'vendor/bootstrap/5.3.0/css/bootstrap.min.css',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css',
+    ),
+    'bootstrap-js': (
+        'vendor/bootstrap/5.3.0/js/bootstrap.bundle.min.js',
+        'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js',
+    ),
+    'fontawesome-css': (
+        'vendor/fontawesome/6.0.0/css/all.min.css',
+        'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.0.0/css/all.min.css',
+    ),
+}
+
+# Имя файла после ManifestStaticFilesStorage: name.<12 hex>.ext
+re_hashed_name = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+@lru_cache(maxsize=None)
+def _is_vendored(path):
+    """Есть ли файл библиотеки локально (результат кэшируется на время жизни процесса)."""
+    if settings.DEBUG:
+        return finders.find(path) is not None
+    return staticfiles_storage.exists(path)
+
+
+def asset_url(name):
+    """
+    Адрес сторонней библиотеки: локальный, если она скачана, иначе CDN.
+
+    Args:
+        name: Ключ VENDOR_ASSETS
+
+    Returns:
+        str: Адрес файла
+    """
+    path, cdn_url = VENDOR_ASSETS[name]
+    if _is_vendored(path):
+        return staticfiles_storage.url(path)
+    return cdn_url
+
+
+def serve_static(request, path):
+    """
+    Раздает файл из STATIC_ROOT с долгим кэшированием и готовым сжатием.
+
+    Используется, когда перед приложением нет отдельного веб-сервера
+    для статики (SERVE_STATIC = True).
+
+    Args:
+        request: HTTP-запрос
+        path: Путь файла относительно STATIC_ROOT
+
+    Returns:
+        FileResponse: Содержимое файла (или 304 Not Modified)
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404('Файл не найден')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден')
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    if encoding:
+        # Файлы .gz и .br раздаются только как готовое сжатие своих оригиналов
+        raise Http404('Файл не найден')
+    stat = os.stat(full_path)
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+
+    serve_path, content_encoding = full_path, None
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for name, extension in PRECOMPRESSED:
+        if name in accepted and os.path.isfile(full_path + extension):
+            serve_path, content_encoding = full_path + extension, name
+            break
+
+    response = FileResponse(open(serve_path, 'rb'), content_type=content_type or 'application/octet-stream')
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    if os.path.isfile(full_path + '.gz') or os.path.isfile(full_path + '.br'):
+        patch_vary_headers(response, ('Accept-Encoding',))
+    if re_hashed_name.search(path):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=0, must-revalidate'
+    return response
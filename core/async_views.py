@@ -0,0 +1,121 @@
+"""
+Асинхронные представления публичных страниц для работы под ASGI.
+
+Повторяют home, appointment_view, appointment_success и all_testimonials
+из core.views, но не занимают поток на время запроса: база данных
+читается и пишется через асинхронный ORM, лимиты и справочник врачей -
+через асинхронные методы кэша. Проверки форм, фильтры и тексты сообщений
+общие с синхронными представлениями.
+
+Шаблоны рендерятся только по заранее загруженным спискам, поэтому
+во время рендера нет обращений к базе данных. Включаются параметром
+ASYNC_PUBLIC_VIEWS (см. clinic/urls.py).
+"""
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.shortcuts import redirect, render
+
+from .branches import is_sharded
+from .choices import aget_doctor_catalog
+from .forms import AppointmentForm
+from .tasks import send_appointment_confirmation
+from .testimonials import atestimonials_listing
+from .throttling import aacquire_limits
+from .views import (
+    APPOINTMENT_SUCCESS_MESSAGE,
+    DUPLICATE_APPOINTMENT_MESSAGE,
+    _appointment_throttle_checks,
+    _duplicate_appointments,
+    _gather_testimonials,
+    _home_querysets,
+    _shed_verdict,
+)
+
+
+async def _alist(queryset):
+    """Загружает QuerySet в список асинхронной итерацией (готовый список возвращает как есть)."""
+    if isinstance(queryset, list):
+        return queryset
+    return [obj async for obj in queryset]
+
+
+async def _ashed_public_post(request, form_class, checks):
+    """Асинхронный вариант core.views._shed_public_post()."""
+    return _shed_verdict(request, form_class, await aacquire_limits(checks))
+
+
+async def ahome(request):
+    """
+    Главная страница клиники (асинхронный вариант home).
+    
+    Args:
+        request: HTTP-запрос
+        
+    Returns:
+        HttpResponse: Рендер главной страницы с контекстом
+    """
+    querysets = _home_querysets()
+    if is_sharded():
+        querysets['testimonials'] = await sync_to_async(_gather_testimonials)(querysets['testimonials'])
+    context = {name: await _alist(queryset) for name, queryset in querysets.items()}
+    context['form'] = AppointmentForm(doctor_catalog=await aget_doctor_catalog())
+    return render(request, 'core/index.html', context)
+
+
+async def aappointment_view(request):
+    """
+    Страница записи на прием (асинхронный вариант appointment_view).
+    
+    Args:
+        request: HTTP-запрос (GET/POST)
+        
+    Returns:
+        HttpResponse: Рендер страницы записи или редирект при успехе
+    """
+    catalog = await aget_doctor_catalog()
+    if request.method == 'POST':
+        # Отсев спама и превышений лимита до любых обращений к базе данных
+        shed = await _ashed_public_post(request, AppointmentForm, _appointment_throttle_checks(request))
+        if shed:
+            return shed
+        
+        # Проверка формы не обращается к базе: врач проверяется по справочнику
+        form = AppointmentForm(request.POST, doctor_catalog=catalog)
+        if form.is_valid():
+            if await _duplicate_appointments(form.cleaned_data).aexists():
+                messages.warning(request, DUPLICATE_APPOINTMENT_MESSAGE)
+                return render(request, 'core/appointment.html', {'form': form})
+            
+            appointment = form.save(commit=False)
+            await appointment.asave()
+            await send_appointment_confirmation.aenqueue(appointment.id, database=appointment._state.db)
+            messages.success(request, APPOINTMENT_SUCCESS_MESSAGE)
+            return redirect('appointment_success')
+    else:
+        form = AppointmentForm(doctor_catalog=catalog)
+    
+    return render(request, 'core/appointment.html', {'form': form})
+
+
+async def aappointment_success(request):
+    """
+    Страница подтверждения записи (асинхронный вариант appointment_success).
+    
+    Returns:
+        HttpResponse: Рендер страницы успеха
+    """
+    return render(request, 'core/appointment_success.html')
+
+
+async def aall_testimonials(request):
+    """
+    Публичный список отзывов (асинхронный вариант all_testimonials).
+    
+    Args:
+        request: HTTP-запрос с параметрами rating, doctor и after
+        
+    Returns:
+        HttpResponse: Рендер страницы списка отзывов
+    """
+    return render(request, 'core/testimonials.html', await atestimonials_listing(request.GET))
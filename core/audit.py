@@ -0,0 +1,151 @@
+"""
+Журнал доступа к медицинским данным без синхронной вставки в запросе.
+
+Представления только добавляют несохраненную запись AccessLog в буфер
+процесса. Фоновый поток сохраняет буфер одним bulk_create, когда в нем
+накапливается AUDIT_BUFFER_SIZE записей или проходит AUDIT_FLUSH_INTERVAL
+секунд; остаток сохраняется при завершении процесса (atexit). Рабочие
+процессы serve завершаются через os._exit, минуя atexit, и сохраняют
+остаток вызовом buffer.flush() перед выходом.
+
+Если база недоступна, записи возвращаются в буфер для следующей
+попытки. Буфер ограничен AUDIT_MAX_BUFFER записями: сверх лимита
+отбрасываются самые старые, и об этом пишется в лог.
+"""
+
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+from django.utils import timezone
+
+from .branches import current_database
+from .models import AccessLog
+from .throttling import client_ip
+
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """
+    Буфер записей журнала доступа одного процесса.
+
+    Attributes:
+        size (int): Количество записей, при котором буфер сохраняется сразу
+        interval (float): Максимальное время хранения записей в буфере, с
+        max_size (int): Предельный размер буфера при недоступной базе
+    """
+
+    def __init__(self, size=None, interval=None, max_size=None):
+        self.size = size or getattr(settings, 'AUDIT_BUFFER_SIZE', 200)
+        self.interval = interval or getattr(settings, 'AUDIT_FLUSH_INTERVAL', 5)
+        self.max_size = max_size or getattr(settings, 'AUDIT_MAX_BUFFER', 10000)
+        self._lock = threading.Lock()
+        self._entries = []
+        self._wakeup = threading.Event()
+        self._flusher = None
+        self._pid = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add(self, entry):
+        """
+        Добавляет запись в буфер; не обращается к базе данных.
+
+        Args:
+            entry: Несохраненная запись AccessLog
+        """
+        with self._lock:
+            self._entries.append(entry)
+            full = len(self._entries) >= self.size
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Сохраняет накопленные записи одним запросом.
+
+        Returns:
+            int: Количество сохраненных записей
+        """
+        with self._lock:
+            entries, self._entries = self._entries, []
+        if not entries:
+            return 0
+        try:
+            AccessLog.objects.bulk_create(entries, batch_size=self.size)
+        except DatabaseError:
+            logger.exception('Не удалось сохранить журнал доступа (%s записей)', len(entries))
+            self._requeue(entries)
+            return 0
+        return len(entries)
+
+    def _requeue(self, entries):
+        """Возвращает несохраненные записи в начало буфера."""
+        with self._lock:
+            self._entries[:0] = entries
+            overflow = len(self._entries) - self.max_size
+            if overflow > 0:
+                del self._entries[:overflow]
+        if overflow > 0:
+            logger.error('Буфер журнала доступа переполнен, потеряно записей: %s', overflow)
+
+    def _ensure_flusher(self):
+        """Запускает фоновый поток сохранения (заново после fork)."""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            # После fork поток родителя в дочернем процессе не существует
+            self._wakeup = threading.Event()
+            self._flusher = threading.Thread(target=self._run, name='audit-flusher', daemon=True)
+            self._flusher.start()
+            self._pid = pid
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+
+buffer = AuditBuffer()
+atexit.register(buffer.flush)
+
+
+def record_access(request, action, appointment):
+    """
+    Отмечает просмотр медицинских данных врачом.
+
+    Запись попадает в буфер процесса и сохраняется позже пакетом.
+    Ничего не делает, если AUDIT_ENABLED = False.
+
+    Args:
+        request: HTTP-запрос врача (request.doctor)
+        action: Просмотренная страница (AccessLog.ACTION_CHOICES)
+        appointment: Запись на прием, к данным которой обращались
+    """
+    if not getattr(settings, 'AUDIT_ENABLED', True):
+        return
+    accessed_at = timezone.now()
+    buffer.add(AccessLog(
+        month=AccessLog.month_of(accessed_at),
+        accessed_at=accessed_at,
+        doctor_id=request.doctor.id,
+        patient_id=appointment.patient_id,
+        appointment_id=appointment.id,
+        database=appointment._state.db or current_database() or 'default',
+        action=action,
+        ip=client_ip(request) or None,
+    ))
@@ -0,0 +1,247 @@
+"""
+Разделение данных клиники по филиалам.
+
+Записи на прием, пациенты, медицинские записи, уведомления и отзывы
+врачей филиала хранятся в отдельной базе данных филиала:
+BRANCH_DATABASES сопоставляет код филиала (Branch.code) с именем
+подключения. Врачи без филиала и филиалы без своей базы остаются
+в основной базе. Маршрутизацию выполняет core.routers.BranchRouter:
+
+- новая строка записывается в базу филиала своего врача (doctor_id);
+- связанные объекты читаются из базы исходного экземпляра;
+- остальные запросы идут в базу, закрепленную use_database()
+  (кабинет врача закрепляет базу своего филиала в doctor_required),
+  иначе в основную базу.
+
+Справочные данные (филиалы, врачи, услуги) изменяются только в основной
+базе. На них ссылаются внешние ключи, поэтому их копии есть в каждой
+базе филиала и обновляются сигналами после фиксации транзакции
+(replicate); полную сверку выполняет команда sync_branches.
+
+Немногие запросы по всем филиалам (публичный список отзывов, история
+пациента, рассылка напоминаний, счетчики в админке) выполняются
+параллельно во всех базах функциями scatter(), gather() и gather_count().
+Первичные ключи в базах филиалов независимы и уникальны только
+внутри своей базы.
+"""
+
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .choices import get_doctor_catalog
+from .models import Branch, Doctor, Service
+
+
+# Справочные модели в порядке создания копий (внешние ключи - на предыдущие)
+CATALOG_MODELS = (Branch, Service, Doctor)
+
+# База для запросов без подсказки маршрутизатору (None - основная)
+_pinned = ContextVar('clinic_branch_database', default=None)
+
+
+def branch_aliases():
+    """Базы филиалов: код филиала -> имя подключения."""
+    return getattr(settings, 'BRANCH_DATABASES', {})
+
+
+def is_sharded():
+    """Есть ли у филиалов отдельные базы."""
+    return bool(branch_aliases())
+
+
+def shard_databases():
+    """Все базы с данными филиалов: основная и базы филиалов без повторов."""
+    return list(dict.fromkeys(['default', *branch_aliases().values()]))
+
+
+def branch_databases():
+    """Базы филиалов без основной базы (получатели копий справочников)."""
+    return [database for database in shard_databases() if database != 'default']
+
+
+def branch_database(branch_id):
+    """
+    База данных филиала.
+
+    Args:
+        branch_id: Код филиала (None - врач без филиала)
+
+    Returns:
+        str: Имя подключения
+    """
+    return branch_aliases().get(branch_id, 'default')
+
+
+def doctor_database(doctor):
+    """
+    База данных с приемами, пациентами и отзывами врача.
+
+    Экземпляр врача не требует запросов; по ID филиал берется
+    из кэшированного справочника врачей, а для помеченных на удаление
+    врачей (их нет в справочнике) - из основной базы.
+
+    Args:
+        doctor: Врач (с загруженным полем branch_id) или его ID
+
+    Returns:
+        str: Имя подключения
+    """
+    if not is_sharded():
+        return 'default'
+    if isinstance(doctor, Doctor):
+        return branch_database(doctor.branch_id)
+    catalog = get_doctor_catalog()
+    if doctor in catalog:
+        return branch_database(catalog.branch(doctor))
+    return branch_database(Doctor.all_objects.filter(pk=doctor).values_list('branch_id', flat=True).first())
+
+
+def current_database():
+    """База, закрепленная use_database() (None - не закреплена)."""
+    return _pinned.get()
+
+
+@contextmanager
+def use_database(database):
+    """
+    Закрепляет базу для запросов к данным филиалов без явного using().
+
+    Действует в текущем контексте (потоке или задаче asyncio)
+    и в вызовах sync_to_async из него.
+
+    Args:
+        database: Имя подключения
+    """
+    token = _pinned.set(database)
+    try:
+        yield database
+    finally:
+        _pinned.reset(token)
+
+
+def _call_in(function, database):
+    try:
+        with use_database(database):
+            return function(database)
+    finally:
+        # Соединения потока пула закрываются вместе с ним
+        connections.close_all()
+
+
+def scatter(function, databases=None):
+    """
+    Выполняет function(database) во всех базах филиалов параллельно.
+
+    Внутри вызова база закреплена через use_database(). Каждая база
+    обрабатывается в своем потоке со своим соединением, поэтому вызовы
+    не видят незафиксированных изменений вызывающего потока.
+
+    Args:
+        function: Функция от имени подключения
+        databases: Базы (по умолчанию shard_databases())
+
+    Returns:
+        list: Результаты в порядке баз
+    """
+    databases = shard_databases() if databases is None else list(databases)
+    if len(databases) == 1:
+        with use_database(databases[0]):
+            return [function(databases[0])]
+    workers = min(len(databases), getattr(settings, 'BRANCH_SCATTER_WORKERS', 8))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='branch') as executor:
+        return list(executor.map(lambda database: _call_in(function, database), databases))
+
+
+def gather(queryset, key, reverse=False, limit=None):
+    """
+    Строки набора из всех баз в одном упорядоченном списке.
+
+    Набор должен быть упорядочен в базе так же, как задает key: списки
+    баз сливаются без общей сортировки. С limit из каждой базы читается
+    не больше limit строк.
+
+    Args:
+        queryset: QuerySet, в том числе values() и values_list()
+        key: Ключ сортировки строки
+        reverse: Порядок по убыванию ключа
+        limit: Максимальное количество строк
+
+    Returns:
+        list: Строки всех баз
+    """
+    if limit is not None:
+        queryset = queryset[:limit]
+    parts = scatter(lambda database: list(queryset.using(database)))
+    rows = list(heapq.merge(*parts, key=key, reverse=reverse))
+    return rows if limit is None else rows[:limit]
+
+
+def gather_count(queryset):
+    """Количество строк набора во всех базах."""
+    return sum(scatter(lambda database: queryset.using(database).count()))
+
+
+def _field_values(instance):
+    return {
+        field.attname: getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields if not field.primary_key
+    }
+
+
+def replicate(instance):
+    """
+    Обновляет копии справочной строки во всех базах филиалов.
+
+    Копии пишутся запросами UPDATE и bulk_create, поэтому сигналы
+    сохранения для них не отправляются.
+
+    Args:
+        instance: Филиал, врач или услуга из основной базы
+    """
+    model = type(instance)
+    values = _field_values(instance)
+    for database in branch_databases():
+        manager = model._base_manager.using(database)
+        if not manager.filter(pk=instance.pk).update(**values):
+            manager.bulk_create([model(pk=instance.pk, **values)])
+
+
+def replicate_delete(model, pk):
+    """Удаляет копии справочной строки из баз филиалов."""
+    for database in branch_databases():
+        model._base_manager.using(database).filter(pk=pk).delete()
+
+
+def sync_replicas(batch_size=500):
+    """
+    Приводит копии справочников в базах филиалов к основной базе.
+
+    Недостающие строки создаются, существующие обновляются, лишние
+    удаляются (в обратном порядке моделей, чтобы не нарушить PROTECT).
+
+    Returns:
+        dict: (база, модель) -> количество созданных, обновленных и удаленных строк
+    """
+    report = {}
+    for database in branch_databases():
+        for model in CATALOG_MODELS:
+            source = list(model._base_manager.using('default').order_by('pk'))
+            existing = set(model._base_manager.using(database).values_list('pk', flat=True))
+            fields = [field.name for field in model._meta.concrete_fields if not field.primary_key]
+            missing = [obj for obj in source if obj.pk not in existing]
+            present = [obj for obj in source if obj.pk in existing]
+            model._base_manager.using(database).bulk_create(missing, batch_size=batch_size)
+            if present:
+                model._base_manager.using(database).bulk_update(present, fields, batch_size=batch_size)
+            report[(database, model)] = {'created': len(missing), 'updated': len(present), 'deleted': 0}
+        for model in reversed(CATALOG_MODELS):
+            source_pks = set(model._base_manager.using('default').values_list('pk', flat=True))
+            stale = model._base_manager.using(database).exclude(pk__in=source_pks)
+            report[(database, model)]['deleted'] = stale.count()
+            stale.delete()
+    return report
@@ -0,0 +1,208 @@
+"""
+Лента приемов врача в формате iCalendar (RFC 5545) для календарей.
+
+Врач подписывается в календаре на секретный адрес с ключом
+Doctor.calendar_token. В ленту попадают неотмененные приемы за
+CALENDAR_PAST_DAYS дней назад и CALENDAR_FUTURE_DAYS дней вперед;
+они выбираются по индексу (doctor, date).
+
+Календари опрашивают ленту часто, а приемы врача меняются редко.
+Поэтому у ленты есть отметка последнего изменения в кэше: ее обновляют
+сигналы сохранения и удаления приемов и самого врача. Из отметки и
+текущей даты (окно сдвигается каждый день) строятся ETag
+и Last-Modified, так что повторный опрос без изменений получает 304
+без запросов к приемам. Готовое тело ленты кэшируется под ключом
+с той же отметкой и после изменения просто перестает использоваться.
+
+В ленту выводится только имя пациента и статус приема: содержимое
+календаря синхронизируется со сторонними сервисами, поэтому телефон
+и жалобы пациента в нее не попадают.
+"""
+
+import datetime
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+
+from .branches import doctor_database
+from .models import Appointment
+
+
+STAMP_KEY_TEMPLATE = 'calendar:stamp:{}'
+FEED_KEY_TEMPLATE = 'calendar:feed:{}:{}:{}'
+
+PRODUCT_ID = '-//Клиника Здоровье//Приемы врача//RU'
+
+EVENT_STATUSES = {
+    'pending': 'TENTATIVE',
+    'confirmed': 'CONFIRMED',
+    'completed': 'CONFIRMED',
+}
+STATUS_LABELS = dict(Appointment.STATUS_CHOICES)
+
+
+def touch_calendar(doctor_id):
+    """
+    Отмечает изменение ленты врача.
+
+    Вызывается из сигналов после фиксации транзакции: иначе параллельный
+    опрос мог бы сохранить в кэш ленту без изменения под новой отметкой.
+    """
+    cache.set(STAMP_KEY_TEMPLATE.format(doctor_id), time.time_ns() // 1000, timeout=None)
+
+
+def calendar_stamp(doctor_id):
+    """
+    Отметка последнего изменения ленты врача в микросекундах.
+
+    Если отметка вытеснена из кэша, за изменение принимается текущий
+    момент: календари получат ленту заново один раз.
+    """
+    key = STAMP_KEY_TEMPLATE.format(doctor_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time_ns() // 1000, timeout=None)
+        stamp = cache.get(key, time.time_ns() // 1000)
+    return stamp
+
+
+def feed_window(today=None):
+    """
+    Период приемов в ленте.
+
+    Returns:
+        tuple: Первая и последняя дата включительно
+    """
+    today = today or timezone.localdate()
+    return (
+        today - datetime.timedelta(days=getattr(settings, 'CALENDAR_PAST_DAYS', 30)),
+        today + datetime.timedelta(days=getattr(settings, 'CALENDAR_FUTURE_DAYS', 180)),
+    )
+
+
+def feed_validators(doctor):
+    """
+    Значения для условного GET.
+
+    Args:
+        doctor: Врач
+
+    Returns:
+        tuple: ETag (в кавычках), время последнего изменения (Unix-время
+            в секундах), отметка и дата окна
+    """
+    stamp = calendar_stamp(doctor.pk)
+    today = timezone.localdate()
+    etag = f'"{doctor.pk}-{stamp}-{today:%Y%m%d}"'
+    # Окно сдвигается в полночь, поэтому лента не старше начала текущих суток
+    midnight = timezone.make_aware(datetime.datetime.combine(today, datetime.time.min))
+    last_modified = max(stamp // 1_000_000, int(midnight.timestamp()))
+    return etag, last_modified, stamp, today
+
+
+def feed_url(request, doctor):
+    """
+    Абсолютный адрес ленты врача; ключ создается при первом обращении.
+
+    Returns:
+        str: Адрес для подписки в календаре
+    """
+    token = doctor.calendar_token or doctor.rotate_calendar_token()
+    return request.build_absolute_uri(reverse('doctor_calendar', args=[token]))
+
+
+def _escape(text):
+    """Экранирование текстового значения iCalendar."""
+    return (
+        text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def _fold(line):
+    """Переносит строку длиннее 75 байт (RFC 5545, 3.1) без разрыва символов UTF-8."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Не разрывать многобайтовый символ: байты продолжения имеют вид 10xxxxxx
+        while end < len(data) and data[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        start, limit = end, 74
+    return '\r\n '.join(parts)
+
+
+def render_feed(doctor, window):
+    """
+    Формирует ленту врача.
+
+    Args:
+        doctor: Врач
+        window: Период (первая и последняя дата)
+
+    Returns:
+        bytes: Содержимое файла .ics
+    """
+    start, end = window
+    domain = getattr(settings, 'CALENDAR_UID_DOMAIN', 'clinic-zdorovie.ru')
+    appointments = (
+        Appointment.objects.using(doctor_database(doctor))
+        .filter(doctor_id=doctor.pk, date__range=(start, end))
+        .exclude(status='cancelled')
+        .order_by('date', 'id')
+        .values_list('id', 'name', 'date', 'status', 'created_at')
+    )
+    generated = timezone.now().astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODUCT_ID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{_escape(f"Приемы: {doctor.name}")}',
+        f'X-WR-TIMEZONE:{settings.TIME_ZONE}',
+    ]
+    for pk, name, date, status, created_at in appointments.iterator():
+        created = created_at.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:appointment-{pk}@{domain}',
+            f'DTSTAMP:{generated}',
+            f'CREATED:{created}',
+            # Время приема не хранится: событие на весь день
+            f'DTSTART;VALUE=DATE:{date:%Y%m%d}',
+            f'DTEND;VALUE=DATE:{date + datetime.timedelta(days=1):%Y%m%d}',
+            f'SUMMARY:{_escape(f"Прием: {name}")}',
+            f'DESCRIPTION:{_escape(f"Статус: {STATUS_LABELS.get(status, status)}")}',
+            f'STATUS:{EVENT_STATUSES.get(status, "CONFIRMED")}',
+            'TRANSP:TRANSPARENT',
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines).encode()
+
+
+def cached_feed(doctor, stamp, today):
+    """
+    Лента врача из кэша или сформированная заново.
+
+    Args:
+        doctor: Врач
+        stamp: Отметка изменения из feed_validators()
+        today: Дата, от которой отсчитывается окно
+
+    Returns:
+        bytes: Содержимое файла .ics
+    """
+    key = FEED_KEY_TEMPLATE.format(doctor.pk, stamp, f'{today:%Y%m%d}')
+    body = cache.get(key)
+    if body is None:
+        body = render_feed(doctor, feed_window(today))
+        cache.set(key, body, getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 86400))
+    return body
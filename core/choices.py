@@ -0,0 +1,217 @@
+"""
+Кэшированные варианты выбора для публичных форм.
+
+Модуль хранит справочник врачей (id, имя, специализация, филиал) в кэше Django
+под версионированным ключом. Версия увеличивается сигналами при
+изменении врачей, поэтому формы не выполняют запрос ``Doctor.objects.all()``
+ни при отображении, ни при проверке отправленных данных.
+"""
+
+from django import forms
+from django.core.cache import cache
+
+from .models import Doctor
+
+
+CATALOG_VERSION_KEY = 'doctors:catalog:version'
+CATALOG_KEY_TEMPLATE = 'doctors:catalog:v2:{}'
+CATALOG_TIMEOUT = 24 * 60 * 60
+
+# Последний прочитанный справочник процесса: (версия, DoctorCatalog)
+_memo = (None, None)
+
+
+class DoctorCatalog:
+    """
+    Неизменяемый снимок справочника врачей.
+
+    Attributes:
+        rows (tuple): Кортежи (id, name, specialization), упорядоченные
+                      по специализации и имени
+    """
+
+    def __init__(self, rows):
+        rows = [tuple(row) for row in rows]
+        self.rows = tuple(row[:3] for row in rows)
+        self._by_id = {row[0]: row for row in rows}
+
+    def __contains__(self, pk):
+        return pk in self._by_id
+
+    def __len__(self):
+        return len(self.rows)
+
+    def choices(self, grouped=False):
+        """
+        Варианты выбора для виджета Select.
+
+        Args:
+            grouped: Группировать врачей по специализации (optgroup)
+
+        Returns:
+            list: Варианты выбора без пустого значения
+        """
+        if not grouped:
+            return [(pk, name) for pk, name, _ in self.rows]
+        groups = {}
+        for pk, name, specialization in self.rows:
+            groups.setdefault(specialization, []).append((pk, name))
+        return list(groups.items())
+
+    def branch(self, pk):
+        """Код филиала врача (None - врач без филиала)."""
+        return self._by_id[pk][3]
+
+    def instance(self, pk):
+        """
+        Объект Doctor без запроса к базе данных.
+
+        Заполнены только id, имя, специализация и филиал; остальные поля
+        загружаются отложенно при первом обращении.
+
+        Args:
+            pk: ID врача из справочника
+
+        Returns:
+            Doctor: Экземпляр врача
+        """
+        return Doctor.from_db('default', ['id', 'name', 'specialization', 'branch_id'], self._by_id[pk])
+
+
+def _cached_catalog(version, rows_loader):
+    global _memo
+    memo_version, catalog = _memo
+    if catalog is not None and memo_version == version:
+        return catalog
+    catalog = DoctorCatalog(rows_loader())
+    _memo = (version, catalog)
+    return catalog
+
+
+def _catalog_queryset():
+    return (
+        Doctor.objects.order_by('specialization', 'name')
+        .values_list('id', 'name', 'specialization', 'branch_id')
+    )
+
+
+def get_doctor_catalog():
+    """
+    Текущий справочник врачей.
+
+    Returns:
+        DoctorCatalog: Снимок справочника
+    """
+    version = cache.get(CATALOG_VERSION_KEY, 0)
+
+    def load():
+        key = CATALOG_KEY_TEMPLATE.format(version)
+        rows = cache.get(key)
+        if rows is None:
+            rows = list(_catalog_queryset())
+            cache.set(key, rows, CATALOG_TIMEOUT)
+        return rows
+
+    return _cached_catalog(version, load)
+
+
+async def aget_doctor_catalog():
+    """Асинхронный вариант get_doctor_catalog() для ASGI-представлений."""
+    version = await cache.aget(CATALOG_VERSION_KEY, 0)
+    memo_version, catalog = _memo
+    if catalog is not None and memo_version == version:
+        return catalog
+    key = CATALOG_KEY_TEMPLATE.format(version)
+    rows = await cache.aget(key)
+    if rows is None:
+        rows = [row async for row in _catalog_queryset()]
+        await cache.aset(key, rows, CATALOG_TIMEOUT)
+    return _cached_catalog(version, lambda: rows)
+
+
+def bump_catalog_version():
+    """
+    Инвалидирует справочник врачей.
+
+    Вызывается после фиксации изменения врача. Другие процессы видят
+    новую версию только при общем для них кэше Django (settings_prod).
+    """
+    cache.add(CATALOG_VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 1, timeout=None)
+
+
+class DoctorChoiceField(forms.ChoiceField):
+    """
+    Поле выбора врача на основе кэшированного справочника.
+
+    Проверяет отправленный ID по снимку справочника без запроса к базе
+    и возвращает экземпляр Doctor, пригодный для сохранения ModelForm.
+
+    Attributes:
+        grouped (bool): Группировать врачей по специализации
+        empty_label (str): Текст пустого варианта
+    """
+
+    def __init__(self, *, grouped=False, empty_label='---------', **kwargs):
+        self.grouped = grouped
+        self.empty_label = empty_label
+        self.catalog = None
+        super().__init__(**kwargs)
+
+    def set_catalog(self, catalog):
+        """Устанавливает снимок справочника и варианты выбора."""
+        self.catalog = catalog
+        self.choices = [('', self.empty_label)] + catalog.choices(self.grouped)
+
+    def prepare_value(self, value):
+        if isinstance(value, Doctor):
+            return value.pk
+        return value
+
+    def to_python(self, value):
+        value = self.prepare_value(value)
+        if value in self.empty_values:
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise forms.ValidationError(self.error_messages['invalid_choice'],
+                                        code='invalid_choice', params={'value': value})
+
+    def validate(self, value):
+        if value is None:
+            if self.required:
+                raise forms.ValidationError(self.error_messages['required'], code='required')
+            return
+        if value not in self.catalog:
+            raise forms.ValidationError(self.error_messages['invalid_choice'],
+                                        code='invalid_choice', params={'value': value})
+
+    def clean(self, value):
+        pk = super().clean(value)
+        return None if pk is None else self.catalog.instance(pk)
+
+    def has_changed(self, initial, data):
+        return str(self.prepare_value(initial) or '') != str(data or '')
+
+
+class DoctorCatalogFormMixin:
+    """
+    Примесь для ModelForm с полем doctor на основе DoctorChoiceField.
+
+    Подключает справочник к полю и исключает doctor из проверки модели:
+    иначе ForeignKey.validate() выполнил бы запрос на существование врача,
+    хотя ID уже проверен по справочнику.
+    """
+
+    def __init__(self, *args, doctor_catalog=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['doctor'].set_catalog(doctor_catalog or get_doctor_catalog())
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        exclude.add('doctor')
+        return exclude
@@ -0,0 +1,197 @@
+"""
+Сжатие ответов (gzip, brotli) и минификация HTML.
+
+Brotli используется, если установлен пакет ``brotli`` и клиент его
+принимает; иначе gzip. Потоковые ответы (выгрузки) сжимаются по мере
+генерации одним потоком без накопления тела в памяти.
+
+Защита от BREACH: страницы, в которые выведен CSRF-токен, сжимаются
+только gzip со случайным по длине именем файла в заголовке
+(Heal The Breach, как в django.middleware.gzip), что маскирует длину
+ответа. Сам токен Django к тому же маскирует заново в каждом ответе.
+"""
+
+import gzip
+import re
+import secrets
+import string
+import struct
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    # Необязательная зависимость: без нее ответы сжимаются только gzip
+    brotli = None
+
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/calendar', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+)
+
+re_accept_encoding = re.compile(r'\s*([a-z*]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*', re.I)
+
+
+def accepted_encodings(header):
+    """
+    Кодировки из заголовка Accept-Encoding с ненулевым весом.
+
+    Returns:
+        set: Имена кодировок в нижнем регистре
+    """
+    accepted = set()
+    for part in header.split(','):
+        match = re_accept_encoding.fullmatch(part)
+        if not match:
+            continue
+        try:
+            weight = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        if weight > 0:
+            accepted.add(match.group(1).lower())
+    return accepted
+
+
+def choose_encoding(header, breach_sensitive=False):
+    """
+    Выбирает кодировку ответа.
+
+    Args:
+        header: Значение Accept-Encoding
+        breach_sensitive: В ответе есть CSRF-токен (только gzip с HTB)
+
+    Returns:
+        str | None: ``br``, ``gzip`` или None
+    """
+    accepted = accepted_encodings(header)
+    if brotli is not None and not breach_sensitive and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def is_compressible(content_type):
+    """Сжимается ли ответ с указанным Content-Type."""
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return media_type in COMPRESSIBLE_TYPES
+
+
+def _random_filename(max_bytes):
+    alphabet = (string.ascii_letters + string.digits).encode()
+    return bytes(secrets.choice(alphabet) for _ in range(secrets.randbelow(max_bytes) + 1))
+
+
+class GzipStream:
+    """
+    Потоковый gzip-кодировщик с необязательным случайным именем файла.
+
+    Attributes:
+        padding (int): Максимальная длина случайного имени файла (0 - без имени)
+    """
+
+    def __init__(self, padding=0):
+        self._deflate = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+        self._crc = 0
+        self._size = 0
+        flags = gzip.FNAME if padding else 0
+        # Заголовок RFC 1952: сигнатура, deflate, флаги, mtime=0, XFL, OS=unknown
+        self._header = b'\x1f\x8b\x08' + bytes([flags]) + b'\x00\x00\x00\x00\x00\xff'
+        if padding:
+            self._header += _random_filename(padding) + b'\x00'
+
+    def compress(self, data):
+        self._crc = zlib.crc32(data, self._crc)
+        self._size += len(data)
+        output, self._header = self._header + self._deflate.compress(data), b''
+        return output
+
+    def finish(self):
+        output, self._header = self._header + self._deflate.flush(), b''
+        return output + struct.pack('<LL', self._crc, self._size & 0xffffffff)
+
+
+class BrotliStream:
+    """Потоковый brotli-кодировщик."""
+
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def make_stream(encoding, padding=0):
+    """Кодировщик для выбранной кодировки."""
+    if encoding == 'br':
+        return BrotliStream()
+    return GzipStream(padding)
+
+
+def compress_bytes(data, encoding, padding=0):
+    """Сжимает тело ответа целиком."""
+    stream = make_stream(encoding, padding)
+    return stream.compress(data) + stream.finish()
+
+
+def compress_iterator(chunks, encoding, padding=0):
+    """Сжимает потоковое тело по мере генерации."""
+    stream = make_stream(encoding, padding)
+    for chunk in chunks:
+        output = stream.compress(chunk)
+        if output:
+            yield output
+    yield stream.finish()
+
+
+async def acompress_iterator(chunks, encoding, padding=0):
+    """Асинхронный вариант compress_iterator() для ответов под ASGI."""
+    stream = make_stream(encoding, padding)
+    async for chunk in chunks:
+        output = stream.compress(chunk)
+        if output:
+            yield output
+    yield stream.finish()
+
+
+# Фрагменты, внутри которых пробелы значимы
+re_preserved = re.compile(r'(<(pre|textarea|script)\b.*?</\2\s*>)', re.S | re.I)
+re_line_breaks = re.compile(r'[ \t]*(?:\r?\n[ \t]*)+')
+re_spaces = re.compile(r'[ \t]{2,}')
+
+
+def minify_html(html):
+    """
+    Сжимает пробелы в HTML без изменения отображения.
+
+    Отступы и пустые строки сворачиваются в один перевод строки,
+    серии пробелов - в один пробел. Содержимое <pre>, <textarea>
+    и <script> не изменяется.
+
+    Args:
+        html: Исходная разметка
+
+    Returns:
+        str: Разметка без лишних пробелов
+    """
+    if not getattr(settings, 'HTML_MINIFY', True):
+        return html
+    parts = re_preserved.split(html)
+    output = []
+    # split() с двумя группами: текст, фрагмент целиком, имя тега, текст, ...
+    for index in range(0, len(parts), 3):
+        text = re_line_breaks.sub('\n', parts[index])
+        output.append(re_spaces.sub(' ', text))
+        if index + 1 < len(parts):
+            output.append(parts[index + 1])
+    return ''.join(output)
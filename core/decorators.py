@@ -0,0 +1,48 @@
+"""
+Декораторы представлений приложения Core.
+
+Модуль содержит декораторы для проверки доступа к страницам
+личного кабинета врача.
+"""
+
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.shortcuts import redirect
+
+from .branches import doctor_database, use_database
+
+
+def doctor_required(view_func):
+    """
+    Пропускает к представлению только вошедшего в систему врача.
+
+    Использует ``request.doctor``, заполненный DoctorMiddleware.
+    Анонимные запросы перенаправляются на страницу входа. На время
+    представления закрепляет базу филиала врача (core.branches), так что
+    запросы кабинета к приемам и медицинским записям идут в нее. Поддерживает
+    асинхронные представления: сессия читается в отдельном потоке.
+
+    Args:
+        view_func: Декорируемое представление
+
+    Returns:
+        function: Обернутое представление
+    """
+    if iscoroutinefunction(view_func):
+        @wraps(view_func)
+        async def async_wrapper(request, *args, **kwargs):
+            if not await sync_to_async(bool)(request.doctor):
+                return redirect('staff_login')
+            with use_database(doctor_database(request.doctor)):
+                return await view_func(request, *args, **kwargs)
+        return markcoroutinefunction(async_wrapper)
+
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        # SimpleLazyObject над None не равен None, поэтому проверяем истинность
+        if not request.doctor:
+            return redirect('staff_login')
+        with use_database(doctor_database(request.doctor)):
+            return view_func(request, *args, **kwargs)
+    return wrapper
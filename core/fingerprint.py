@@ -0,0 +1,46 @@
+"""
+Отпечатки нормализованного текста для поиска дубликатов.
+
+Текст приводится к единому виду (Unicode NFKC, casefold, схлопывание
+пробельных символов), после чего хешируется. Два текста, отличающиеся
+только регистром, пробелами и переносами строк, дают одинаковый
+отпечаток, поэтому проверка дубликата сводится к поиску по индексу
+вместо сравнения длинных TextField или ``LIKE '%...%'``.
+"""
+
+import hashlib
+import unicodedata
+
+
+FINGERPRINT_LENGTH = 32
+
+# Разделитель частей, который не может появиться после нормализации текста
+_SEPARATOR = '\x1f'
+
+
+def normalize_text(text):
+    """
+    Нормализованный текст: NFKC, без учета регистра, с одиночными пробелами.
+
+    Args:
+        text: Исходный текст
+
+    Returns:
+        str: Нормализованный текст
+    """
+    text = unicodedata.normalize('NFKC', text or '').casefold()
+    return ' '.join(text.split())
+
+
+def content_fingerprint(*parts):
+    """
+    Отпечаток нормализованного содержимого.
+
+    Args:
+        *parts: Части содержимого (например, имя автора и текст)
+
+    Returns:
+        str: Шестнадцатеричный хеш длиной FINGERPRINT_LENGTH
+    """
+    normalized = _SEPARATOR.join(normalize_text(part) for part in parts)
+    return hashlib.blake2b(normalized.encode(), digest_size=FINGERPRINT_LENGTH // 2).hexdigest()
@@ -8,12 +8,72 @@
 """
 
 import datetime
+import time
 from django import forms
-from .models import Appointment, Doctor, MedicalRecord, Testimonial
+from django.conf import settings
+from django.core import signing
+from django.utils import timezone
+from .choices import DoctorCatalogFormMixin, DoctorChoiceField
+from .models import Appointment, MedicalRecord, Testimonial
 from django.core.validators import RegexValidator
 
 
-class AppointmentForm(forms.ModelForm):
+class SpamProtectionMixin(forms.Form):
+    """
+    Защита публичных форм от автоматической отправки.
+    
+    Добавляет скрытое поле-ловушку (honeypot), которое заполняют только
+    боты, и подписанную метку времени показа формы. Проверка выполняется
+    методом detect_spam() по сырым данным POST без обращения к базе данных.
+    
+    Attributes:
+        website (CharField): Поле-ловушка, невидимое для людей
+        form_started (CharField): Подписанное время показа формы
+    """
+    
+    SIGNING_SALT = 'core.forms.spam'
+    
+    website = forms.CharField(
+        required=False,
+        label='Веб-сайт',
+        widget=forms.TextInput(attrs={
+            'autocomplete': 'off',
+            'tabindex': '-1',
+        })
+    )
+    
+    form_started = forms.CharField(required=False, widget=forms.HiddenInput)
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['form_started'].initial = signing.Signer(salt=self.SIGNING_SALT).sign(str(int(time.time())))
+    
+    @classmethod
+    def detect_spam(cls, data):
+        """
+        Проверка признаков автоматической отправки.
+        
+        Args:
+            data: Данные POST-запроса
+            
+        Returns:
+            str | None: Причина отклонения или None для обычной отправки
+        """
+        if data.get('website'):
+            return 'honeypot'
+        try:
+            started = int(signing.Signer(salt=cls.SIGNING_SALT).unsign(data.get('form_started', '')))
+        except (signing.BadSignature, ValueError):
+            return 'no_timestamp'
+        elapsed = time.time() - started
+        if elapsed < getattr(settings, 'SPAM_MIN_SUBMIT_SECONDS', 3):
+            return 'too_fast'
+        if elapsed > getattr(settings, 'SPAM_MAX_FORM_AGE', 86400):
+            return 'expired'
+        return None
+
+
+class AppointmentForm(DoctorCatalogFormMixin, SpamProtectionMixin, forms.ModelForm):
     """
     Форма для записи пациента на прием к врачу.
     
@@ -23,7 +83,9 @@ class AppointmentForm(forms.ModelForm):
     Attributes:
         name (CharField): Имя пациента с валидацией длины
         phone (CharField): Номер телефона с regex-валидацией
-        doctor (ModelChoiceField): Выбор врача из доступных специалистов
+        email (EmailField): Email для подтверждения и напоминаний (необязательный)
+        doctor (DoctorChoiceField): Выбор врача из кэшированного справочника,
+                                    сгруппированного по специализации
         date (DateField): Дата приема с ограничением на прошедшие даты
         message (CharField): Дополнительное сообщение (необязательное)
     """
@@ -52,9 +114,18 @@ class AppointmentForm(forms.ModelForm):
         })
     )
     
-    doctor = forms.ModelChoiceField(
+    email = forms.EmailField(
+        label='Email',
+        required=False,
+        widget=forms.EmailInput(attrs={
+            'class': 'form-control',
+            'placeholder': 'Email для напоминания (необязательно)'
+        })
+    )
+    
+    doctor = DoctorChoiceField(
         label='Специалист',
-        queryset=Doctor.objects.all(),
+        grouped=True,
         widget=forms.Select(attrs={'class': 'form-select'}),
         empty_label='Выберите специалиста'
     )
@@ -64,7 +135,6 @@ class AppointmentForm(forms.ModelForm):
         widget=forms.DateInput(attrs={
             'class': 'form-control',
             'type': 'date',
-            'min': datetime.date.today().strftime('%Y-%m-%d')
         }),
         input_formats=['%Y-%m-%d']
     )
@@ -82,10 +152,43 @@ class AppointmentForm(forms.ModelForm):
     class Meta:
         """Метаданные формы для связи с моделью Appointment."""
         model = Appointment
-        fields = ['name', 'phone', 'doctor', 'date', 'message']
+        fields = ['name', 'phone', 'email', 'doctor', 'date', 'message']
+    
+    def __init__(self, *args, **kwargs):
+        """
+        Инициализация формы.
+        
+        Границы допустимых дат вычисляются при каждом создании формы,
+        а не при импорте модуля, чтобы не устаревать в долгоживущих процессах.
+        Справочник врачей можно передать аргументом doctor_catalog
+        (используется асинхронными представлениями).
+        """
+        super().__init__(*args, **kwargs)
+        min_date, max_date = self.date_bounds()
+        self.fields['date'].widget.attrs.update({
+            'min': min_date.isoformat(),
+            'max': max_date.isoformat(),
+        })
+    
+    @staticmethod
+    def date_bounds():
+        """Допустимый диапазон дат приема: от сегодня до горизонта записи."""
+        today = timezone.localdate()
+        horizon = getattr(settings, 'APPOINTMENT_BOOKING_HORIZON_DAYS', 180)
+        return today, today + datetime.timedelta(days=horizon)
+    
+    def clean_date(self):
+        """Проверка, что дата приема не в прошлом и не дальше горизонта записи."""
+        date = self.cleaned_data['date']
+        min_date, max_date = self.date_bounds()
+        if date < min_date:
+            raise forms.ValidationError('Нельзя записаться на прошедшую дату.')
+        if date > max_date:
+            raise forms.ValidationError(f'Запись возможна не позднее {max_date:%d.%m.%Y}.')
+        return date
 
 
-class TestimonialForm(forms.ModelForm):
+class TestimonialForm(DoctorCatalogFormMixin, SpamProtectionMixin, forms.ModelForm):
     """
     Форма для добавления отзывов пациентами о работе клиники и врачей.
     
@@ -94,11 +197,20 @@ class TestimonialForm(forms.ModelForm):
     
     Attributes:
         name (CharField): Имя пациента, оставившего отзыв
-        doctor (ModelChoiceField): Врач, к которому относится отзыв
+        doctor (DoctorChoiceField): Врач, к которому относится отзыв
         message (CharField): Текст отзыва
         rating (ChoiceField): Оценка от 1 до 5 в виде radio-кнопок
     """
     
+    doctor = DoctorChoiceField(
+        label='Врач',
+        widget=forms.Select(attrs={
+            'class': 'form-select',
+            'placeholder': 'Выберите врача'
+        }),
+        empty_label='Выберите врача'
+    )
+    
     class Meta:
         """Метаданные формы для связи с моделью Testimonial."""
         model = Testimonial
@@ -108,10 +220,6 @@ class TestimonialForm(forms.ModelForm):
                 'class': 'form-control',
                 'placeholder': 'Ваше имя *'
             }),
-            'doctor': forms.Select(attrs={
-                'class': 'form-select',
-                'placeholder': 'Выберите врача'
-            }),
             'message': forms.Textarea(attrs={
                 'class': 'form-control',
                 'rows': 4,
@@ -157,3 +265,15 @@ class MedicalRecordForm(forms.ModelForm):
             'treatment': forms.Textarea(attrs={'rows': 3}),
             'recommendations': forms.Textarea(attrs={'rows': 3}),
         }
+    
+    def __init__(self, *args, services=None, **kwargs):
+        """
+        Инициализация формы.
+        
+        Args:
+            services: Заранее загруженный список услуг; позволяет не выполнять
+                      запрос услуг при отрисовке каждой формы пакета
+        """
+        super().__init__(*args, **kwargs)
+        if services is not None:
+            self.fields['services'].widget.choices = [(service.pk, str(service)) for service in services]
@@ -0,0 +1,59 @@
+"""
+Проверки живости и готовности процесса для балансировщика и оркестратора.
+
+- ``/healthz`` - процесс жив и обрабатывает запросы (без обращения к базе);
+- ``/readyz`` - процесс прогрет (core.warmup) и база данных отвечает.
+  Пока ответ 503, балансировщик не направляет на процесс запросы.
+  Процесс прогревается при WARMUP_ON_START командой serve, clinic.wsgi
+  или clinic.asgi; под runserver прогрева нет, и /readyz всегда
+  отвечает 503.
+
+Ответы содержат PID процесса, чтобы видеть, какой рабочий процесс
+ответил, и не кэшируются.
+"""
+
+import os
+import time
+
+from django.db import DatabaseError, connections
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+
+from . import warmup
+
+
+@never_cache
+def healthz(request):
+    """Проверка живости процесса."""
+    return JsonResponse({'status': 'ok', 'pid': os.getpid()})
+
+
+@never_cache
+def readyz(request):
+    """
+    Проверка готовности процесса.
+
+    Returns:
+        JsonResponse: 200, если процесс прогрет и база отвечает, иначе 503
+    """
+    state = warmup.state
+    data = {
+        'pid': os.getpid(),
+        # Рабочие процессы наследуют прогретую память главного процесса
+        'warm': state['ready'],
+        'warmed_by': state['pid'],
+        'warmed_at': state['warmed_at'],
+        'steps': state['steps'],
+    }
+    try:
+        started = time.perf_counter()
+        with connections['default'].cursor() as cursor:
+            cursor.execute('SELECT 1')
+        data['database_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        database_ok = True
+    except DatabaseError as exc:
+        data['database_error'] = str(exc)
+        database_ok = False
+    ready = data['warm'] and database_ok
+    data['status'] = 'ready' if ready else 'not_ready'
+    return JsonResponse(data, status=200 if ready else 503)
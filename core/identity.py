@@ -0,0 +1,154 @@
+"""
+Определение текущего врача для запроса.
+
+Модуль отвечает за получение объекта Doctor по идентификатору из сессии
+без повторных обращений к базе данных. Найденные врачи хранятся в небольшом
+LRU-кэше внутри процесса, а актуальность записи проверяется по номеру версии,
+который хранится в общем кэше Django и увеличивается при каждом сохранении
+или удалении врача.
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Doctor
+
+
+SESSION_DOCTOR_KEY = 'doctor_id'
+SESSION_DOCTOR_NAME_KEY = 'doctor_name'
+
+VERSION_KEY_TEMPLATE = 'doctor:version:{}'
+
+
+class DoctorLRUCache:
+    """
+    Потокобезопасный LRU-кэш врачей внутри процесса.
+
+    Хранит пары (версия, врач) по идентификатору врача. Запись считается
+    актуальной, только если ее версия совпадает с текущей версией в кэше Django.
+
+    Attributes:
+        maxsize (int): Максимальное количество хранимых врачей
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, doctor_id, version):
+        """Возвращает врача, если в кэше есть запись нужной версии."""
+        with self._lock:
+            entry = self._data.get(doctor_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._data.move_to_end(doctor_id)
+            return entry[1]
+
+    def set(self, doctor_id, version, doctor):
+        """Сохраняет врача и вытесняет самые старые записи при переполнении."""
+        with self._lock:
+            self._data[doctor_id] = (version, doctor)
+            self._data.move_to_end(doctor_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, doctor_id):
+        """Удаляет врача из кэша процесса."""
+        with self._lock:
+            self._data.pop(doctor_id, None)
+
+    def clear(self):
+        """Полностью очищает кэш."""
+        with self._lock:
+            self._data.clear()
+
+
+doctor_cache = DoctorLRUCache(getattr(settings, 'DOCTOR_CACHE_SIZE', 128))
+
+
+def get_doctor_version(doctor_id):
+    """Текущая версия данных врача (0, если врач еще не изменялся)."""
+    return cache.get(VERSION_KEY_TEMPLATE.format(doctor_id), 0)
+
+
+def bump_doctor_version(doctor_id):
+    """
+    Увеличивает версию данных врача.
+
+    Вызывается из сигналов после фиксации сохранения или удаления врача,
+    чтобы процессы перечитали его при следующем запросе. Другие процессы
+    видят новую версию только при общем для них кэше Django
+    (settings_prod); с LocMemCache сбрасывается лишь кэш текущего процесса.
+    """
+    key = VERSION_KEY_TEMPLATE.format(doctor_id)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Ключ мог быть вытеснен между add и incr
+        cache.set(key, 1, timeout=None)
+    doctor_cache.discard(doctor_id)
+
+
+def get_doctor(doctor_id):
+    """
+    Возвращает врача по идентификатору с использованием кэша процесса.
+
+    Args:
+        doctor_id: ID врача
+
+    Returns:
+        Doctor | None: Найденный врач или None
+    """
+    version = get_doctor_version(doctor_id)
+    doctor = doctor_cache.get(doctor_id, version)
+    if doctor is None:
+        doctor = Doctor.objects.filter(id=doctor_id).first()
+        if doctor is None:
+            return None
+        doctor_cache.set(doctor_id, version, doctor)
+    return doctor
+
+
+def get_request_doctor(request):
+    """
+    Определяет врача, вошедшего в систему, по данным сессии.
+
+    Если врач был удален, данные о нем убираются из сессии.
+
+    Args:
+        request: HTTP-запрос
+
+    Returns:
+        Doctor | None: Текущий врач или None для анонимного запроса
+    """
+    doctor_id = request.session.get(SESSION_DOCTOR_KEY)
+    if not doctor_id:
+        return None
+    doctor = get_doctor(doctor_id)
+    if doctor is None:
+        logout_doctor(request)
+    return doctor
+
+
+def login_doctor(request, doctor):
+    """Сохраняет врача в сессии и в кэше процесса."""
+    if request.session.get(SESSION_DOCTOR_KEY) != doctor.id:
+        # Новый ключ сессии защищает от фиксации сессии
+        request.session.cycle_key()
+    request.session[SESSION_DOCTOR_KEY] = doctor.id
+    request.session[SESSION_DOCTOR_NAME_KEY] = doctor.name
+    doctor_cache.set(doctor.id, get_doctor_version(doctor.id), doctor)
+    request.doctor = doctor
+
+
+def logout_doctor(request):
+    """Удаляет данные врача из сессии."""
+    for key in (SESSION_DOCTOR_KEY, SESSION_DOCTOR_NAME_KEY):
+        if key in request.session:
+            del request.session[key]
+    request.doctor = None
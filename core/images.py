@@ -0,0 +1,130 @@
+"""
+Уменьшенные копии фотографий врачей для адаптивных изображений.
+
+Исходная фотография из админки на сайте не показывается. Фоновая
+задача (core.tasks.process_doctor_photo) обрезает ее до пропорций
+DOCTOR_PHOTO_ASPECT и сохраняет копии ширинами DOCTOR_PHOTO_WIDTHS
+в форматах WebP и JPEG. Имя файла копии - хеш ее содержимого, поэтому
+одинаковые копии не дублируются, а файлы можно кэшировать бессрочно.
+
+Описание копий хранится в Doctor.photo_renditions::
+
+    {
+        'source': 'doctors/originals/ivanov.jpg',
+        'sources': {
+            'webp': [{'name': ..., 'width': 320, 'height': 400}, ...],
+            'jpeg': [...],
+        },
+    }
+
+Разметку <picture> со srcset, sizes, width и height выводит тег
+{% doctor_photo %} из core.templatetags.clinic_images.
+"""
+
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import Doctor
+
+
+RENDITIONS_DIR = 'doctors/renditions'
+
+# Параметры сохранения: формат Pillow, расширение файла, опции кодировщика
+FORMATS = {
+    'webp': ('WEBP', 'webp', {'method': 6}),
+    'jpeg': ('JPEG', 'jpg', {'optimize': True, 'progressive': True}),
+}
+
+
+def _widths():
+    return sorted(getattr(settings, 'DOCTOR_PHOTO_WIDTHS', (160, 320, 480, 640)))
+
+
+def _crop_to_aspect(image):
+    """Обрезает изображение по центру до пропорций DOCTOR_PHOTO_ASPECT."""
+    aspect_w, aspect_h = getattr(settings, 'DOCTOR_PHOTO_ASPECT', (4, 5))
+    width, height = image.size
+    if width * aspect_h > height * aspect_w:
+        size = (height * aspect_w // aspect_h, height)
+    else:
+        size = (width, width * aspect_h // aspect_w)
+    return ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+
+
+def _store(data, extension):
+    """Сохраняет файл под именем из хеша содержимого; существующий файл не перезаписывается."""
+    digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+    name = f'{RENDITIONS_DIR}/{digest[:2]}/{digest}.{extension}'
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(data))
+    return name
+
+
+def build_renditions(source):
+    """
+    Создает уменьшенные копии изображения.
+
+    Копии шире обрезанного оригинала не создаются (без увеличения).
+
+    Args:
+        source: Открытый файл изображения
+
+    Returns:
+        dict: Копии по форматам (значение ключа ``sources``)
+    """
+    widths = _widths()
+    with Image.open(source) as image:
+        # Для JPEG декодирование сразу в уменьшенном масштабе (кратно 1/2, 1/4, 1/8)
+        image.draft('RGB', (widths[-1] * 2, widths[-1] * 4))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            background = Image.new('RGB', image.size, 'white')
+            background.paste(image, mask=image.convert('RGBA').getchannel('A'))
+            image = background
+        image = _crop_to_aspect(image)
+
+    targets = [width for width in widths if width <= image.width] or [image.width]
+    quality = getattr(settings, 'DOCTOR_PHOTO_QUALITY', 80)
+    sources = {key: [] for key in FORMATS}
+    for width in targets:
+        height = round(image.height * width / image.width)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        for key, (pil_format, extension, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, pil_format, quality=quality, **options)
+            sources[key].append({
+                'name': _store(buffer.getvalue(), extension),
+                'width': width,
+                'height': height,
+            })
+    return sources
+
+
+def process_doctor_photo(doctor_id, source_name):
+    """
+    Создает копии фотографии врача, если она не изменилась с момента постановки задачи.
+
+    Args:
+        doctor_id: ID врача
+        source_name: Имя файла исходной фотографии
+
+    Returns:
+        bool: Копии созданы
+    """
+    doctor = Doctor.all_objects.filter(pk=doctor_id).first()
+    if doctor is None or doctor.photo.name != source_name:
+        # Фотографию заменили или удалили: копии создаст следующая задача
+        return False
+    if doctor.photo_renditions.get('source') == source_name:
+        return False
+
+    with doctor.photo.open('rb') as source:
+        sources = build_renditions(source)
+    doctor.photo_renditions = {'source': source_name, 'sources': sources}
+    doctor.save(update_fields=['photo_renditions'])
+    return True
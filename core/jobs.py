@@ -0,0 +1,395 @@
+"""
+Очередь фоновых задач на базе данных.
+
+Модуль содержит реестр задач, функции постановки задач в очередь,
+захвата и выполнения, а также обработчик (Worker), который используется
+командой ``manage.py run_workers``.
+
+Пример использования::
+
+    from core.jobs import task
+
+    @task(priority=5)
+    def send_confirmation(appointment_id):
+        ...
+
+    send_confirmation.enqueue(appointment.id)
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections, router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules, import_string
+
+from .models import Job
+
+
+logger = logging.getLogger(__name__)
+
+# Зарегистрированные задачи: имя -> Task
+registry = {}
+
+
+class Task:
+    """
+    Зарегистрированная фоновая задача.
+
+    Вызов объекта выполняет функцию синхронно, метод enqueue()
+    ставит ее выполнение в очередь.
+
+    Attributes:
+        func (callable): Функция задачи
+        name (str): Уникальное имя задачи в очереди
+        queue (str): Очередь по умолчанию
+        priority (int): Приоритет по умолчанию
+        max_attempts (int): Максимальное количество попыток по умолчанию
+    """
+
+    def __init__(self, func, name, queue, priority, max_attempts):
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.priority = priority
+        self.max_attempts = max_attempts
+        self.__doc__ = func.__doc__
+        self.__name__ = func.__name__
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        """Ставит задачу в очередь с аргументами args и kwargs."""
+        return enqueue(self, *args, **kwargs)
+
+    async def aenqueue(self, *args, **kwargs):
+        """Асинхронный вариант enqueue() для ASGI-представлений."""
+        return await aenqueue(self, *args, **kwargs)
+
+    def __repr__(self):
+        return f'<Task {self.name}>'
+
+
+def task(func=None, *, name=None, queue='default', priority=0, max_attempts=3):
+    """
+    Декоратор регистрации фоновой задачи.
+
+    Аргументы задачи должны сериализоваться в JSON.
+
+    Args:
+        func: Декорируемая функция
+        name: Имя задачи (по умолчанию ``модуль.функция``)
+        queue: Очередь по умолчанию
+        priority: Приоритет по умолчанию
+        max_attempts: Количество попыток до переноса в «мертвые» задачи
+
+    Returns:
+        Task: Зарегистрированная задача
+    """
+    def decorator(f):
+        t = Task(f, name or f'{f.__module__}.{f.__name__}', queue, priority, max_attempts)
+        registry[t.name] = t
+        return t
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def _job_fields(task_or_name, args, queue, priority, delay, max_attempts, kwargs):
+    """Поля записи Job для enqueue() и aenqueue()."""
+    if isinstance(task_or_name, Task):
+        defaults = task_or_name
+        name = task_or_name.name
+    else:
+        name = task_or_name
+        defaults = registry.get(name)
+
+    run_at = timezone.now()
+    if delay:
+        run_at += delay if isinstance(delay, timedelta) else timedelta(seconds=delay)
+
+    return {
+        'task': name,
+        'queue': queue or (defaults.queue if defaults else 'default'),
+        'priority': priority if priority is not None else (defaults.priority if defaults else 0),
+        'max_attempts': max_attempts or (defaults.max_attempts if defaults else 3),
+        'args': list(args),
+        'kwargs': kwargs,
+        'run_at': run_at,
+    }
+
+
+def enqueue(task_or_name, *args, queue=None, priority=None, delay=None,
+            max_attempts=None, **kwargs):
+    """
+    Ставит задачу в очередь одной вставкой в таблицу Job.
+
+    Args:
+        task_or_name: Объект Task или имя задачи
+        *args: Позиционные аргументы задачи
+        queue: Очередь (по умолчанию из задачи)
+        priority: Приоритет (по умолчанию из задачи)
+        delay: Отсрочка выполнения (секунды или timedelta)
+        max_attempts: Количество попыток (по умолчанию из задачи)
+        **kwargs: Именованные аргументы задачи
+
+    Returns:
+        Job: Созданная запись очереди
+    """
+    return Job.objects.create(**_job_fields(task_or_name, args, queue, priority, delay, max_attempts, kwargs))
+
+
+async def aenqueue(task_or_name, *args, queue=None, priority=None, delay=None,
+                   max_attempts=None, **kwargs):
+    """Асинхронный вариант enqueue(); аргументы те же."""
+    return await Job.objects.acreate(
+        **_job_fields(task_or_name, args, queue, priority, delay, max_attempts, kwargs)
+    )
+
+
+def autodiscover():
+    """Импортирует модули ``tasks`` всех установленных приложений."""
+    autodiscover_modules('tasks')
+
+
+def registered_queues():
+    """Очереди зарегистрированных задач и очередь по умолчанию."""
+    return sorted({'default', *(t.queue for t in registry.values())})
+
+
+def resolve_task(name):
+    """Возвращает функцию задачи по имени из реестра или по пути импорта."""
+    if name in registry:
+        return registry[name]
+    return import_string(name)
+
+
+def claim_jobs(worker_id, queues=('default',), limit=1):
+    """
+    Захватывает до limit готовых к выполнению задач.
+
+    На базах с поддержкой ``SELECT ... FOR UPDATE SKIP LOCKED`` задачи
+    блокируются в одной транзакции. На SQLite каждая кандидатура
+    захватывается условным UPDATE по статусу: если задачу успел забрать
+    другой обработчик, обновление затронет ноль строк и она пропускается.
+
+    Args:
+        worker_id: Идентификатор обработчика
+        queues: Очереди, из которых берутся задачи
+        limit: Максимальное количество задач
+
+    Returns:
+        list[Job]: Захваченные задачи
+    """
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        queue__in=queues, status=Job.STATUS_QUEUED, run_at__lte=now
+    ).order_by('-priority', 'run_at', 'id')
+    claim = dict(
+        status=Job.STATUS_RUNNING,
+        locked_by=worker_id,
+        locked_at=now,
+        heartbeat_at=now,
+        attempts=F('attempts') + 1,
+    )
+
+    connection = connections[router.db_for_write(Job)]
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=connection.alias):
+            claimed = list(
+                candidates.select_for_update(skip_locked=True).values_list('pk', flat=True)[:limit]
+            )
+            Job.objects.filter(pk__in=claimed).update(**claim)
+    else:
+        claimed = []
+        for pk in candidates.values_list('pk', flat=True)[:limit * 2]:
+            if Job.objects.filter(pk=pk, status=Job.STATUS_QUEUED).update(**claim):
+                claimed.append(pk)
+                if len(claimed) >= limit:
+                    break
+
+    if not claimed:
+        return []
+    return list(Job.objects.filter(pk__in=claimed, locked_by=worker_id).order_by('-priority', 'run_at'))
+
+
+def retry_delay(attempts):
+    """
+    Задержка перед повторной попыткой с экспоненциальным ростом и джиттером.
+
+    Args:
+        attempts: Количество уже выполненных попыток
+
+    Returns:
+        timedelta: Задержка до следующей попытки
+    """
+    base = getattr(settings, 'JOB_RETRY_BASE_DELAY', 10)
+    maximum = getattr(settings, 'JOB_RETRY_MAX_DELAY', 3600)
+    seconds = min(base * 2 ** max(attempts - 1, 0), maximum)
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def run_job(job):
+    """
+    Выполняет захваченную задачу и сохраняет результат.
+
+    При ошибке задача возвращается в очередь с отсрочкой, а после
+    исчерпания попыток получает статус «Не выполнена» (dead letter).
+
+    Args:
+        job: Захваченная задача
+
+    Returns:
+        bool: True, если задача выполнена успешно
+    """
+    try:
+        func = resolve_task(job.task)
+        func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            logger.error('Задача %s #%s не выполнена после %s попыток', job.task, job.pk, job.attempts)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.STATUS_DEAD, last_error=error, finished_at=now, locked_by='', locked_at=None,
+                heartbeat_at=None,
+            )
+        else:
+            logger.warning('Задача %s #%s завершилась ошибкой, повтор позже', job.task, job.pk)
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.STATUS_QUEUED, last_error=error, run_at=now + retry_delay(job.attempts),
+                locked_by='', locked_at=None, heartbeat_at=None,
+            )
+        return False
+
+    Job.objects.filter(pk=job.pk).update(
+        status=Job.STATUS_DONE, finished_at=timezone.now(), locked_by='', locked_at=None, heartbeat_at=None
+    )
+    return True
+
+
+@contextmanager
+def heartbeat(job, interval):
+    """
+    Отмечает выполняемую задачу как живую, пока выполняется блок.
+
+    Отдельный поток каждые interval секунд обновляет heartbeat_at,
+    поэтому requeue_stale() не вернет в очередь долгую задачу
+    работающего обработчика, а задачу остановившегося - вернет.
+
+    Args:
+        job: Захваченная задача
+        interval: Период обновления в секундах
+    """
+    done = threading.Event()
+
+    def beat():
+        try:
+            while not done.wait(interval):
+                Job.objects.filter(pk=job.pk, status=Job.STATUS_RUNNING, locked_by=job.locked_by).update(
+                    heartbeat_at=timezone.now()
+                )
+        except DatabaseError:
+            logger.exception('Не удалось отметить выполнение задачи %s #%s', job.task, job.pk)
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=beat, name=f'heartbeat-{job.pk}', daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        done.set()
+        thread.join()
+
+
+def requeue_stale(timeout):
+    """
+    Возвращает в очередь задачи, зависшие у остановившихся обработчиков.
+
+    Задача считается зависшей, если обработчик не отмечал ее выполнение
+    (heartbeat) дольше timeout секунд; продолжительность самой задачи
+    значения не имеет.
+
+    Args:
+        timeout: Время в секундах без отметки обработчика
+
+    Returns:
+        int: Количество возвращенных задач
+    """
+    border = timezone.now() - timedelta(seconds=timeout)
+    return Job.objects.filter(
+        Q(heartbeat_at__lt=border) | Q(heartbeat_at__isnull=True, locked_at__lt=border),
+        status=Job.STATUS_RUNNING,
+    ).update(status=Job.STATUS_QUEUED, locked_by='', locked_at=None, heartbeat_at=None)
+
+
+def run_sync(task_or_name, *args, **kwargs):
+    """Выполняет задачу немедленно, минуя очередь (для отладки и тестов)."""
+    func = task_or_name if isinstance(task_or_name, Task) else resolve_task(task_or_name)
+    return func(*args, **kwargs)
+
+
+class Worker:
+    """
+    Обработчик очереди: захватывает и выполняет задачи в цикле.
+
+    Attributes:
+        name (str): Уникальный идентификатор обработчика
+        queues (tuple): Обслуживаемые очереди
+        poll_interval (float): Пауза при пустой очереди в секундах
+        batch_size (int): Количество задач, захватываемых за раз
+        stop_event: Событие остановки (threading или multiprocessing)
+        burst (bool): Завершить работу, когда очередь опустеет
+        heartbeat_interval (float): Период отметки выполняемой задачи в секундах
+    """
+
+    def __init__(self, stop_event, queues=('default',), poll_interval=1.0,
+                 batch_size=1, burst=False, name=None, heartbeat_interval=None):
+        self.stop_event = stop_event
+        self.queues = tuple(queues)
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.burst = burst
+        self.name = name
+        self.heartbeat_interval = heartbeat_interval or getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 30)
+        self.processed = 0
+
+    def run(self):
+        """Основной цикл обработчика."""
+        if self.name is None:
+            # Имя вычисляется в потоке или процессе, где работает обработчик
+            self.name = f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+        logger.info('Обработчик %s запущен', self.name)
+        try:
+            while not self.stop_event.is_set():
+                close_old_connections()
+                try:
+                    jobs = claim_jobs(self.name, self.queues, self.batch_size)
+                except DatabaseError:
+                    # Временная блокировка базы не должна останавливать обработчик
+                    logger.exception('Обработчик %s не смог захватить задачи', self.name)
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                if not jobs:
+                    if self.burst:
+                        break
+                    self.stop_event.wait(self.poll_interval)
+                    continue
+                for job in jobs:
+                    with heartbeat(job, self.heartbeat_interval):
+                        run_job(job)
+                    self.processed += 1
+        finally:
+            connections.close_all()
+            logger.info('Обработчик %s остановлен, выполнено задач: %s', self.name, self.processed)
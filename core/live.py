@@ -0,0 +1,325 @@
+"""
+Живые обновления личного кабинета врача (Server-Sent Events).
+
+Изменения записей на прием рассылаются подписчикам внутри процесса:
+сигнал post_save модели Appointment после фиксации транзакции публикует
+событие в брокер, а брокер раскладывает его по очередям asyncio открытых
+соединений этого врача. Между событиями соединение ничего не стоит:
+корутина ждет свою очередь и раз в LIVE_HEARTBEAT секунд отправляет
+комментарий-пинг, не обращаясь к базе данных.
+
+Записи, созданные другими процессами (админка под WSGI, фоновые
+воркеры), в брокер этого процесса не попадают. Для них работает общий
+опрос: одна задача на процесс раз в LIVE_POLL_INTERVAL секунд выбирает
+новые записи всех подключенных врачей одним запросом по отметке
+(created_at, id). По той же отметке соединение догоняет пропущенное
+после переподключения (заголовок Last-Event-ID). Если у филиалов
+отдельные базы (core.branches), опрос выполняет один запрос в каждую
+базу со своей отметкой.
+
+Поток работает только под ASGI (clinic.asgi:application).
+"""
+
+import asyncio
+import collections
+import datetime
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Q
+from django.urls import reverse
+
+from .branches import shard_databases
+from .models import Appointment
+
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def make_mark(created_at, pk):
+    """
+    Отметка (created_at, id) в виде строки для поля id события SSE.
+
+    Args:
+        created_at: Время создания записи
+        pk: ID записи
+
+    Returns:
+        str: Отметка вида ``<микросекунды>-<id>``
+    """
+    return f'{(created_at - EPOCH) // datetime.timedelta(microseconds=1)}-{pk}'
+
+
+def parse_mark(value):
+    """
+    Разбирает отметку, созданную make_mark().
+
+    Returns:
+        tuple | None: Пара (created_at, id) или None для некорректного значения
+    """
+    try:
+        micros, pk = value.split('-', 1)
+        return EPOCH + datetime.timedelta(microseconds=int(micros)), int(pk)
+    except (AttributeError, TypeError, ValueError, OverflowError):
+        return None
+
+
+def after_mark(mark):
+    """Условие выборки записей, созданных после отметки (created_at, id)."""
+    created_at, pk = mark
+    return Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+
+
+def appointment_event(appointment, created=False):
+    """
+    Данные события об изменении записи на прием.
+
+    Не обращается к базе данных: используются только поля самой записи.
+
+    Args:
+        appointment: Запись на прием
+        created: Запись только что создана
+
+    Returns:
+        dict: Данные для сериализации в JSON
+    """
+    return {
+        'id': appointment.id,
+        'doctor_id': appointment.doctor_id,
+        'created': created,
+        'name': appointment.name,
+        'phone': appointment.phone,
+        'date': appointment.date.isoformat() if appointment.date else None,
+        'status': appointment.status,
+        'status_display': appointment.get_status_display(),
+        'message': appointment.message,
+        'created_at': appointment.created_at.isoformat(),
+        'mark': make_mark(appointment.created_at, appointment.id),
+        'url': reverse('patient_card', args=[appointment.id]),
+    }
+
+
+class Subscription:
+    """
+    Подписка одного открытого соединения на события врача.
+
+    Attributes:
+        doctor_id (int): ID врача
+        loop: Цикл событий, в котором работает соединение
+        queue (asyncio.Queue): Очередь событий соединения
+        overflowed (bool): Очередь переполнилась, события потеряны
+    """
+
+    def __init__(self, doctor_id, loop, maxsize):
+        self.doctor_id = doctor_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def push(self, event):
+        """Кладет событие в очередь; вызывается только из цикла соединения."""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Медленный клиент: дальше он получит только просьбу перезагрузить страницу
+            self.overflowed = True
+
+
+class LiveBroker:
+    """
+    Рассылка событий открытым соединениям внутри процесса.
+
+    Публиковать можно из любого потока (сигналы срабатывают в потоках
+    синхронного кода); доставка в очередь выполняется в цикле событий
+    подписчика через call_soon_threadsafe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._pollers = {}
+
+    def subscribe(self, doctor_id):
+        """
+        Подписывает текущее соединение на события врача.
+
+        Должен вызываться внутри работающего цикла событий.
+
+        Returns:
+            Subscription: Подписка соединения
+        """
+        loop = asyncio.get_running_loop()
+        subscription = Subscription(doctor_id, loop, getattr(settings, 'LIVE_QUEUE_SIZE', 100))
+        with self._lock:
+            self._subscribers.setdefault(doctor_id, set()).add(subscription)
+            if loop not in self._pollers and getattr(settings, 'LIVE_POLL_INTERVAL', 15):
+                self._pollers[loop] = loop.create_task(self._poll(loop))
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Отменяет подписку соединения."""
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.doctor_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.doctor_id]
+
+    def has_subscribers(self, doctor_id=None):
+        """Есть ли открытые соединения (у врача или вообще)."""
+        with self._lock:
+            if doctor_id is None:
+                return bool(self._subscribers)
+            return doctor_id in self._subscribers
+
+    def publish(self, doctor_id, event):
+        """
+        Отправляет событие всем соединениям врача.
+
+        Args:
+            doctor_id: ID врача
+            event: Данные события (см. appointment_event)
+        """
+        with self._lock:
+            subscribers = tuple(self._subscribers.get(doctor_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:
+                # Цикл уже закрыт; подписка исчезнет вместе с соединением
+                pass
+
+    async def _poll(self, loop):
+        """
+        Общий для цикла событий опрос новых записей.
+
+        Один запрос в каждую базу на интервал независимо от количества
+        соединений. Задача завершается, когда подписчиков не остается.
+        """
+        interval = getattr(settings, 'LIVE_POLL_INTERVAL', 15)
+        start = (datetime.datetime.now(datetime.timezone.utc), 0)
+        # ID записей независимы в каждой базе филиала, поэтому и отметки свои
+        marks = dict.fromkeys(shard_databases(), start)
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                with self._lock:
+                    doctor_ids = list(self._subscribers)
+                    if not doctor_ids:
+                        del self._pollers[loop]
+                        return
+                for database, mark in marks.items():
+                    try:
+                        rows = [
+                            appointment async for appointment in Appointment.objects.using(database)
+                            .filter(after_mark(mark), doctor_id__in=doctor_ids)
+                            .order_by('created_at', 'id')[:1000]
+                        ]
+                    except DatabaseError:
+                        # База временно недоступна: соединения продолжают получать пинги
+                        continue
+                    for appointment in rows:
+                        self.publish(appointment.doctor_id, appointment_event(appointment, created=True))
+                    if rows:
+                        marks[database] = (rows[-1].created_at, rows[-1].id)
+        except asyncio.CancelledError:
+            with self._lock:
+                self._pollers.pop(loop, None)
+            raise
+
+
+broker = LiveBroker()
+
+
+def format_event(data=None, event=None, event_id=None, comment=None):
+    """
+    Сообщение в формате text/event-stream.
+
+    Returns:
+        bytes: Закодированное сообщение
+    """
+    lines = []
+    if comment is not None:
+        lines.append(f': {comment}')
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    if data is not None:
+        lines.append('data: ' + json.dumps(data, ensure_ascii=False))
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+async def _catch_up(doctor_id, mark, limit, database):
+    """Записи врача, созданные после отметки; не больше limit + 1 штук."""
+    return [
+        appointment async for appointment in Appointment.objects.using(database)
+        .filter(after_mark(mark), doctor_id=doctor_id)
+        .order_by('created_at', 'id')[:limit + 1]
+    ]
+
+
+async def event_stream(doctor_id, mark=None, database=None):
+    """
+    Поток событий SSE для личного кабинета врача.
+
+    Сначала отправляет записи, созданные после отметки mark, затем события
+    из брокера. Соединение закрывается через LIVE_MAX_AGE секунд: браузер
+    переподключается сам, а представление заново проверяет сессию.
+
+    Args:
+        doctor_id: ID врача
+        mark: Отметка (created_at, id), с которой нужно продолжить
+        database: База филиала врача (по умолчанию основная)
+
+    Yields:
+        bytes: Сообщения text/event-stream
+    """
+    heartbeat = getattr(settings, 'LIVE_HEARTBEAT', 20)
+    max_age = getattr(settings, 'LIVE_MAX_AGE', 3600)
+    catchup_limit = getattr(settings, 'LIVE_CATCHUP_LIMIT', 100)
+    last_id = make_mark(*mark) if mark else None
+    # Недавно отправленные новые записи: опрос повторяет то, что уже пришло из сигнала
+    delivered = collections.deque(maxlen=catchup_limit)
+
+    # Подписка до догоняющего запроса, чтобы не потерять записи между ними
+    subscription = broker.subscribe(doctor_id)
+    try:
+        # Пауза браузера перед переподключением, мс
+        yield b'retry: 5000\n\n'
+        if mark is not None:
+            rows = await _catch_up(doctor_id, mark, catchup_limit, database or 'default')
+            if len(rows) > catchup_limit:
+                yield format_event({}, event='reload', event_id=last_id)
+                return
+            for appointment in rows:
+                last_id = make_mark(appointment.created_at, appointment.id)
+                delivered.append(appointment.id)
+                yield format_event(appointment_event(appointment, created=True),
+                                   event='appointment', event_id=last_id)
+
+        deadline = time.monotonic() + max_age
+        while True:
+            timeout = min(heartbeat, deadline - time.monotonic())
+            if timeout <= 0:
+                return
+            try:
+                data = await asyncio.wait_for(subscription.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                yield format_event(comment='ping')
+                continue
+            if subscription.overflowed:
+                yield format_event({}, event='reload', event_id=last_id)
+                return
+            if data['created']:
+                if data['id'] in delivered:
+                    continue
+                delivered.append(data['id'])
+                if last_id is None or parse_mark(data['mark']) > parse_mark(last_id):
+                    last_id = data['mark']
+            yield format_event(data, event='appointment', event_id=last_id)
+    finally:
+        broker.unsubscribe(subscription)
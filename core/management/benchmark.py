@@ -0,0 +1,79 @@
+"""
+Вспомогательные функции для команд замера производительности (bench_*).
+
+Замеры выполняются на временной тестовой базе данных, чтобы не
+затрагивать рабочие данные клиники.
+"""
+
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Создает временную тестовую базу данных на время замера.
+
+    Args:
+        verbosity: Уровень подробности вывода при создании базы
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def timed(func, repeat):
+    """
+    Выполняет func repeat раз и возвращает длительности вызовов в секундах.
+
+    Args:
+        func: Замеряемая функция без аргументов
+        repeat: Количество повторов
+
+    Returns:
+        list[float]: Длительность каждого вызова
+    """
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def summarize(durations):
+    """
+    Сводка по длительностям: среднее, медиана, 95-й перцентиль, операций в секунду.
+
+    Args:
+        durations: Длительности в секундах
+
+    Returns:
+        dict: Показатели в миллисекундах и ops/s
+    """
+    ordered = sorted(durations)
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'median_ms': statistics.median(ordered) * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+        'ops_per_sec': len(ordered) / total if total else float('inf'),
+    }
+
+
+def format_summary(title, summary):
+    """Строка отчета для вывода в консоль."""
+    return (
+        f'{title}: n={summary["count"]}, среднее {summary["mean_ms"]:.2f} мс, '
+        f'медиана {summary["median_ms"]:.2f} мс, p95 {summary["p95_ms"]:.2f} мс, '
+        f'{summary["ops_per_sec"]:.0f} оп/с'
+    )
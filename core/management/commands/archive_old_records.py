@@ -0,0 +1,61 @@
+"""
+Команда переноса старых приемов и медицинских записей в архив.
+
+Переносит завершенные и отмененные приемы старше горизонта пакетами
+(core.archive.archive_batch): каждый пакет - отдельная короткая
+транзакция, между пакетами выдерживается пауза, чтобы не держать
+блокировку записи SQLite. Базы филиалов (core.branches) обрабатываются
+по очереди.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.archive import archivable, archive_batch, archive_cutoff
+from core.branches import gather_count, shard_databases
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые завершенные и отмененные приемы с медицинскими записями в архив'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Переносить приемы старше указанного количества дней (по умолчанию ARCHIVE_AFTER_DAYS)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Количество приемов в одной транзакции (по умолчанию ARCHIVE_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пакетами в секундах, чтобы пропустить другие записи',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать количество приемов для переноса',
+        )
+
+    def handle(self, *args, days, batch_size, pause, dry_run, verbosity, **options):
+        cutoff = archive_cutoff(days)
+        if dry_run:
+            self.stdout.write(f'Приемов до {cutoff:%d.%m.%Y} для переноса: {gather_count(archivable(cutoff))}')
+            return
+
+        appointments = records = 0
+        for database in shard_databases():
+            while True:
+                moved, moved_records = archive_batch(cutoff, batch_size, database)
+                if not moved:
+                    break
+                appointments += moved
+                records += moved_records
+                if verbosity >= 2:
+                    self.stdout.write(f'Перенесено приемов: {appointments}, медицинских записей: {records}')
+                if pause:
+                    time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив приемов до {cutoff:%d.%m.%Y}: {appointments}, медицинских записей: {records}'
+        ))
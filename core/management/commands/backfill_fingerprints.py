@@ -0,0 +1,90 @@
+"""
+Команда заполнения отпечатков содержимого у существующих строк.
+
+Обходит таблицы отзывов и медицинских записей по первичному ключу
+короткими пакетами: каждый пакет обновляется в отдельной транзакции
+одним bulk_update, чтобы не держать блокировку записи SQLite.
+Отзывы и медицинские записи хранятся в базах филиалов (core.branches),
+поэтому обходится каждая из них.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.branches import shard_databases
+from core.models import MedicalRecord, Testimonial
+
+
+# Модель и поля, из которых вычисляется отпечаток
+TARGETS = {
+    'testimonial': (Testimonial, ('name', 'message')),
+    'medicalrecord': (MedicalRecord, ('diagnosis',)),
+}
+
+
+class Command(BaseCommand):
+    help = 'Заполняет отпечатки содержимого отзывов и медицинских записей пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=sorted(TARGETS), action='append', dest='models',
+            help='Обработать только указанную модель (можно повторять)',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество строк, обновляемых в одной транзакции',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пакетами в секундах, чтобы пропустить другие записи',
+        )
+        parser.add_argument(
+            '--rehash', action='store_true',
+            help='Пересчитать отпечатки всех строк, а не только пустые',
+        )
+
+    def handle(self, *args, models, batch_size, pause, rehash, verbosity, **options):
+        for name in models or sorted(TARGETS):
+            model, fields = TARGETS[name]
+            total = sum(
+                self.backfill(model, fields, database, batch_size, pause, rehash, verbosity)
+                for database in shard_databases()
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name_plural}: обновлено отпечатков {total}'
+            ))
+
+    def backfill(self, model, fields, database, batch_size, pause, rehash, verbosity):
+        queryset = model.objects.using(database).order_by('pk').only('pk', 'fingerprint', *fields)
+        if not rehash:
+            queryset = queryset.filter(fingerprint='')
+
+        last_pk = 0
+        total = 0
+        while True:
+            # Курсор по первичному ключу: каждый пакет начинается с того места, где закончился предыдущий
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+
+            changed = []
+            for obj in batch:
+                fingerprint = model.make_fingerprint(*(getattr(obj, field) for field in fields))
+                if obj.fingerprint != fingerprint:
+                    obj.fingerprint = fingerprint
+                    changed.append(obj)
+            if changed:
+                with transaction.atomic(using=database):
+                    model.objects.using(database).bulk_update(changed, ['fingerprint'])
+
+            total += len(changed)
+            if verbosity >= 2:
+                self.stdout.write(f'{model.__name__} ({database}): до id {last_pk}, обновлено {total}')
+            if len(batch) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        return total
@@ -0,0 +1,128 @@
+"""
+Замер накладных расходов журнала доступа к медицинским данным.
+
+Сравнивает время открытия карты пациента врачом в трех режимах:
+без журнала, с буферизованным журналом (core.audit) и с синхронной
+вставкой записи журнала в каждом запросе. Режимы чередуются по
+запросам, чтобы фоновые колебания одинаково влияли на все режимы.
+Отдельно замеряется стоимость самого вызова record_access() и
+сохранения полного буфера одним bulk_create.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import audit
+from core.management.benchmark import benchmark_database, format_summary, summarize, timed
+from core.models import AccessLog, Appointment, Doctor, MedicalRecord, Patient
+
+
+USERNAME = 'bench_doctor'
+PASSWORD = 'bench-password-123'
+
+
+class SyncBuffer:
+    """Буфер, сохраняющий каждую запись сразу (для сравнения)."""
+
+    def add(self, entry):
+        entry.save()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет, сколько журнал доступа добавляет ко времени открытия карты пациента'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Запросов в каждом режиме')
+        parser.add_argument('--records', type=int, default=5, help='Медицинских записей в карте')
+
+    def handle(self, *args, requests, records, **options):
+        with benchmark_database(), override_settings(SESSION_ENGINE='core.sessions.cache'):
+            doctor = Doctor(name='Врач для замера', specialization='Терапевт', username=USERNAME)
+            doctor.set_password(PASSWORD)
+            doctor.save()
+            patient = Patient.objects.create(name='Пациент', phone='+79990000000')
+            appointment = Appointment.objects.create(
+                name='Пациент', phone='+79990000000', doctor=doctor, patient=patient,
+                date=timezone.now()
+            )
+            for i in range(records):
+                MedicalRecord.objects.create(
+                    appointment=appointment, doctor=doctor, patient=patient,
+                    diagnosis=f'Диагноз {i}', treatment='Лечение'
+                )
+
+            client = Client(REMOTE_ADDR='192.168.1.10')
+            client.post('/doctor/login/', {'form_type': 'doctor', 'username': USERNAME, 'password': PASSWORD})
+            url = reverse('patient_card', args=[appointment.id])
+            self.run_requests(client, url, requests)
+            self.run_record_cost(doctor, appointment, requests)
+
+    def run_requests(self, client, url, requests):
+        # Буфер без промежуточных сохранений: общая тестовая база SQLite в памяти
+        # блокирует таблицы целиком, а сохранение замеряется отдельно
+        buffered = audit.AuditBuffer(size=requests + 100, interval=3600)
+        modes = {
+            'без журнала': ({'AUDIT_ENABLED': False}, buffered),
+            'буфер (core.audit)': ({'AUDIT_ENABLED': True}, buffered),
+            'синхронная вставка': ({'AUDIT_ENABLED': True}, SyncBuffer()),
+        }
+        durations = {title: [] for title in modes}
+
+        default_buffer, audit.buffer = audit.buffer, buffered
+        try:
+            # Прогрев: шаблоны, кэш врача, соединение с базой
+            for _ in range(10):
+                client.get(url)
+            self.measure(client, url, requests, modes, durations)
+        finally:
+            audit.buffer = default_buffer
+
+        begin = time.perf_counter()
+        saved = buffered.flush()
+        flush_ms = (time.perf_counter() - begin) * 1000
+
+        self.stdout.write(self.style.MIGRATE_HEADING('Открытие карты пациента'))
+        summaries = {title: summarize(values) for title, values in durations.items()}
+        for title, summary in summaries.items():
+            self.stdout.write('  ' + format_summary(title, summary))
+        baseline = summaries['без журнала']
+        for title in ('буфер (core.audit)', 'синхронная вставка'):
+            self.stdout.write(
+                f'  надбавка «{title}»: медиана {summaries[title]["median_ms"] - baseline["median_ms"]:+.3f} мс, '
+                f'среднее {summaries[title]["mean_ms"] - baseline["mean_ms"]:+.3f} мс'
+            )
+        self.stdout.write(
+            f'  сохранение буфера: {saved} записей одним bulk_create за {flush_ms:.1f} мс; '
+            f'всего в журнале {AccessLog.objects.count()}'
+        )
+
+    def measure(self, client, url, requests, modes, durations):
+        for _ in range(requests):
+            for title, (overrides, log_buffer) in modes.items():
+                audit.buffer = log_buffer
+                with override_settings(**overrides):
+                    begin = time.perf_counter()
+                    response = client.get(url)
+                    durations[title].append(time.perf_counter() - begin)
+                if response.status_code != 200:
+                    raise CommandError(f'Карта пациента вернула {response.status_code}')
+
+    def run_record_cost(self, doctor, appointment, requests):
+        """Стоимость record_access() без сохранения в базу."""
+        request = RequestFactory().get('/', REMOTE_ADDR='192.168.1.10')
+        request.doctor = doctor
+        log_buffer = audit.AuditBuffer(size=requests + 1, interval=3600)
+        audit.buffer, buffered = log_buffer, audit.buffer
+        try:
+            durations = timed(
+                lambda: audit.record_access(request, AccessLog.ACTION_PATIENT_CARD, appointment), requests
+            )
+        finally:
+            audit.buffer = buffered
+        self.stdout.write(self.style.MIGRATE_HEADING('Вызов record_access()'))
+        self.stdout.write('  ' + format_summary('запись в буфер', summarize(durations)))
+        log_buffer.flush()
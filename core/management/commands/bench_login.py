@@ -0,0 +1,116 @@
+"""
+Замер пропускной способности входа врачей под нагрузкой перебора паролей.
+
+Сравнивает два режима: без ограничения частоты попыток и с ограничением
+из THROTTLE_RATES. В каждом режиме несколько потоков-«атакующих»
+отправляют неверные пароли, а основной поток замеряет время входа
+настоящего врача с другого IP-адреса. Затем отдельно замеряется
+стоимость одного атакующего запроса без конкуренции потоков.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client, override_settings
+
+from core.management.benchmark import benchmark_database, format_summary, summarize
+from core.models import Doctor
+
+
+USERNAME = 'bench_doctor'
+PASSWORD = 'bench-password-123'
+
+
+class Command(BaseCommand):
+    help = 'Замеряет вход врачей под нагрузкой перебора паролей с ограничением и без'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attackers', type=int, default=4, help='Количество атакующих потоков')
+        parser.add_argument('--duration', type=float, default=5.0, help='Длительность каждого режима в секундах')
+        parser.add_argument('--logins', type=int, default=20, help='Количество замеряемых настоящих входов')
+        parser.add_argument('--probes', type=int, default=20, help='Количество последовательных атакующих запросов')
+
+    def handle(self, *args, attackers, duration, logins, probes, **options):
+        self.probes = probes
+        with benchmark_database(), override_settings(SESSION_ENGINE='core.sessions.cache'):
+            doctor = Doctor(name='Врач для замера', specialization='Терапевт', username=USERNAME)
+            doctor.set_password(PASSWORD)
+            doctor.save()
+
+            self.run_baseline(logins)
+            with override_settings(THROTTLE_RATES={}):
+                self.run_scenario('Без ограничения', attackers, duration, logins)
+            self.run_scenario('С ограничением', attackers, duration, logins)
+
+    def login(self, client):
+        """Вход настоящего врача; возвращает длительность в секундах."""
+        begin = time.perf_counter()
+        client.post('/doctor/login/', {'form_type': 'doctor', 'username': USERNAME, 'password': PASSWORD})
+        elapsed = time.perf_counter() - begin
+        client.get('/doctor/logout/')
+        return elapsed
+
+    def run_baseline(self, logins):
+        cache.clear()
+        client = Client(REMOTE_ADDR='192.168.1.10')
+        durations = [self.login(client) for _ in range(logins)]
+        self.stdout.write(self.style.MIGRATE_HEADING('Без атаки'))
+        self.stdout.write('  ' + format_summary('вход врача', summarize(durations)))
+
+    def run_scenario(self, title, attackers, duration, logins):
+        cache.clear()
+        stop = threading.Event()
+        counters = [0] * attackers
+        rejected = [0] * attackers
+
+        def attack(index):
+            client = Client(REMOTE_ADDR=f'10.0.0.{index + 1}')
+            while not stop.is_set():
+                response = client.post('/doctor/login/', {
+                    'form_type': 'doctor',
+                    'username': USERNAME,
+                    'password': f'wrong-{counters[index]}',
+                })
+                counters[index] += 1
+                if response.status_code == 429:
+                    rejected[index] += 1
+
+        threads = [threading.Thread(target=attack, args=(i,)) for i in range(attackers)]
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        for thread in threads:
+            thread.start()
+
+        # Настоящий врач входит с другого адреса во время атаки
+        durations = []
+        interval = duration / max(logins, 1)
+        client = Client(REMOTE_ADDR='192.168.1.10')
+        for _ in range(logins):
+            durations.append(self.login(client))
+            time.sleep(max(0.0, interval - durations[-1]))
+
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_started
+
+        total = sum(counters)
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        self.stdout.write(
+            f'  атакующие запросы: {total} за {elapsed:.1f} с ({total / elapsed:.0f} запр/с), '
+            f'отклонено до хеширования: {sum(rejected)}'
+        )
+        self.stdout.write(f'  процессорное время на запрос: {cpu / max(total + logins, 1) * 1000:.2f} мс')
+        self.stdout.write('  ' + format_summary('вход врача во время атаки', summarize(durations)))
+
+        # Стоимость одного атакующего запроса без конкуренции потоков
+        client = Client(REMOTE_ADDR='10.0.0.1')
+        probe = []
+        for attempt in range(self.probes):
+            begin = time.perf_counter()
+            client.post('/doctor/login/', {'form_type': 'doctor', 'username': USERNAME, 'password': f'probe-{attempt}'})
+            probe.append(time.perf_counter() - begin)
+        self.stdout.write('  ' + format_summary('атакующий запрос', summarize(probe)))
@@ -0,0 +1,256 @@
+"""
+Сравнение синхронного (WSGI) и асинхронного (ASGI) стека при высокой конкурентности.
+
+Режим WSGI: синхронные представления, каждый одновременный запрос
+занимает поток. Режим ASGI: асинхронные представления из core.async_views,
+одновременные запросы - задачи asyncio в одном цикле событий.
+
+Каждый режим выполняется в отдельном процессе с собственной временной
+базой, чтобы замеры памяти не влияли друг на друга. Запросы передаются
+напрямую в WSGIHandler и ASGIHandler Django, то есть сетевой уровень
+HTTP-сервера в замер не входит.
+"""
+
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import path
+
+from core.async_views import aall_testimonials, aappointment_success, aappointment_view, ahome
+from core.management.benchmark import benchmark_database, summarize
+from core.models import Doctor, Service, Testimonial
+
+
+DEFAULT_PATHS = ['/', '/appointment/', '/appointment/success/', '/testimonials/all/']
+
+
+class AsyncPublicURLConf:
+    """Основной URLconf, в котором публичные страницы заменены асинхронными."""
+
+    urlpatterns = [
+        path('', ahome, name='home'),
+        path('appointment/', aappointment_view, name='appointment'),
+        path('appointment/success/', aappointment_success, name='appointment_success'),
+        path('testimonials/all/', aall_testimonials, name='all_testimonials'),
+    ]
+
+
+class MemorySampler(threading.Thread):
+    """Фоновый замер пикового RSS процесса и числа потоков."""
+
+    def __init__(self, interval=0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.peak_rss = self.baseline = rss_bytes()
+        self.peak_threads = threading.active_count()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, rss_bytes())
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+
+
+def rss_bytes():
+    """Текущий размер резидентной памяти процесса в байтах."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        # Вне Linux доступен только пиковый RSS с начала процесса
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает запросы в секунду и память синхронного (WSGI) и асинхронного (ASGI) стека'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=200, help='Одновременных запросов')
+        parser.add_argument('--requests', type=int, default=2000, help='Запросов в каждом режиме')
+        parser.add_argument('--path', action='append', dest='paths', help='Адрес страницы (можно повторять)')
+        parser.add_argument('--doctors', type=int, default=20, help='Врачей в тестовых данных')
+        parser.add_argument('--testimonials', type=int, default=50, help='Отзывов в тестовых данных')
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], help='Выполнить только один режим в текущем процессе')
+
+    def handle(self, *args, mode, **options):
+        options['paths'] = options['paths'] or DEFAULT_PATHS
+        if mode:
+            result = self.run_mode(mode, **options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        for mode in ('wsgi', 'asgi'):
+            result = self.run_child(mode, options)
+            self.report(mode, result, options['concurrency'])
+
+    def run_child(self, mode, options):
+        """Запускает один режим в отдельном процессе и возвращает его результат."""
+        command = [
+            sys.executable, sys.argv[0], 'bench_servers', '--mode', mode,
+            '--concurrency', str(options['concurrency']),
+            '--requests', str(options['requests']),
+            '--doctors', str(options['doctors']),
+            '--testimonials', str(options['testimonials']),
+        ]
+        for url in options['paths']:
+            command += ['--path', url]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f'Режим {mode} завершился с ошибкой:\n{completed.stderr}')
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    def report(self, mode, result, concurrency):
+        title = 'WSGI (потоки, синхронные представления)' if mode == 'wsgi' else 'ASGI (asyncio, асинхронные представления)'
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{title}, конкурентность {concurrency}'))
+        self.stdout.write(
+            f'  {result["requests"]} запросов за {result["elapsed"]:.2f} с: '
+            f'{result["requests"] / result["elapsed"]:.0f} запр/с, ошибок {result["errors"]}'
+        )
+        latency = result['latency']
+        self.stdout.write(
+            f'  задержка: среднее {latency["mean_ms"]:.1f} мс, медиана {latency["median_ms"]:.1f} мс, '
+            f'p95 {latency["p95_ms"]:.1f} мс'
+        )
+        self.stdout.write(
+            f'  память: прирост RSS {result["rss_growth"] / 2 ** 20:.1f} МБ, '
+            f'пик RSS {result["peak_rss"] / 2 ** 20:.1f} МБ, потоков {result["peak_threads"]}'
+        )
+
+    def seed(self, doctors, testimonials):
+        Service.objects.bulk_create(
+            Service(title=f'Услуга {i}', description='Описание услуги') for i in range(10)
+        )
+        created = Doctor.objects.bulk_create(
+            Doctor(name=f'Врач {i}', specialization=f'Специализация {i % 5}', username=f'bench_{i}')
+            for i in range(doctors)
+        )
+        Testimonial.objects.bulk_create(
+            Testimonial(name=f'Пациент {i}', doctor=created[i % len(created)], rating='good',
+                        message='Отличный врач', is_approved=True)
+            for i in range(testimonials)
+        )
+
+    def run_mode(self, mode, *, concurrency, requests, paths, doctors, testimonials, **options):
+        with benchmark_database():
+            self.seed(doctors, testimonials)
+            if mode == 'wsgi':
+                return self.measure(lambda: self.run_wsgi(concurrency, requests, paths))
+            root_urls = import_module(settings.ROOT_URLCONF).urlpatterns
+            AsyncPublicURLConf.urlpatterns = AsyncPublicURLConf.urlpatterns + list(root_urls)
+            with override_settings(ROOT_URLCONF=AsyncPublicURLConf):
+                return self.measure(lambda: asyncio.run(self.run_asgi(concurrency, requests, paths)))
+
+    def measure(self, run):
+        sampler = MemorySampler()
+        sampler.start()
+        started = time.perf_counter()
+        durations, errors = run()
+        elapsed = time.perf_counter() - started
+        sampler.stop()
+        return {
+            'requests': len(durations),
+            'elapsed': elapsed,
+            'errors': errors,
+            'latency': summarize(durations),
+            'rss_growth': sampler.peak_rss - sampler.baseline,
+            'peak_rss': sampler.peak_rss,
+            'peak_threads': sampler.peak_threads,
+        }
+
+    def run_wsgi(self, concurrency, requests, paths):
+        handler = WSGIHandler()
+        counter = iter(range(requests))
+        lock = threading.Lock()
+        durations, errors = [], [0]
+
+        def get(url):
+            status = []
+            environ = {
+                'REQUEST_METHOD': 'GET', 'PATH_INFO': url, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+                'SERVER_NAME': 'testserver', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+                'HTTP_HOST': 'testserver', 'REMOTE_ADDR': '127.0.0.1',
+                'wsgi.input': io.BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': sys.stderr,
+            }
+            body = handler(environ, lambda code, headers, exc_info=None: status.append(code))
+            try:
+                for _ in body:
+                    pass
+            finally:
+                body.close()
+            return status[0].startswith('200')
+
+        def worker():
+            while True:
+                with lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                begin = time.perf_counter()
+                ok = get(paths[index % len(paths)])
+                elapsed = time.perf_counter() - begin
+                with lock:
+                    durations.append(elapsed)
+                    if not ok:
+                        errors[0] += 1
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return durations, errors[0]
+
+    async def run_asgi(self, concurrency, requests, paths):
+        handler = ASGIHandler()
+        counter = iter(range(requests))
+        durations, errors = [], 0
+
+        async def get(url):
+            status = []
+            # Тело запроса, затем ожидание без событий (клиент не отключается)
+            inbox = asyncio.Queue()
+            inbox.put_nowait({'type': 'http.request', 'body': b'', 'more_body': False})
+
+            async def send(message):
+                if message['type'] == 'http.response.start':
+                    status.append(message['status'])
+
+            scope = {
+                'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+                'method': 'GET', 'scheme': 'http', 'path': url, 'raw_path': url.encode(),
+                'query_string': b'', 'root_path': '', 'headers': [(b'host', b'testserver')],
+                'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+            }
+            await handler(scope, inbox.get, send)
+            return status[0] == 200
+
+        async def worker():
+            nonlocal errors
+            for index in counter:
+                begin = time.perf_counter()
+                ok = await get(paths[index % len(paths)])
+                durations.append(time.perf_counter() - begin)
+                if not ok:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return durations, errors
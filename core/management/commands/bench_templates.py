@@ -0,0 +1,108 @@
+"""
+Замер времени отрисовки шаблонов на реалистичных объемах данных.
+
+Кабинет врача отрисовывается с --appointments записями на прием,
+главная страница - с --testimonials отзывами. Данные выбираются
+из базы заранее, поэтому в замер входит только работа шаблонизатора.
+
+Для каждого шаблона выводятся два режима:
+
+- «холодный»: кэш скомпилированных шаблонов и фрагментов {% cache %}
+  сброшен, шаблон разбирается заново (первый запрос после запуска);
+- «теплый»: шаблоны уже в кэше загрузчика, шапка и подвал - в кэше
+  фрагментов (обычное состояние рабочего процесса).
+"""
+
+import datetime
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.forms import AppointmentForm
+from core.live import make_mark
+from core.management.benchmark import benchmark_database, format_summary, summarize, timed
+from core.models import Appointment, Doctor, Service, Testimonial
+
+
+STATUSES = ('pending', 'confirmed', 'completed', 'cancelled')
+
+
+def reset_template_caches():
+    """Сбрасывает кэш скомпилированных шаблонов и кэш фрагментов."""
+    for loader in engines['django'].engine.template_loaders:
+        if hasattr(loader, 'reset'):
+            loader.reset()
+    caches['default'].clear()
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время отрисовки шаблонов кабинета врача и главной страницы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help='Отрисовок каждого шаблона в каждом режиме')
+        parser.add_argument('--appointments', type=int, default=1000, help='Записей на прием в кабинете врача')
+        parser.add_argument('--testimonials', type=int, default=500, help='Отзывов на главной странице')
+
+    def handle(self, *args, repeat, appointments, testimonials, **options):
+        with benchmark_database():
+            doctor = self.populate(appointments, testimonials)
+            request = RequestFactory().get('/')
+            request.doctor = doctor
+
+            pages = {
+                'core/doctor_dashboard.html': {
+                    'doctor': doctor,
+                    'appointments': list(Appointment.objects.filter(doctor_id=doctor.id).order_by('-date', '-created_at')),
+                    'status_filter': 'all',
+                    'search_query': '',
+                    'live_since': make_mark(timezone.now(), 0),
+                },
+                'core/index.html': {
+                    'services': list(Service.objects.all()),
+                    'doctors': list(Doctor.objects.all()),
+                    'testimonials': list(Testimonial.objects.select_related('doctor')),
+                    'form': AppointmentForm(),
+                },
+            }
+            for template_name, context in pages.items():
+                self.measure(template_name, context, request, repeat)
+
+    def populate(self, appointments, testimonials):
+        doctor = Doctor.objects.create(name='Врач для замера', specialization='Терапевт', username='bench_doctor')
+        for i in range(6):
+            Service.objects.create(title=f'Услуга {i}', description='Описание услуги ' * 10, order=i)
+        today = timezone.localdate()
+        Appointment.objects.bulk_create([
+            Appointment(
+                name=f'Пациент {i}', phone=f'+7999{i:07d}', email=f'patient{i}@example.com', doctor=doctor,
+                date=today - datetime.timedelta(days=i % 365), message='Жалобы на самочувствие',
+                status=STATUSES[i % len(STATUSES)],
+            )
+            for i in range(appointments)
+        ])
+        Testimonial.objects.bulk_create([
+            Testimonial(
+                name=f'Пациент {i}', doctor=doctor, message='Спасибо врачу за внимательное отношение. ' * 3,
+                is_approved=True,
+            )
+            for i in range(testimonials)
+        ])
+        return doctor
+
+    def measure(self, template_name, context, request, repeat):
+        def cold():
+            reset_template_caches()
+            render_to_string(template_name, context, request)
+
+        def warm():
+            render_to_string(template_name, context, request)
+
+        size = len(render_to_string(template_name, context, request).encode())
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{template_name} ({size / 1024:.0f} КБ)'))
+        self.stdout.write('  ' + format_summary('холодный', summarize(timed(cold, repeat))))
+        warm()
+        self.stdout.write('  ' + format_summary('теплый', summarize(timed(warm, repeat))))
@@ -0,0 +1,47 @@
+"""
+Команда построения ежемесячных отчетов по врачам.
+
+Отчеты строятся пулом процессов (core.reports) в каталог
+``REPORTS_ROOT/ГГГГ-ММ/``; врачи, данные которых не изменились
+с прошлого запуска, пропускаются. Запускается по расписанию после
+окончания месяца::
+
+    python manage.py build_reports --month 2026-09 --format csv
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.reports import FORMATS, build_reports, parse_month, previous_month
+
+
+class Command(BaseCommand):
+    help = 'Строит ежемесячные отчеты по врачам в каталог REPORTS_ROOT'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Месяц в формате ГГГГ-ММ (по умолчанию прошедший)')
+        parser.add_argument('--format', dest='fmt', choices=FORMATS, default='html', help='Формат отчетов')
+        parser.add_argument('--workers', type=int, help='Количество процессов (по умолчанию REPORT_WORKERS или число ядер)')
+        parser.add_argument('--force', action='store_true', help='Построить заново и неизмененные отчеты')
+
+    def handle(self, *args, month, fmt, workers, force, **options):
+        if month:
+            try:
+                month = parse_month(month)
+            except ValueError:
+                raise CommandError(f'Некорректный месяц {month!r}: ожидается ГГГГ-ММ')
+        else:
+            month = previous_month()
+        if workers is not None and workers < 1:
+            raise CommandError('--workers должно быть не меньше 1')
+
+        def progress(doctor_id, error):
+            if error is not None:
+                self.stderr.write(f'Врач #{doctor_id}: ошибка - {error}')
+            elif options['verbosity'] > 1:
+                self.stdout.write(f'Врач #{doctor_id}: отчет построен')
+
+        stats = build_reports(month, fmt, workers=workers, force=force, progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f'Отчеты за {month:%Y-%m}: построено {stats["built"]}, без изменений {stats["skipped"]}, '
+            f'ошибок {stats["failed"]}'
+        ))
@@ -0,0 +1,62 @@
+"""
+Команда удаления истекших сессий небольшими пакетами.
+
+В отличие от стандартной clearsessions, удаляет строки django_session
+короткими транзакциями, чтобы не держать блокировку записи SQLite
+во время обработки всей таблицы.
+"""
+
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = 'Удаляет истекшие сессии из базы данных пакетами ограниченного размера'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Количество сессий, удаляемых в одной транзакции',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.05,
+            help='Пауза между пакетами в секундах, чтобы пропустить другие записи',
+        )
+        parser.add_argument(
+            '--max-batches', type=int, default=None,
+            help='Максимальное количество пакетов за один запуск',
+        )
+
+    def handle(self, *args, batch_size, pause, max_batches, verbosity, **options):
+        now = timezone.now()
+        total = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            # Выборка идет по индексу expire_date, удаление — по первичному ключу
+            keys = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('session_key', flat=True)[:batch_size]
+            )
+            if not keys:
+                break
+
+            with transaction.atomic():
+                deleted, _ = Session.objects.filter(session_key__in=keys).delete()
+
+            total += deleted
+            batches += 1
+            if verbosity >= 2:
+                self.stdout.write(f'Пакет {batches}: удалено {deleted}, всего {total}')
+            if len(keys) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено истекших сессий: {total} (пакетов: {batches})'
+        ))
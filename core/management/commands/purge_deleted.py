@@ -0,0 +1,34 @@
+"""
+Команда удаления помеченных врачей и пациентов с зависимыми данными.
+
+Обычно удаление выполняет фоновая задача core.tasks.purge_deleted,
+поставленная из админки. Команда нужна, чтобы довести удаление до конца
+вручную (например, без запущенных обработчиков) и увидеть ход работы.
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.branches import shard_databases
+from core.models import Doctor, Patient
+from core.purge import purge
+
+
+class Command(BaseCommand):
+    help = 'Удаляет помеченных на удаление врачей и пациентов с зависимыми данными пакетами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Строк в одной транзакции (по умолчанию PURGE_BATCH_SIZE)')
+        parser.add_argument('--pause', type=float, help='Пауза между пакетами в секундах (по умолчанию PURGE_PAUSE)')
+
+    def handle(self, *args, batch_size, pause, **options):
+        # Врачи хранятся в основной базе, пациенты - в базах филиалов
+        targets = [(Doctor, 'default')] + [(Patient, database) for database in shard_databases()]
+        for model, database in targets:
+            for instance in model.all_objects.using(database).filter(deleted_at__isnull=False).order_by('pk'):
+                self.stdout.write(self.style.MIGRATE_HEADING(f'{model._meta.verbose_name} #{instance.pk}: {instance}'))
+
+                def report(dependent, count):
+                    self.stdout.write(f'  {dependent._meta.verbose_name_plural}: удалено {count}')
+
+                deleted = purge(instance, batch_size=batch_size, pause=pause, progress=report)
+                self.stdout.write(self.style.SUCCESS(f'  удалено строк: {sum(deleted.values())}'))
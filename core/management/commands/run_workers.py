@@ -0,0 +1,113 @@
+"""
+Команда запуска пула обработчиков фоновых задач.
+
+Запускает несколько обработчиков очереди в потоках или процессах,
+периодически возвращает в очередь зависшие задачи и корректно
+завершает работу по SIGINT/SIGTERM.
+"""
+
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core import jobs
+
+
+def _process_main(stop_event, options):
+    """Точка входа дочернего процесса обработчика."""
+    # Родитель закрывает соединения перед fork, дочерний процесс откроет свои
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    jobs.Worker(stop_event, **options).run()
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул обработчиков очереди фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'JOB_WORKERS', 2),
+            help='Количество обработчиков',
+        )
+        parser.add_argument(
+            '--mode', choices=['thread', 'process'], default='thread',
+            help='Запускать обработчики в потоках или в отдельных процессах',
+        )
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Обслуживаемая очередь (можно указать несколько раз; по умолчанию все очереди задач)',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Пауза при пустой очереди в секундах',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1,
+            help='Количество задач, захватываемых обработчиком за раз',
+        )
+        parser.add_argument(
+            '--stale-timeout', type=int, default=getattr(settings, 'JOB_STALE_TIMEOUT', 600),
+            help='Через сколько секунд без отметки обработчика выполняемая задача считается зависшей',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='Завершить работу, когда очередь опустеет',
+        )
+
+    def handle(self, *args, **options):
+        jobs.autodiscover()
+
+        stale_timeout = options['stale_timeout']
+        worker_options = dict(
+            queues=options['queues'] or jobs.registered_queues(),
+            poll_interval=options['poll_interval'],
+            batch_size=options['batch_size'],
+            burst=options['burst'],
+            # Несколько отметок за время ожидания: одна пропущенная не вернет задачу в очередь
+            heartbeat_interval=min(getattr(settings, 'JOB_HEARTBEAT_INTERVAL', 30), stale_timeout / 3),
+        )
+
+        jobs.requeue_stale(stale_timeout)
+        connections.close_all()
+
+        if options['mode'] == 'process':
+            ctx = multiprocessing.get_context('fork')
+            stop_event = ctx.Event()
+            pool = [
+                ctx.Process(target=_process_main, args=(stop_event, worker_options), daemon=True)
+                for _ in range(options['workers'])
+            ]
+        else:
+            stop_event = threading.Event()
+            pool = [
+                threading.Thread(target=jobs.Worker(stop_event, **worker_options).run, daemon=True)
+                for _ in range(options['workers'])
+            ]
+
+        def shutdown(signum, frame):
+            self.stdout.write('Остановка обработчиков...')
+            stop_event.set()
+
+        signal.signal(signal.SIGINT, shutdown)
+        signal.signal(signal.SIGTERM, shutdown)
+
+        for worker in pool:
+            worker.start()
+        self.stdout.write(self.style.SUCCESS(
+            f'Запущено обработчиков: {len(pool)} ({options["mode"]}), '
+            f'очереди: {", ".join(worker_options["queues"])}'
+        ))
+
+        # Главный поток следит за зависшими задачами, пока работают обработчики
+        while any(worker.is_alive() for worker in pool):
+            if stop_event.wait(min(stale_timeout, 30)):
+                break
+            jobs.requeue_stale(stale_timeout)
+
+        for worker in pool:
+            worker.join()
+        connections.close_all()
+        self.stdout.write(self.style.SUCCESS('Обработчики остановлены'))
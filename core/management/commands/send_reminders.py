@@ -0,0 +1,51 @@
+"""
+Команда рассылки напоминаний о предстоящих приемах.
+
+Предназначена для ежедневного запуска по расписанию (cron). Записи
+выбираются пакетами по индексу (date, status), уже отправленные
+напоминания повторно не отправляются.
+"""
+
+import datetime
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core import notifications
+
+
+class Command(BaseCommand):
+    help = 'Рассылает напоминания пациентам о приемах на указанную дату'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Дата приема в формате ГГГГ-ММ-ДД (по умолчанию завтра)',
+        )
+        parser.add_argument(
+            '--days-ahead', type=int, default=1,
+            help='За сколько дней до приема отправлять напоминание',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Количество записей в одном пакете',
+        )
+
+    def handle(self, *args, date, days_ahead, chunk_size, **options):
+        if date:
+            try:
+                target = datetime.date.fromisoformat(date)
+            except ValueError:
+                raise CommandError('Дата должна быть в формате ГГГГ-ММ-ДД')
+        else:
+            target = timezone.localdate() + datetime.timedelta(days=days_ahead)
+
+        started = time.monotonic()
+        stats = notifications.send_reminders(target, chunk_size)
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Напоминания на {target:%d.%m.%Y}: отправлено {stats["sent"]}, '
+            f'ошибок {stats["failed"]} за {elapsed:.1f} с'
+        ))
@@ -0,0 +1,202 @@
+"""
+Команда запуска приложения в рабочем режиме: предварительная загрузка и fork.
+
+Главный процесс загружает приложение, прогревает его (core.warmup),
+открывает слушающий сокет и порождает рабочие процессы через fork.
+Рабочие процессы наследуют загруженный код, скомпилированные шаблоны
+и заполненные кэши, открывают собственное соединение с базой и сразу
+отвечают со скоростью установившегося режима.
+
+Каждый рабочий процесс обрабатывает запросы по одному (как sync-воркер
+gunicorn), поэтому одновременность задается числом процессов, а
+соединение с базой переиспользуется между запросами (CONN_MAX_AGE).
+Главный процесс перезапускает завершившиеся рабочие процессы,
+по SIGTERM/SIGINT завершает их после текущего запроса, по SIGHUP
+перезапускает их по одному.
+
+Пример::
+
+    DJANGO_SETTINGS_MODULE=clinic.settings_prod python manage.py serve --bind 0.0.0.0:8000 --workers 4
+"""
+
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+from django.core.wsgi import get_wsgi_application
+
+from core import audit, warmup
+
+
+logger = logging.getLogger(__name__)
+
+# Не перезапускать рабочие процессы чаще, если они падают сразу после старта
+RESPAWN_DELAY = 1.0
+
+# Кэши, которые не разделяются между рабочими процессами
+PROCESS_LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+class RequestHandler(WSGIRequestHandler):
+    # Медленный клиент не должен занимать рабочий процесс бесконечно
+    timeout = 30
+
+
+class Command(BaseCommand):
+    help = 'Запускает приложение: прогрев, предварительная загрузка и несколько рабочих процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--bind', default=getattr(settings, 'SERVE_BIND', '127.0.0.1:8000'), help='Адрес и порт (host:port)',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=getattr(settings, 'SERVE_WORKERS', 1),
+            help='Количество рабочих процессов (по умолчанию SERVE_WORKERS или 1)',
+        )
+        parser.add_argument('--backlog', type=int, default=128, help='Очередь ожидающих соединений')
+        parser.add_argument('--no-warmup', action='store_true', help='Не прогревать приложение перед запуском')
+
+    def handle(self, *args, bind, workers, backlog, no_warmup, **options):
+        host, _, port = bind.rpartition(':')
+        try:
+            address = (host.strip('[]') or '0.0.0.0', int(port))
+        except ValueError:
+            raise CommandError(f'Некорректный адрес {bind!r}: ожидается host:port')
+        if not hasattr(os, 'fork'):
+            workers = 1
+        if workers > 1 and settings.CACHES['default']['BACKEND'] in PROCESS_LOCAL_CACHES:
+            # Версии кэша и лимиты частоты разошлись бы между процессами
+            raise CommandError(
+                'Кэш default хранится в памяти процесса: для нескольких рабочих процессов '
+                'настройте общий кэш (clinic.settings_prod) или запустите --workers 1'
+            )
+
+        # Не clinic.wsgi: он прогревает процесс сам при WARMUP_ON_START
+        application = get_wsgi_application()
+        if not no_warmup:
+            report = warmup.warm_up(application)
+            for step, result in report.items():
+                self.stdout.write(f'Прогрев {step}: {result["ms"]} мс ({result["result"]})')
+
+        family = socket.AF_INET6 if ':' in address[0] else socket.AF_INET
+        listener = socket.create_server(address, family=family, backlog=backlog, reuse_port=False)
+        self.stdout.write(self.style.SUCCESS(
+            f'Слушаю {bind}, рабочих процессов: {workers} (главный процесс {os.getpid()})'
+        ))
+
+        if not hasattr(os, 'fork'):
+            self.serve_worker(listener, application)
+            return
+        warmup.prepare_fork()
+        self.supervise(listener, application, workers)
+
+    def serve_worker(self, listener, application):
+        """Цикл рабочего процесса: запросы по одному до сигнала завершения."""
+        host, port = listener.getsockname()[:2]
+        server = WSGIServer((host, port), RequestHandler, bind_and_activate=False)
+        server.socket.close()
+        server.socket = listener
+        # То, что обычно делает server_bind() при собственном сокете
+        server.server_name, server.server_port = socket.getfqdn(host), port
+        server.setup_environ()
+        server.set_app(application)
+
+        def stop(signum, frame):
+            # shutdown() ждет выхода из serve_forever, поэтому вызывается из другого потока
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, stop)
+        try:
+            server.serve_forever(poll_interval=0.5)
+        finally:
+            server.server_close()
+
+    def spawn(self, listener, application):
+        pid = os.fork()
+        if pid:
+            return pid
+        # Рабочий процесс
+        status = 0
+        try:
+            warmup.post_fork()
+            self.serve_worker(listener, application)
+        except BaseException:
+            logger.exception('Рабочий процесс %s завершился с ошибкой', os.getpid())
+            status = 1
+        finally:
+            # os._exit не вызывает обработчики atexit: остаток журнала доступа сохраняется явно
+            try:
+                audit.buffer.flush()
+            finally:
+                os._exit(status)
+
+    def supervise(self, listener, application, workers):
+        """Порождает рабочие процессы и поддерживает их количество."""
+        children = {}
+        stopping = False
+        restart = []
+        restarting = None
+
+        def on_stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        def on_restart(signum, frame):
+            restart.extend(children)
+
+        signal.signal(signal.SIGTERM, on_stop)
+        signal.signal(signal.SIGINT, on_stop)
+        signal.signal(signal.SIGHUP, on_restart)
+
+        for _ in range(workers):
+            pid = self.spawn(listener, application)
+            children[pid] = time.monotonic()
+
+        while not stopping:
+            if restart and restarting is None:
+                # Плавный перезапуск: следующий процесс останавливается после замены предыдущего
+                restarting = restart.pop(0)
+                if restarting in children:
+                    os.kill(restarting, signal.SIGTERM)
+                else:
+                    restarting = None
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid = 0
+            if not pid:
+                time.sleep(0.2)
+                continue
+            started = children.pop(pid, None)
+            if pid == restarting:
+                restarting = None
+            if started is None or stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            if code:
+                logger.warning('Рабочий процесс %s завершился с кодом %s, перезапуск', pid, code)
+                if time.monotonic() - started < RESPAWN_DELAY:
+                    time.sleep(RESPAWN_DELAY)
+            children[self.spawn(listener, application)] = time.monotonic()
+
+        self.stdout.write('Завершение рабочих процессов...')
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(children):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        listener.close()
@@ -0,0 +1,31 @@
+"""
+Команда сверки копий справочников в базах филиалов.
+
+Копии филиалов, услуг и врачей в базах филиалов (core.branches)
+обновляются сигналами при сохранении в основной базе. Команда приводит
+их к основной базе целиком: после создания базы филиала
+(``manage.py migrate --database branch_<код>``) и после изменений
+справочников в обход сигналов (QuerySet.update(), loaddata).
+"""
+
+from django.core.management.base import BaseCommand
+
+from core.branches import branch_databases, sync_replicas
+
+
+class Command(BaseCommand):
+    help = 'Копирует филиалы, услуги и врачей из основной базы в базы филиалов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Строк в одном запросе вставки и обновления')
+
+    def handle(self, *args, batch_size, **options):
+        if not branch_databases():
+            self.stdout.write('Отдельные базы филиалов не настроены (BRANCH_DATABASES).')
+            return
+        for (database, model), counts in sync_replicas(batch_size).items():
+            self.stdout.write(
+                f'{database}: {model._meta.verbose_name_plural} - создано {counts["created"]}, '
+                f'обновлено {counts["updated"]}, удалено {counts["deleted"]}'
+            )
+        self.stdout.write(self.style.SUCCESS('Копии справочников в базах филиалов совпадают с основной базой'))
@@ -0,0 +1,64 @@
+"""
+Команда скачивания сторонних библиотек в static/vendor.
+
+Скачивает закрепленные версии Bootstrap и Font Awesome из
+core.assets.VENDOR_ASSETS вместе со шрифтами, на которые ссылаются
+их таблицы стилей. После этого страницы не обращаются к CDN, а файлы
+проходят через collectstatic (хеши в именах, сжатые копии).
+"""
+
+import posixpath
+import re
+from pathlib import Path
+from urllib.parse import urljoin
+from urllib.request import urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.assets import VENDOR_ASSETS
+
+
+re_css_url = re.compile(r'url\(\s*[\'"]?([^\'")]+?)[\'"]?\s*\)')
+
+
+class Command(BaseCommand):
+    help = 'Скачивает Bootstrap и Font Awesome в static/vendor для раздачи без CDN'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Скачать заново уже существующие файлы')
+        parser.add_argument('--timeout', type=float, default=30, help='Таймаут запроса в секундах')
+
+    def handle(self, *args, force, timeout, **options):
+        root = Path(settings.STATICFILES_DIRS[0])
+        for path, url in VENDOR_ASSETS.values():
+            data = self._download(root / path, url, force, timeout)
+            if path.endswith('.css'):
+                self._download_references(root, path, url, data, force, timeout)
+
+    def _download(self, target, url, force, timeout):
+        if target.exists() and not force:
+            self.stdout.write(f'{target}: уже скачан')
+            return target.read_bytes()
+        try:
+            with urlopen(url, timeout=timeout) as response:
+                data = response.read()
+        except OSError as exc:
+            raise CommandError(f'Не удалось скачать {url}: {exc}')
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        self.stdout.write(self.style.SUCCESS(f'{target}: {len(data)} байт'))
+        return data
+
+    def _download_references(self, root, path, url, data, force, timeout):
+        """Скачивает файлы из url(...) таблицы стилей (шрифты) с сохранением относительных путей."""
+        references = {
+            reference.split('#', 1)[0].split('?', 1)[0]
+            for reference in re_css_url.findall(data.decode('utf-8'))
+            if not reference.startswith(('data:', '#', 'http:', 'https:', '//'))
+        }
+        for reference in sorted(references):
+            relative = posixpath.normpath(posixpath.join(posixpath.dirname(path), reference))
+            if not relative.startswith('vendor/'):
+                continue
+            self._download(root / relative, urljoin(url, reference), force, timeout)
@@ -0,0 +1,86 @@
+"""
+Промежуточные слои (Middleware) приложения Core.
+
+Модуль содержит middleware, которые подготавливают данные запроса
+до вызова представлений и сжимают ответы.
+"""
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from . import compression
+from .identity import get_request_doctor
+
+
+class DoctorMiddleware(MiddlewareMixin):
+    """
+    Добавляет в запрос атрибут ``request.doctor``.
+
+    Врач определяется лениво: сессия и кэш читаются только при первом
+    обращении к атрибуту, и не чаще одного раза за запрос. Должен стоять
+    после SessionMiddleware.
+    """
+
+    def process_request(self, request):
+        request.doctor = SimpleLazyObject(lambda: get_request_doctor(request))
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Сжатие ответов brotli или gzip (core.compression).
+
+    Не сжимает ответы меньше COMPRESS_MIN_SIZE байт, уже сжатые ответы,
+    типы содержимого вне core.compression.COMPRESSIBLE_TYPES (в том числе
+    изображения и поток событий SSE) и ответы с Cache-Control: no-transform.
+    Потоковые ответы сжимаются по мере генерации. Страницы с CSRF-токеном
+    сжимаются gzip со случайной длиной заголовка (защита от BREACH).
+    Должен стоять в начале MIDDLEWARE, сразу после SecurityMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if request.method == 'HEAD' or response.status_code in (204, 206, 304):
+            return response
+        if response.has_header('Content-Encoding'):
+            return response
+        if not compression.is_compressible(response.get('Content-Type', '')):
+            return response
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return response
+        min_size = getattr(settings, 'COMPRESS_MIN_SIZE', 500)
+        if not response.streaming and len(response.content) < min_size:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        # Токен выводился в шаблон: get_token() добавляет этот ключ в META
+        # (CsrfViewMiddleware затем сбрасывает значение, но не удаляет ключ)
+        breach_sensitive = 'CSRF_COOKIE_NEEDS_UPDATE' in request.META
+        encoding = compression.choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), breach_sensitive)
+        if encoding is None:
+            return response
+        padding = getattr(settings, 'COMPRESS_BREACH_PADDING', 100) if breach_sensitive else 0
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = compression.acompress_iterator(
+                    response.streaming_content, encoding, padding
+                )
+            else:
+                response.streaming_content = compression.compress_iterator(
+                    response.streaming_content, encoding, padding
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed = compression.compress_bytes(response.content, encoding, padding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        # Сильный ETag относится к несжатому телу
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_notifications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'created_at', 'id'], name='core_appt_doctor_created_idx'),
+        ),
+    ]
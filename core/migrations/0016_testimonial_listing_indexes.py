@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_appointment_doctor_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['is_approved', 'rating', 'created_at'], name='core_testimonial_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['is_approved', 'doctor', 'created_at'], name='core_testimonial_doctor_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_testimonial_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='medicalrecord',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Отпечаток'),
+        ),
+        migrations.AddField(
+            model_name='testimonial',
+            name='fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=32, verbose_name='Отпечаток'),
+        ),
+        migrations.AddIndex(
+            model_name='medicalrecord',
+            index=models.Index(fields=['appointment', 'fingerprint', 'created_at'], name='core_record_dedup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(fields=['doctor', 'fingerprint', 'created_at'], name='core_testimonial_dedup_idx'),
+        ),
+    ]
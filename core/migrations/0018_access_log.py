@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_content_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.PositiveIntegerField(editable=False, verbose_name='Месяц')),
+                ('accessed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Время обращения')),
+                ('action', models.CharField(choices=[('patient_card', 'Карта пациента'), ('medical_records', 'Медицинские записи')], max_length=30, verbose_name='Страница')),
+                ('ip', models.GenericIPAddressField(blank=True, null=True, verbose_name='IP-адрес')),
+                ('appointment', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.appointment', verbose_name='Запись на прием')),
+                ('doctor', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.doctor', verbose_name='Врач')),
+                ('patient', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.patient', verbose_name='Пациент')),
+            ],
+            options={
+                'verbose_name': 'Обращение к медицинским данным',
+                'verbose_name_plural': 'Журнал доступа к медицинским данным',
+                'ordering': ['-accessed_at'],
+                'indexes': [models.Index(fields=['month', 'patient', 'accessed_at'], name='core_access_patient_idx'), models.Index(fields=['month', 'doctor', 'accessed_at'], name='core_access_doctor_idx')],
+            },
+        ),
+    ]
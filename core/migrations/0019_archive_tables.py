@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_access_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAppointment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Имя пациента')),
+                ('phone', models.CharField(max_length=20, verbose_name='Телефон')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='Email')),
+                ('doctor_id', models.BigIntegerField(verbose_name='ID врача')),
+                ('patient_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID пациента')),
+                ('date', models.DateField(verbose_name='Дата приема')),
+                ('message', models.TextField(blank=True, verbose_name='Сообщение')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('confirmed', 'Подтверждена'), ('cancelled', 'Отменена'), ('completed', 'Завершена')], max_length=10, verbose_name='Статус записи')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания записи')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата переноса в архив')),
+            ],
+            options={
+                'verbose_name': 'Архивная запись на прием',
+                'verbose_name_plural': 'Архив записей на прием',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['phone', 'date'], name='core_archappt_phone_idx'), models.Index(fields=['patient_id', 'date'], name='core_archappt_patient_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedMedicalRecord',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('doctor_id', models.BigIntegerField(verbose_name='ID врача')),
+                ('patient_id', models.BigIntegerField(blank=True, null=True, verbose_name='ID пациента')),
+                ('service_ids', models.JSONField(blank=True, default=list, verbose_name='ID услуг')),
+                ('diagnosis', models.TextField(verbose_name='Диагноз')),
+                ('treatment', models.TextField(verbose_name='Лечение')),
+                ('recommendations', models.TextField(blank=True, verbose_name='Рекомендации')),
+                ('fingerprint', models.CharField(blank=True, max_length=32, verbose_name='Отпечаток')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания записи')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата переноса в архив')),
+                ('appointment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='medical_records', to='core.archivedappointment', verbose_name='Запись на прием')),
+            ],
+            options={
+                'verbose_name': 'Архивная медицинская запись',
+                'verbose_name_plural': 'Архив медицинских записей',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
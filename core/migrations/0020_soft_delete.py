@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:43
+
+import django.db.models.manager
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_archive_tables'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='doctor',
+            options={'base_manager_name': 'all_objects', 'verbose_name': 'Врач', 'verbose_name_plural': 'Врачи'},
+        ),
+        migrations.AlterModelOptions(
+            name='patient',
+            options={'base_manager_name': 'all_objects', 'verbose_name': 'Пациент', 'verbose_name_plural': 'Пациенты'},
+        ),
+        migrations.AlterModelManagers(
+            name='doctor',
+            managers=[
+                ('objects', django.db.models.manager.Manager()),
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AlterModelManagers(
+            name='patient',
+            managers=[
+                ('objects', django.db.models.manager.Manager()),
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Помечен на удаление'),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Помечен на удаление'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='photo',
+            field=models.ImageField(blank=True, upload_to='doctors/originals/', verbose_name='Фотография'),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='photo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Уменьшенные копии фотографии'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-19 04:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_doctor_photo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctor',
+            name='calendar_token',
+            field=models.CharField(blank=True, editable=False, max_length=43, null=True, unique=True, verbose_name='Ключ ленты календаря'),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doctor', 'date'], name='core_appt_doctor_date_idx'),
+        ),
+    ]
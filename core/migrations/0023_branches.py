@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Branch',
+            fields=[
+                ('code', models.SlugField(max_length=20, primary_key=True, serialize=False, verbose_name='Код')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('address', models.CharField(blank=True, max_length=200, verbose_name='Адрес')),
+            ],
+            options={
+                'verbose_name': 'Филиал',
+                'verbose_name_plural': 'Филиалы',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='branch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='doctors', to='core.branch', verbose_name='Филиал'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_branches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WaitlistEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Имя пациента')),
+                ('phone', models.CharField(max_length=20, verbose_name='Телефон')),
+                ('email', models.EmailField(blank=True, max_length=254, verbose_name='Email')),
+                ('date', models.DateField(verbose_name='Дата приема')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='Приоритет')),
+                ('status', models.CharField(choices=[('waiting', 'Ожидает'), ('promoted', 'Записан'), ('withdrawn', 'Исключен')], default='waiting', max_length=10, verbose_name='Статус')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')),
+                ('promoted_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Дата записи')),
+                ('appointment', models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_entry', to='core.appointment', verbose_name='Запись на прием')),
+                ('doctor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.doctor', verbose_name='Врач')),
+                ('freed_by', models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='waitlist_successor', to='core.appointment', verbose_name='Освободившая место запись')),
+            ],
+            options={
+                'verbose_name': 'Лист ожидания',
+                'verbose_name_plural': 'Лист ожидания',
+                'ordering': ['date', '-priority', 'created_at', 'id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'waiting')), fields=['doctor', 'date', '-priority', 'created_at', 'id'], name='core_waitlist_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_job_heartbeat'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='accesslog',
+            name='core_access_patient_idx',
+        ),
+        migrations.AddField(
+            model_name='accesslog',
+            name='database',
+            field=models.CharField(default='default', max_length=100, verbose_name='База филиала'),
+        ),
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['month', 'database', 'patient', 'accessed_at'], name='core_access_patient_idx'),
+        ),
+    ]
@@ -2,15 +2,58 @@
 Модели Django для системы управления клиникой.
 
 Модуль содержит определения моделей данных для основных сущностей системы:
-пациентов, врачей, услуг, записей на прием, отзывов и медицинских карт.
+филиалов, пациентов, врачей, услуг, записей на прием, листа ожидания, отзывов
+и медицинских карт,
+а также служебные модели (уведомления, очередь фоновых задач,
+журнал доступа к медицинским данным).
 """
 
+import secrets
+
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.hashers import make_password, check_password
+from django.utils import timezone
+
+from .fingerprint import FINGERPRINT_LENGTH, content_fingerprint
 
 
-class Patient(models.Model):
+class AliveManager(models.Manager):
+    """Менеджер, скрывающий строки, помеченные на удаление."""
+    
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """
+    Абстрактная модель с мягким удалением.
+    
+    Помеченная строка сразу исчезает из objects (сайт, формы, админка),
+    а сама строка и зависимые данные удаляются позже фоновой задачей
+    пакетами (core.purge). Связанные записи продолжают видеть ее через
+    all_objects, который используется и для доступа по внешним ключам.
+    
+    Attributes:
+        deleted_at (DateTimeField): Время пометки на удаление
+    """
+    
+    deleted_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Помечен на удаление')
+    
+    objects = AliveManager()
+    all_objects = models.Manager()
+    
+    class Meta:
+        abstract = True
+        base_manager_name = 'all_objects'
+    
+    def soft_delete(self):
+        """Помечает строку на удаление (сигнал post_save сбрасывает кэши)."""
+        self.deleted_at = timezone.now()
+        self.save(update_fields=['deleted_at'])
+
+
+class Patient(SoftDeleteModel):
     """
     Модель пациента клиники.
     
@@ -22,6 +65,7 @@ class Patient(models.Model):
         phone (CharField): Контактный телефон
         birth_date (DateField): Дата рождения (опционально)
         notes (TextField): Дополнительные медицинские заметки
+        deleted_at (DateTimeField): Время пометки на удаление (SoftDeleteModel)
     """
     
     name = models.CharField(max_length=100, verbose_name='Имя пациента')
@@ -29,7 +73,7 @@ class Patient(models.Model):
     birth_date = models.DateField(null=True, blank=True, verbose_name='Дата рождения')
     notes = models.TextField(blank=True, verbose_name='Заметки')
     
-    class Meta:
+    class Meta(SoftDeleteModel.Meta):
         verbose_name = 'Пациент'
         verbose_name_plural = 'Пациенты'
     
@@ -63,7 +107,35 @@ class Service(models.Model):
         return self.title
 
 
-class Doctor(models.Model):
+class Branch(models.Model):
+    """
+    Филиал клиники.
+    
+    Записи на прием, пациенты, медицинские записи и отзывы врачей
+    филиала хранятся в отдельной базе данных филиала (core.branches).
+    Код филиала - первичный ключ: база определяется по Doctor.branch_id
+    без запросов через настройку BRANCH_DATABASES.
+    
+    Attributes:
+        code (SlugField): Код филиала (ключ в BRANCH_DATABASES)
+        name (CharField): Название филиала
+        address (CharField): Адрес филиала
+    """
+    
+    code = models.SlugField(max_length=20, primary_key=True, verbose_name='Код')
+    name = models.CharField(max_length=100, verbose_name='Название')
+    address = models.CharField(max_length=200, blank=True, verbose_name='Адрес')
+    
+    class Meta:
+        verbose_name = 'Филиал'
+        verbose_name_plural = 'Филиалы'
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
+
+class Doctor(SoftDeleteModel):
     """
     Модель врача клиники.
     
@@ -77,6 +149,12 @@ class Doctor(models.Model):
         description (TextField): Подробное описание квалификации
         username (CharField): Уникальный логин для входа
         password (CharField): Хешированный пароль
+        photo (ImageField): Исходная фотография (на сайте не показывается)
+        photo_renditions (JSONField): Описание уменьшенных копий фотографии
+                                      (core.images), создаваемых в фоне
+        calendar_token (CharField): Секрет в адресе ленты календаря (core.calendar)
+        branch (ForeignKey): Филиал; определяет базу данных приемов врача
+        deleted_at (DateTimeField): Время пометки на удаление (SoftDeleteModel)
     """
     
     name = models.CharField(max_length=100, verbose_name='ФИО врача')
@@ -85,8 +163,16 @@ class Doctor(models.Model):
     description = models.TextField(verbose_name='Описание', blank=True)
     username = models.CharField(max_length=50, unique=True, verbose_name='Логин', blank=True, null=True)
     password = models.CharField(max_length=128, verbose_name='Пароль', blank=True, null=True)
+    photo = models.ImageField(upload_to='doctors/originals/', blank=True, verbose_name='Фотография')
+    photo_renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name='Уменьшенные копии фотографии')
+    calendar_token = models.CharField(
+        max_length=43, unique=True, null=True, blank=True, editable=False, verbose_name='Ключ ленты календаря'
+    )
+    branch = models.ForeignKey(
+        Branch, on_delete=models.PROTECT, null=True, blank=True, related_name='doctors', verbose_name='Филиал'
+    )
 
-    class Meta:
+    class Meta(SoftDeleteModel.Meta):
         app_label = 'core'
         verbose_name = 'Врач'
         verbose_name_plural = 'Врачи'
@@ -99,8 +185,46 @@ class Doctor(models.Model):
         self.password = make_password(raw_password)
     
     def check_password(self, raw_password):
-        """Проверка соответствия пароля."""
-        return check_password(raw_password, self.password)
+        """
+        Проверка соответствия пароля.
+        
+        Если хеш создан устаревшим алгоритмом или с другим числом
+        итераций, он прозрачно пересчитывается и сохраняется.
+        """
+        def setter(raw_password):
+            self.set_password(raw_password)
+            self.save(update_fields=['password'])
+        return check_password(raw_password, self.password, setter)
+    
+    def rotate_calendar_token(self):
+        """
+        Выдает новый ключ ленты календаря.
+        
+        Прежний адрес ленты перестает работать сразу после сохранения.
+        
+        Returns:
+            str: Новый ключ
+        """
+        self.calendar_token = secrets.token_urlsafe(32)
+        self.save(update_fields=['calendar_token'])
+        return self.calendar_token
+
+
+class BranchQuerySet(models.QuerySet):
+    """
+    Выборки данных филиала (core.branches).
+    
+    QuerySet.create() сохраняет строку в базу, выбранную до создания
+    экземпляра, и маршрутизатор не видит врача новой строки. Поэтому без
+    явного using() база выбирается при сохранении по самому экземпляру.
+    """
+    
+    def create(self, **kwargs):
+        if self._db is not None:
+            return super().create(**kwargs)
+        obj = self.model(**kwargs)
+        obj.save(force_insert=True)
+        return obj
 
 
 class Appointment(models.Model):
@@ -114,6 +238,7 @@ class Appointment(models.Model):
         STATUS_CHOICES (list): Варианты статусов записи
         name (CharField): Имя пациента
         phone (CharField): Контактный телефон
+        email (EmailField): Адрес электронной почты для уведомлений (опционально)
         doctor (ForeignKey): Ссылка на врача
         date (DateField): Дата приема
         message (TextField): Дополнительное сообщение
@@ -131,6 +256,7 @@ class Appointment(models.Model):
     
     name = models.CharField(max_length=100, verbose_name='Имя пациента')
     phone = models.CharField(max_length=20, verbose_name='Телефон')
+    email = models.EmailField(blank=True, verbose_name='Email')
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, verbose_name='Врач')
     date = models.DateField(verbose_name='Дата приема')
     message = models.TextField(blank=True, verbose_name='Сообщение')
@@ -142,16 +268,101 @@ class Appointment(models.Model):
         default='pending', 
         verbose_name='Статус записи'
     )
+    
+    objects = BranchQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Запись на прием'
         verbose_name_plural = 'Записи на прием'
         ordering = ['-created_at']
+        indexes = [
+            # Выборка предстоящих приемов для напоминаний
+            models.Index(fields=['date', 'status'], name='core_appt_date_status_idx'),
+            # Новые записи врача после отметки (created_at, id) для живых обновлений
+            models.Index(fields=['doctor', 'created_at', 'id'], name='core_appt_doctor_created_idx'),
+            # Приемы врача за период для ленты календаря
+            models.Index(fields=['doctor', 'date'], name='core_appt_doctor_date_idx'),
+        ]
 
     def __str__(self):
         return f'{self.name} - {self.doctor} ({self.date})'
 
 
+class WaitlistEntry(models.Model):
+    """
+    Модель пациента в листе ожидания приема у врача на дату.
+    
+    При отмене записи на ту же дату к тому же врачу первый ожидающий
+    получает освободившееся место (core.waitlist). Очередь упорядочена
+    по приоритету (большие значения раньше) и времени добавления.
+    
+    Attributes:
+        STATUS_CHOICES (list): Варианты статусов
+        name (CharField): Имя пациента
+        phone (CharField): Контактный телефон
+        email (EmailField): Адрес электронной почты для уведомлений (опционально)
+        doctor (ForeignKey): Ссылка на врача
+        date (DateField): Желаемая дата приема
+        priority (SmallIntegerField): Приоритет в очереди
+        status (CharField): Текущий статус
+        created_at (DateTimeField): Дата добавления в лист ожидания
+        promoted_at (DateTimeField): Дата записи на освободившееся место
+        freed_by (OneToOneField): Отмененная запись, освободившая место
+        appointment (OneToOneField): Запись на прием, созданная для пациента
+    """
+    
+    STATUS_WAITING = 'waiting'
+    STATUS_PROMOTED = 'promoted'
+    STATUS_WITHDRAWN = 'withdrawn'
+    STATUS_CHOICES = [
+        (STATUS_WAITING, 'Ожидает'),
+        (STATUS_PROMOTED, 'Записан'),
+        (STATUS_WITHDRAWN, 'Исключен'),
+    ]
+    
+    name = models.CharField(max_length=100, verbose_name='Имя пациента')
+    phone = models.CharField(max_length=20, verbose_name='Телефон')
+    email = models.EmailField(blank=True, verbose_name='Email')
+    doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE, verbose_name='Врач')
+    date = models.DateField(verbose_name='Дата приема')
+    priority = models.SmallIntegerField(default=0, verbose_name='Приоритет')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_WAITING,
+        verbose_name='Статус'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата добавления')
+    promoted_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name='Дата записи')
+    # Уникальность: одна отмена освобождает место только для одного пациента
+    freed_by = models.OneToOneField(
+        Appointment, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='waitlist_successor', verbose_name='Освободившая место запись',
+    )
+    appointment = models.OneToOneField(
+        Appointment, on_delete=models.SET_NULL, null=True, blank=True, editable=False,
+        related_name='waitlist_entry', verbose_name='Запись на прием',
+    )
+    
+    objects = BranchQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = 'Лист ожидания'
+        verbose_name_plural = 'Лист ожидания'
+        ordering = ['date', '-priority', 'created_at', 'id']
+        indexes = [
+            # Первый ожидающий на (врач, дата): поиск по индексу без сортировки очереди
+            models.Index(
+                fields=['doctor', 'date', '-priority', 'created_at', 'id'],
+                condition=models.Q(status='waiting'),
+                name='core_waitlist_queue_idx',
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.name} - {self.doctor} ({self.date}, {self.get_status_display()})'
+
+
 class Testimonial(models.Model):
     """
     Модель отзыва пациента о клинике.
@@ -167,6 +378,8 @@ class Testimonial(models.Model):
         rating (CharField): Оценка обслуживания
         created_at (DateTimeField): Дата создания отзыва
         is_approved (BooleanField): Флаг одобрения модератором
+        fingerprint (CharField): Отпечаток нормализованных имени и текста
+                                 для поиска дубликатов
     """
     
     RATING_CHOICES = [
@@ -185,15 +398,38 @@ class Testimonial(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     is_approved = models.BooleanField(default=False, verbose_name="Одобрено")
+    fingerprint = models.CharField(max_length=FINGERPRINT_LENGTH, blank=True, editable=False, verbose_name="Отпечаток")
+    
+    objects = BranchQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Отзыв"
         verbose_name_plural = "Отзывы"
         ordering = ['-created_at']
+        indexes = [
+            # Публичный список отзывов: фильтр по оценке или врачу, новые сверху
+            models.Index(fields=['is_approved', 'rating', 'created_at'], name='core_testimonial_rating_idx'),
+            models.Index(fields=['is_approved', 'doctor', 'created_at'], name='core_testimonial_doctor_idx'),
+            # Поиск дубликата отзыва одним обращением к индексу
+            models.Index(fields=['doctor', 'fingerprint', 'created_at'], name='core_testimonial_dedup_idx'),
+        ]
     
     def __str__(self):
         return f"Отзыв от {self.name}"
     
+    @staticmethod
+    def make_fingerprint(name, message):
+        """Отпечаток отзыва без учета регистра и пробелов."""
+        return content_fingerprint(name, message)
+    
+    def save(self, *args, **kwargs):
+        """Сохранение с пересчетом отпечатка содержимого."""
+        self.fingerprint = self.make_fingerprint(self.name, self.message)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'name', 'message'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'fingerprint'}
+        super().save(*args, **kwargs)
+    
     def get_rating_display_class(self):
         """Возвращает CSS-класс для отображения оценки."""
         return 'success' if self.rating == 'good' else 'danger'
@@ -219,6 +455,8 @@ class MedicalRecord(models.Model):
         recommendations (TextField): Рекомендации пациенту
         created_at (DateTimeField): Дата создания записи
         patient (ForeignKey): Ссылка на пациента (опционально)
+        fingerprint (CharField): Отпечаток нормализованного диагноза
+                                 для поиска дубликатов
     """
     
     appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, verbose_name='Запись на прием')
@@ -229,10 +467,426 @@ class MedicalRecord(models.Model):
     recommendations = models.TextField(blank=True, verbose_name='Рекомендации')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания записи')
     patient = models.ForeignKey('Patient', on_delete=models.CASCADE, verbose_name='Пациент', null=True, blank=True)
+    fingerprint = models.CharField(max_length=FINGERPRINT_LENGTH, blank=True, editable=False, verbose_name='Отпечаток')
+    
+    objects = BranchQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Медицинская запись'
         verbose_name_plural = 'Медицинские записи'
+        indexes = [
+            # Поиск похожей записи за день одним обращением к индексу
+            models.Index(fields=['appointment', 'fingerprint', 'created_at'], name='core_record_dedup_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Запись от {self.created_at.strftime('%d.%m.%Y')} - {self.appointment.name}"
+    
+    @staticmethod
+    def make_fingerprint(diagnosis):
+        """Отпечаток диагноза без учета регистра и пробелов."""
+        return content_fingerprint(diagnosis)
+    
+    def save(self, *args, **kwargs):
+        """Сохранение с пересчетом отпечатка диагноза."""
+        self.fingerprint = self.make_fingerprint(self.diagnosis)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'diagnosis' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'fingerprint'}
+        super().save(*args, **kwargs)
+
+class Notification(models.Model):
+    """
+    Модель уведомления пациента о записи на прием.
+    
+    Хранит состояние доставки каждого уведомления. Уникальность пары
+    (запись, тип, канал) гарантирует, что уведомление не будет
+    отправлено дважды даже при повторных запусках рассылки.
+    
+    Attributes:
+        KIND_CHOICES (list): Типы уведомлений
+        CHANNEL_CHOICES (list): Каналы доставки
+        STATUS_CHOICES (list): Статусы доставки
+        appointment (ForeignKey): Запись на прием
+        kind (CharField): Тип уведомления
+        channel (CharField): Канал доставки
+        status (CharField): Статус доставки
+        attempts (PositiveSmallIntegerField): Количество попыток отправки
+        batch (CharField): Идентификатор пакета, захватившего уведомление
+        claimed_at (DateTimeField): Время захвата пакетом
+        error (TextField): Текст последней ошибки
+        created_at (DateTimeField): Дата создания
+        sent_at (DateTimeField): Дата успешной отправки
+    """
+    
+    KIND_CONFIRMATION = 'confirmation'
+    KIND_REMINDER = 'reminder'
+    KIND_CHOICES = [
+        (KIND_CONFIRMATION, 'Подтверждение записи'),
+        (KIND_REMINDER, 'Напоминание о приеме'),
+    ]
+    
+    CHANNEL_EMAIL = 'email'
+    CHANNEL_SMS = 'sms'
+    CHANNEL_CHOICES = [
+        (CHANNEL_EMAIL, 'Email'),
+        (CHANNEL_SMS, 'SMS'),
+    ]
+    
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Ожидает отправки'),
+        (STATUS_SENDING, 'Отправляется'),
+        (STATUS_SENT, 'Отправлено'),
+        (STATUS_FAILED, 'Ошибка отправки'),
+    ]
+    
+    appointment = models.ForeignKey(Appointment, on_delete=models.CASCADE, verbose_name='Запись на прием')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name='Тип')
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, verbose_name='Канал')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    batch = models.CharField(max_length=32, blank=True, verbose_name='Пакет')
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name='Захвачено')
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата отправки')
+    
+    class Meta:
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+        ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['appointment', 'kind', 'channel'],
+                name='core_notification_unique'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.get_kind_display()} ({self.get_channel_display()}) для записи #{self.appointment_id}'
+
+
+class Job(models.Model):
+    """
+    Модель фоновой задачи в очереди на базе данных.
+    
+    Задачи ставятся в очередь из представлений одной вставкой и
+    выполняются командой ``manage.py run_workers``. Захват задачи
+    выполняется условным обновлением статуса, что безопасно и для SQLite.
+    
+    Attributes:
+        STATUS_CHOICES (list): Варианты статусов задачи
+        task (CharField): Имя зарегистрированной задачи
+        queue (CharField): Имя очереди
+        args (JSONField): Позиционные аргументы задачи
+        kwargs (JSONField): Именованные аргументы задачи
+        priority (SmallIntegerField): Приоритет (большие значения выполняются раньше)
+        status (CharField): Текущий статус задачи
+        attempts (PositiveSmallIntegerField): Количество выполненных попыток
+        max_attempts (PositiveSmallIntegerField): Максимальное количество попыток
+        run_at (DateTimeField): Время, раньше которого задача не выполняется
+        locked_by (CharField): Идентификатор захватившего задачу обработчика
+        locked_at (DateTimeField): Время захвата задачи
+        heartbeat_at (DateTimeField): Последний сигнал обработчика о выполнении задачи
+        last_error (TextField): Текст последней ошибки
+        created_at (DateTimeField): Дата постановки в очередь
+        finished_at (DateTimeField): Дата завершения
+    """
+    
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+    
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Выполнена'),
+        (STATUS_DEAD, 'Не выполнена'),
+    ]
+    
+    task = models.CharField(max_length=200, verbose_name='Задача')
+    queue = models.CharField(max_length=50, default='default', verbose_name='Очередь')
+    args = models.JSONField(default=list, blank=True, verbose_name='Аргументы')
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name='Именованные аргументы')
+    priority = models.SmallIntegerField(default=0, verbose_name='Приоритет')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=STATUS_QUEUED,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name='Попыток')
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name='Максимум попыток')
+    run_at = models.DateTimeField(default=timezone.now, verbose_name='Выполнить не ранее')
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name='Обработчик')
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name='Захвачена')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='Последний сигнал обработчика')
+    last_error = models.TextField(blank=True, verbose_name='Последняя ошибка')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='Дата завершения')
+    
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['queue', 'status', '-priority', 'run_at'],
+                name='core_job_claim_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f'{self.task} #{self.pk} ({self.get_status_display()})'
+
+
+class AccessLogQuerySet(models.QuerySet):
+    """
+    Выборки журнала доступа.
+    
+    Журнал только дополняется: массовое изменение и удаление запрещены.
+    Старые месяцы удаляются целиком методом drop_months().
+    """
+    
+    def for_patient(self, patient_id, database='default'):
+        """
+        Обращения к данным пациента.
+        
+        Args:
+            patient_id: ID пациента
+            database: База филиала пациента: ID уникальны только внутри базы
+        """
+        return self.filter(database=database, patient_id=patient_id)
+    
+    def for_doctor(self, doctor_id):
+        """Обращения врача к медицинским данным."""
+        return self.filter(doctor_id=doctor_id)
+    
+    def in_months(self, start, end=None):
+        """
+        Записи за месяцы в диапазоне [start, end].
+        
+        Args:
+            start: Первый месяц в формате ГГГГММ
+            end: Последний месяц (по умолчанию равен start)
+        """
+        return self.filter(month__gte=start, month__lte=end or start)
+    
+    def update(self, **kwargs):
+        raise TypeError('Журнал доступа нельзя изменять')
+    
+    def delete(self):
+        raise TypeError('Журнал доступа нельзя изменять')
+    
+    def drop_months(self, before):
+        """
+        Удаляет месяцы раньше указанного целиком (срок хранения истек).
+        
+        Args:
+            before: Первый сохраняемый месяц в формате ГГГГММ
+            
+        Returns:
+            int: Количество удаленных записей
+        """
+        return self.filter(month__lt=before)._raw_delete(self.db)
+
+
+class AccessLog(models.Model):
+    """
+    Журнал доступа к медицинским данным пациентов (только дополнение).
+    
+    Записи накапливаются в буфере процесса (core.audit) и сохраняются
+    пакетами. Таблица разделена по месяцам полем month: оно стоит первым
+    в индексах, поэтому выборки по пациенту или врачу за период читают
+    только свои месяцы, а истекшие месяцы удаляются одним диапазоном.
+    Связи не ограничены внешними ключами, чтобы журнал переживал
+    удаление врачей, пациентов и приемов. Журнал хранится в основной
+    базе, а ID пациентов и приемов уникальны только внутри базы филиала
+    (core.branches), поэтому запись хранит и имя этой базы.
+    
+    Attributes:
+        ACTION_CHOICES (list): Варианты просмотренных страниц
+        month (PositiveIntegerField): Месяц обращения в формате ГГГГММ
+        accessed_at (DateTimeField): Время обращения
+        doctor (ForeignKey): Врач, просматривавший данные
+        patient (ForeignKey): Пациент, чьи данные просмотрены
+        appointment (ForeignKey): Запись на прием
+        database (CharField): База филиала, в которой хранятся пациент и прием
+        action (CharField): Просмотренная страница
+        ip (GenericIPAddressField): IP-адрес клиента
+    """
+    
+    ACTION_PATIENT_CARD = 'patient_card'
+    ACTION_MEDICAL_RECORDS = 'medical_records'
+    
+    ACTION_CHOICES = [
+        (ACTION_PATIENT_CARD, 'Карта пациента'),
+        (ACTION_MEDICAL_RECORDS, 'Медицинские записи'),
+    ]
+    
+    month = models.PositiveIntegerField(editable=False, verbose_name='Месяц')
+    accessed_at = models.DateTimeField(default=timezone.now, verbose_name='Время обращения')
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Врач'
+    )
+    patient = models.ForeignKey(
+        Patient,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Пациент'
+    )
+    appointment = models.ForeignKey(
+        Appointment,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Запись на прием'
+    )
+    database = models.CharField(max_length=100, default='default', verbose_name='База филиала')
+    action = models.CharField(max_length=30, choices=ACTION_CHOICES, verbose_name='Страница')
+    ip = models.GenericIPAddressField(null=True, blank=True, verbose_name='IP-адрес')
+    
+    objects = AccessLogQuerySet.as_manager()
+    
+    class Meta:
+        verbose_name = 'Обращение к медицинским данным'
+        verbose_name_plural = 'Журнал доступа к медицинским данным'
+        ordering = ['-accessed_at']
+        indexes = [
+            models.Index(fields=['month', 'database', 'patient', 'accessed_at'], name='core_access_patient_idx'),
+            models.Index(fields=['month', 'doctor', 'accessed_at'], name='core_access_doctor_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{timezone.localtime(self.accessed_at):%d.%m.%Y %H:%M} {self.get_action_display()} #{self.appointment_id}'
+    
+    @staticmethod
+    def month_of(moment):
+        """Месяц в формате ГГГГММ для времени (в часовом поясе проекта)."""
+        moment = timezone.localtime(moment)
+        return moment.year * 100 + moment.month
+    
+    def save(self, *args, **kwargs):
+        """Сохраняет только новую запись: существующие записи не изменяются."""
+        if self.pk is not None:
+            raise TypeError('Журнал доступа нельзя изменять')
+        self.month = self.month_of(self.accessed_at)
+        super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        raise TypeError('Журнал доступа нельзя изменять')
+
+
+class ArchivedAppointment(models.Model):
+    """
+    Запись на прием, перенесенная в архив (core.archive).
+    
+    Строка сохраняет исходный ID, поэтому ссылки из журнала доступа
+    и внешних систем продолжают указывать на ту же запись. Архив может
+    находиться в отдельной базе данных (ARCHIVE_DATABASE), поэтому врач
+    и пациент хранятся идентификаторами без внешних ключей.
+    
+    Attributes:
+        id (BigIntegerField): ID исходной записи на прием
+        name (CharField): Имя пациента
+        phone (CharField): Контактный телефон
+        email (EmailField): Адрес электронной почты
+        doctor_id (BigIntegerField): ID врача
+        patient_id (BigIntegerField): ID пациента (опционально)
+        date (DateField): Дата приема
+        message (TextField): Дополнительное сообщение
+        status (CharField): Статус записи на момент переноса
+        created_at (DateTimeField): Дата создания исходной записи
+        archived_at (DateTimeField): Дата переноса в архив
+    """
+    
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID')
+    name = models.CharField(max_length=100, verbose_name='Имя пациента')
+    phone = models.CharField(max_length=20, verbose_name='Телефон')
+    email = models.EmailField(blank=True, verbose_name='Email')
+    doctor_id = models.BigIntegerField(verbose_name='ID врача')
+    patient_id = models.BigIntegerField(null=True, blank=True, verbose_name='ID пациента')
+    date = models.DateField(verbose_name='Дата приема')
+    message = models.TextField(blank=True, verbose_name='Сообщение')
+    status = models.CharField(max_length=10, choices=Appointment.STATUS_CHOICES, verbose_name='Статус записи')
+    created_at = models.DateTimeField(verbose_name='Дата создания записи')
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name='Дата переноса в архив')
+    
+    # Признак для шаблонов, выводящих горячие и архивные записи вместе
+    is_archived = True
+    
+    class Meta:
+        verbose_name = 'Архивная запись на прием'
+        verbose_name_plural = 'Архив записей на прием'
+        ordering = ['-date']
+        indexes = [
+            # История пациента в карте по телефону
+            models.Index(fields=['phone', 'date'], name='core_archappt_phone_idx'),
+            models.Index(fields=['patient_id', 'date'], name='core_archappt_patient_idx'),
+        ]
+    
+    def __str__(self):
+        return f'{self.name} ({self.date}, архив)'
+
+
+class ArchivedMedicalRecord(models.Model):
+    """
+    Медицинская запись, перенесенная в архив вместе со своим приемом.
+    
+    Attributes:
+        id (BigIntegerField): ID исходной медицинской записи
+        appointment (ForeignKey): Архивная запись на прием
+        doctor_id (BigIntegerField): ID врача
+        patient_id (BigIntegerField): ID пациента (опционально)
+        service_ids (JSONField): ID оказанных услуг
+        diagnosis (TextField): Поставленный диагноз
+        treatment (TextField): Назначенное лечение
+        recommendations (TextField): Рекомендации пациенту
+        fingerprint (CharField): Отпечаток нормализованного диагноза
+        created_at (DateTimeField): Дата создания исходной записи
+        archived_at (DateTimeField): Дата переноса в архив
+    """
+    
+    id = models.BigIntegerField(primary_key=True, verbose_name='ID')
+    appointment = models.ForeignKey(
+        ArchivedAppointment,
+        on_delete=models.CASCADE,
+        related_name='medical_records',
+        verbose_name='Запись на прием'
+    )
+    doctor_id = models.BigIntegerField(verbose_name='ID врача')
+    patient_id = models.BigIntegerField(null=True, blank=True, verbose_name='ID пациента')
+    service_ids = models.JSONField(default=list, blank=True, verbose_name='ID услуг')
+    diagnosis = models.TextField(verbose_name='Диагноз')
+    treatment = models.TextField(verbose_name='Лечение')
+    recommendations = models.TextField(blank=True, verbose_name='Рекомендации')
+    fingerprint = models.CharField(max_length=FINGERPRINT_LENGTH, blank=True, verbose_name='Отпечаток')
+    created_at = models.DateTimeField(verbose_name='Дата создания записи')
+    archived_at = models.DateTimeField(default=timezone.now, verbose_name='Дата переноса в архив')
+    
+    is_archived = True
+    
+    class Meta:
+        verbose_name = 'Архивная медицинская запись'
+        verbose_name_plural = 'Архив медицинских записей'
+        ordering = ['-created_at']
     
     def __str__(self):
-        return f"Запись от {self.created_at.strftime('%d.%m.%Y')} - {self.appointment.name}"
\ No newline at end of file
+        return f"Запись от {self.created_at.strftime('%d.%m.%Y')} (архив)"
@@ -0,0 +1,367 @@
+"""
+Уведомления пациентов о записях на прием.
+
+Модуль содержит транспорты доставки (email через почтовый backend Django
+и SMS с локальной файловой заглушкой) и функции пакетной рассылки
+подтверждений и напоминаний. Состояние доставки хранится в модели
+Notification, поэтому повторный запуск рассылки не отправляет
+уже доставленные сообщения.
+
+Транспорты настраиваются параметром NOTIFICATION_TRANSPORTS::
+
+    NOTIFICATION_TRANSPORTS = {
+        'email': 'core.notifications.EmailTransport',
+        'sms': 'core.notifications.FileSMSTransport',
+    }
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .branches import scatter
+from .models import Appointment, Notification
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TRANSPORTS = {
+    Notification.CHANNEL_EMAIL: 'core.notifications.EmailTransport',
+    Notification.CHANNEL_SMS: 'core.notifications.FileSMSTransport',
+}
+
+# Поля записи, необходимые для формирования сообщений
+APPOINTMENT_FIELDS = ('id', 'name', 'phone', 'email', 'date', 'doctor__name')
+
+# Уведомление в статусе «Отправляется» дольше этого времени считается брошенным
+STALE_SENDING = timedelta(hours=1)
+
+MAX_ATTEMPTS = 3
+
+
+class DeliveryError(Exception):
+    """Часть уведомлений не отправлена; задача рассылки повторяется очередью задач."""
+
+SUBJECTS = {
+    Notification.KIND_CONFIRMATION: 'Запись на прием принята',
+    Notification.KIND_REMINDER: 'Напоминание о приеме',
+}
+
+BODIES = {
+    Notification.KIND_CONFIRMATION: (
+        '{name}, ваша заявка на прием к врачу {doctor} на {date} принята. '
+        'Мы свяжемся с вами для подтверждения.'
+    ),
+    Notification.KIND_REMINDER: (
+        '{name}, напоминаем о приеме у врача {doctor} {date}. '
+        'Если вы не можете прийти, пожалуйста, сообщите нам.'
+    ),
+}
+
+
+@dataclass
+class OutgoingMessage:
+    """
+    Сообщение, подготовленное к отправке транспортом.
+
+    Attributes:
+        notification_id (int): ID записи Notification
+        to (str): Адрес получателя (email или телефон)
+        subject (str): Тема сообщения
+        body (str): Текст сообщения
+    """
+
+    notification_id: int
+    to: str
+    subject: str
+    body: str
+
+
+class BaseTransport:
+    """
+    Базовый класс транспорта доставки уведомлений.
+
+    Транспорт открывается один раз на пакет сообщений, что позволяет
+    переиспользовать соединение (например, SMTP) для всего пакета.
+
+    Attributes:
+        channel (str): Канал доставки из Notification.CHANNEL_CHOICES
+    """
+
+    channel = None
+
+    def address(self, appointment):
+        """Адрес получателя для записи или None, если канал недоступен."""
+        raise NotImplementedError
+
+    def open(self):
+        """Открывает соединение перед отправкой пакета."""
+
+    def close(self):
+        """Закрывает соединение после отправки пакета."""
+
+    def send(self, message):
+        """Отправляет одно сообщение, при ошибке выбрасывает исключение."""
+        raise NotImplementedError
+
+    def send_batch(self, messages):
+        """
+        Отправляет пакет сообщений через одно соединение.
+
+        Args:
+            messages: Список OutgoingMessage
+
+        Returns:
+            tuple[list, dict]: ID отправленных уведомлений и ошибки по ID
+        """
+        sent, failed = [], {}
+        self.open()
+        try:
+            for message in messages:
+                try:
+                    self.send(message)
+                except Exception as exc:
+                    logger.warning('Не удалось отправить уведомление #%s: %s', message.notification_id, exc)
+                    failed[message.notification_id] = str(exc)
+                else:
+                    sent.append(message.notification_id)
+        finally:
+            self.close()
+        return sent, failed
+
+
+class EmailTransport(BaseTransport):
+    """Доставка по email через настроенный EMAIL_BACKEND."""
+
+    channel = Notification.CHANNEL_EMAIL
+
+    def __init__(self):
+        self.connection = None
+
+    def address(self, appointment):
+        return appointment['email'] or None
+
+    def open(self):
+        self.connection = get_connection(fail_silently=False)
+        self.connection.open()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def send(self, message):
+        EmailMessage(
+            subject=message.subject,
+            body=message.body,
+            to=[message.to],
+            connection=self.connection,
+        ).send()
+
+
+class SMSTransport(BaseTransport):
+    """Интерфейс SMS-транспорта. Подклассы реализуют send() для шлюза."""
+
+    channel = Notification.CHANNEL_SMS
+
+    def address(self, appointment):
+        return appointment['phone'] or None
+
+
+class FileSMSTransport(SMSTransport):
+    """
+    Заглушка SMS-шлюза: дописывает сообщения в локальный файл.
+
+    Путь к файлу задается параметром SMS_OUTBOX_FILE.
+    """
+
+    def __init__(self):
+        self.path = Path(getattr(settings, 'SMS_OUTBOX_FILE', settings.BASE_DIR / 'var' / 'sms_outbox.log'))
+        self.file = None
+
+    def open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = self.path.open('a', encoding='utf-8')
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def send(self, message):
+        self.file.write(f'{timezone.now().isoformat()}\t{message.to}\t{message.body}\n')
+
+
+def get_transports():
+    """Создает экземпляры всех настроенных транспортов."""
+    paths = getattr(settings, 'NOTIFICATION_TRANSPORTS', DEFAULT_TRANSPORTS)
+    return [import_string(path)() for path in paths.values()]
+
+
+def build_message(notification_id, kind, to, appointment):
+    """Формирует текст уведомления для записи на прием."""
+    context = {
+        'name': appointment['name'],
+        'doctor': appointment['doctor__name'],
+        'date': appointment['date'].strftime('%d.%m.%Y'),
+    }
+    return OutgoingMessage(
+        notification_id=notification_id,
+        to=to,
+        subject=SUBJECTS[kind],
+        body=BODIES[kind].format(**context),
+    )
+
+
+def deliver(kind, appointment_ids, transports=None):
+    """
+    Отправляет уведомления типа kind для пакета записей на прием.
+
+    Для каждого канала создаются недостающие строки Notification
+    (конфликты по уникальному ключу игнорируются), затем пакет
+    захватывается условным обновлением и отправляется через одно
+    соединение транспорта. Уже отправленные уведомления пропускаются.
+    При ошибке транспорта захваченный пакет получает статус «Ошибка
+    отправки», и повторный вызов отправит его снова (до MAX_ATTEMPTS).
+
+    Args:
+        kind: Тип уведомления из Notification.KIND_CHOICES
+        appointment_ids: ID записей на прием
+        transports: Транспорты (по умолчанию из настроек)
+
+    Returns:
+        dict: Количество отправленных и неудачных сообщений
+    """
+    stats = {'sent': 0, 'failed': 0}
+    appointments = {
+        row['id']: row
+        for row in Appointment.objects.filter(pk__in=appointment_ids).values(*APPOINTMENT_FIELDS)
+    }
+    if not appointments:
+        return stats
+
+    for transport in transports if transports is not None else get_transports():
+        channel = transport.channel
+        addresses = {
+            pk: transport.address(row) for pk, row in appointments.items()
+        }
+        addresses = {pk: address for pk, address in addresses.items() if address}
+        if not addresses:
+            continue
+
+        Notification.objects.bulk_create(
+            [Notification(appointment_id=pk, kind=kind, channel=channel) for pk in addresses],
+            ignore_conflicts=True,
+        )
+
+        # Захват пакета: другой процесс рассылки не получит те же строки
+        batch = uuid.uuid4().hex
+        now = timezone.now()
+        Notification.objects.filter(
+            Q(status__in=[Notification.STATUS_PENDING, Notification.STATUS_FAILED], attempts__lt=MAX_ATTEMPTS)
+            | Q(status=Notification.STATUS_SENDING, claimed_at__lt=now - STALE_SENDING),
+            appointment_id__in=list(addresses),
+            kind=kind,
+            channel=channel,
+        ).update(
+            status=Notification.STATUS_SENDING, batch=batch, claimed_at=now, attempts=F('attempts') + 1
+        )
+
+        claimed = Notification.objects.filter(batch=batch, status=Notification.STATUS_SENDING)
+        messages = [
+            build_message(notification_id, kind, addresses[appointment_id], appointments[appointment_id])
+            for notification_id, appointment_id in claimed.values_list('id', 'appointment_id')
+        ]
+        if not messages:
+            continue
+
+        try:
+            sent, failed = transport.send_batch(messages)
+        except Exception as exc:
+            # Ошибка открытия соединения или отправки: пакет не должен остаться
+            # в статусе «Отправляется» до истечения STALE_SENDING
+            logger.exception('Транспорт %s не отправил пакет уведомлений', channel)
+            claimed.update(status=Notification.STATUS_FAILED, error=str(exc), batch='')
+            stats['failed'] += len(messages)
+            continue
+
+        if sent:
+            Notification.objects.filter(pk__in=sent).update(
+                status=Notification.STATUS_SENT, sent_at=timezone.now(), error='', batch=''
+            )
+        # Одно обновление на текст ошибки, а не на каждое уведомление
+        by_error = defaultdict(list)
+        for notification_id, error in failed.items():
+            by_error[error].append(notification_id)
+        for error, notification_ids in by_error.items():
+            Notification.objects.filter(pk__in=notification_ids).update(
+                status=Notification.STATUS_FAILED, error=error, batch=''
+            )
+        stats['sent'] += len(sent)
+        stats['failed'] += len(failed)
+
+    return stats
+
+
+def upcoming_appointment_ids(target_date, chunk_size=1000):
+    """
+    Перебирает ID записей на дату target_date пакетами.
+
+    Используется индекс (date, status), пагинация выполняется по
+    первичному ключу без OFFSET.
+
+    Args:
+        target_date: Дата приема
+        chunk_size: Размер пакета
+
+    Yields:
+        list[int]: ID записей очередного пакета
+    """
+    queryset = Appointment.objects.filter(
+        date=target_date, status__in=['pending', 'confirmed']
+    ).order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def send_reminders(target_date, chunk_size=None):
+    """
+    Рассылает напоминания о приемах на дату target_date.
+
+    Базы филиалов (core.branches) обрабатываются параллельно, каждая
+    со своими соединениями транспортов.
+
+    Args:
+        target_date: Дата приема
+        chunk_size: Размер пакета (по умолчанию NOTIFICATION_CHUNK_SIZE)
+
+    Returns:
+        dict: Количество отправленных и неудачных сообщений
+    """
+    chunk_size = chunk_size or getattr(settings, 'NOTIFICATION_CHUNK_SIZE', 1000)
+
+    def send(database):
+        transports = get_transports()
+        totals = {'sent': 0, 'failed': 0}
+        for chunk in upcoming_appointment_ids(target_date, chunk_size):
+            stats = deliver(Notification.KIND_REMINDER, chunk, transports)
+            totals['sent'] += stats['sent']
+            totals['failed'] += stats['failed']
+        return totals
+
+    results = scatter(send)
+    return {key: sum(stats[key] for stats in results) for key in ('sent', 'failed')}
@@ -0,0 +1,156 @@
+"""
+Удаление врачей и пациентов с зависимыми данными короткими пакетами.
+
+Удаление врача в админке каскадно затрагивает все его приемы, отзывы
+и медицинские записи. Одна транзакция на все строки блокирует SQLite
+надолго, а сборщик Django заранее загружает все связанные объекты
+в память. Поэтому строка сначала помечается на удаление
+(SoftDeleteModel.soft_delete), а фоновая задача удаляет зависимые
+данные от листьев к корню пакетами по PURGE_BATCH_SIZE строк, каждый
+в своей транзакции. Сама строка удаляется последней, когда каскаду
+уже нечего собирать.
+
+Зависимые данные врача лежат в базе его филиала, данные пациента -
+в базе, где хранится сам пациент (core.branches).
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .branches import doctor_database
+from .models import Appointment, Doctor, MedicalRecord, Notification, Patient, Testimonial, WaitlistEntry
+
+
+logger = logging.getLogger(__name__)
+
+
+def dependents_database(instance):
+    """База с зависимыми данными врача (база филиала) или пациента."""
+    if isinstance(instance, Doctor):
+        return doctor_database(instance)
+    return instance._state.db or 'default'
+
+
+def dependents(instance):
+    """
+    Зависимые строки в порядке удаления (сначала листья каскада).
+
+    Args:
+        instance: Врач или пациент
+
+    Returns:
+        list: Наборы QuerySet зависимых моделей
+    """
+    database = dependents_database(instance)
+    if isinstance(instance, Doctor):
+        return [
+            MedicalRecord.objects.using(database).filter(
+                Q(doctor_id=instance.pk) | Q(appointment__doctor_id=instance.pk)
+            ),
+            Notification.objects.using(database).filter(appointment__doctor_id=instance.pk),
+            WaitlistEntry.objects.using(database).filter(doctor_id=instance.pk),
+            Appointment.objects.using(database).filter(doctor_id=instance.pk),
+            Testimonial.objects.using(database).filter(doctor_id=instance.pk),
+        ]
+    if isinstance(instance, Patient):
+        return [
+            MedicalRecord.objects.using(database).filter(
+                Q(patient_id=instance.pk) | Q(appointment__patient_id=instance.pk)
+            ),
+            Notification.objects.using(database).filter(appointment__patient_id=instance.pk),
+            Appointment.objects.using(database).filter(patient_id=instance.pk),
+        ]
+    raise TypeError(f'Пакетное удаление не поддерживается для {type(instance).__name__}')
+
+
+def estimate_dependents(instances):
+    """
+    Количество зависимых строк для страницы подтверждения удаления.
+
+    Один запрос COUNT по индексу внешнего ключа на модель вместо
+    загрузки всех связанных объектов. Число оценочное: до фонового
+    удаления могут появиться новые строки.
+
+    Args:
+        instances: Удаляемые врачи или пациенты
+
+    Returns:
+        dict: Модель -> количество строк (только ненулевые)
+    """
+    counts = {}
+    for instance in instances:
+        for queryset in dependents(instance):
+            counts[queryset.model] = counts.get(queryset.model, 0) + queryset.count()
+    return {model: count for model, count in counts.items() if count}
+
+
+def purge(instance, batch_size=None, pause=None, progress=None):
+    """
+    Удаляет зависимые данные и саму строку пакетами.
+
+    Повторный запуск продолжает с того места, где остановился предыдущий.
+
+    Args:
+        instance: Врач или пациент (обычно уже помеченный на удаление)
+        batch_size: Строк в одной транзакции (по умолчанию PURGE_BATCH_SIZE)
+        pause: Пауза между пакетами в секундах (по умолчанию PURGE_PAUSE)
+        progress: Функция progress(model, deleted), вызываемая после каждого пакета
+
+    Returns:
+        dict: Модель -> количество удаленных строк
+    """
+    batch_size = batch_size or getattr(settings, 'PURGE_BATCH_SIZE', 500)
+    if pause is None:
+        pause = getattr(settings, 'PURGE_PAUSE', 0.05)
+    deleted = {}
+
+    for queryset in dependents(instance):
+        model = queryset.model
+        while True:
+            with transaction.atomic(using=queryset.db):
+                ids = list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                # Каскад от пакета (связи с услугами, уведомления) ограничен размером пакета
+                model.objects.using(queryset.db).filter(pk__in=ids).delete()
+            deleted[model] = deleted.get(model, 0) + len(ids)
+            if progress:
+                progress(model, deleted[model])
+            if pause:
+                time.sleep(pause)
+
+    database = instance._state.db or 'default'
+    with transaction.atomic(using=database):
+        type(instance).all_objects.using(database).filter(pk=instance.pk).delete()
+    deleted[type(instance)] = 1
+    return deleted
+
+
+def purge_deleted(model_label, pk, database='default'):
+    """
+    Удаляет помеченную на удаление строку по метке модели.
+
+    Ничего не делает, если строка уже удалена или пометка снята.
+
+    Args:
+        model_label: ``core.doctor`` или ``core.patient``
+        pk: ID строки
+        database: База, в которой хранится строка
+
+    Returns:
+        int: Количество удаленных зависимых строк
+    """
+    model = {'core.doctor': Doctor, 'core.patient': Patient}[model_label]
+    instance = model.all_objects.using(database).filter(pk=pk, deleted_at__isnull=False).first()
+    if instance is None:
+        return 0
+
+    def report(dependent, count):
+        logger.info('Удаление %s #%s: %s - %s', model_label, pk, dependent._meta.verbose_name_plural, count)
+
+    deleted = purge(instance, progress=report)
+    return sum(deleted.values()) - 1
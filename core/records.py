@@ -0,0 +1,143 @@
+"""
+Создание медицинских записей одной транзакцией.
+
+Записи для одного или нескольких приемов создаются пакетом
+с постоянным числом запросов независимо от размера пакета: блокировка
+приемов, проверка дубликатов, вставка записей и вставка связей
+с услугами в промежуточную таблицу. Транзакция открывается в базе
+филиала врача (core.branches).
+"""
+
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from .branches import doctor_database, use_database
+from .models import Appointment, MedicalRecord
+
+
+@dataclass
+class RecordDraft:
+    """
+    Данные новой медицинской записи.
+
+    Attributes:
+        appointment_id (int): ID записи на прием
+        diagnosis (str): Диагноз
+        treatment (str): Лечение
+        recommendations (str): Рекомендации
+        service_ids (list): ID оказанных услуг
+    """
+
+    appointment_id: int
+    diagnosis: str
+    treatment: str
+    recommendations: str = ''
+    service_ids: list = field(default_factory=list)
+
+    @classmethod
+    def from_form(cls, appointment_id, form):
+        """Черновик из проверенной MedicalRecordForm."""
+        data = form.cleaned_data
+        return cls(
+            appointment_id=appointment_id,
+            diagnosis=data['diagnosis'],
+            treatment=data['treatment'],
+            recommendations=data.get('recommendations', ''),
+            service_ids=[service.pk for service in data.get('services', [])],
+        )
+
+
+@dataclass
+class RecordBatchResult:
+    """
+    Результат пакетного создания записей.
+
+    Attributes:
+        created (list): Созданные медицинские записи
+        duplicates (list): Черновики, пропущенные как дубликаты за сегодня
+    """
+
+    created: list = field(default_factory=list)
+    duplicates: list = field(default_factory=list)
+
+
+def create_medical_records(doctor_id, drafts):
+    """
+    Создает медицинские записи для приемов врача одной транзакцией.
+
+    Пациент и врач берутся из записи на прием. Черновик пропускается,
+    если за сегодня у приема уже есть запись с тем же отпечатком
+    диагноза (в том числе среди черновиков этого же пакета). Приемы
+    блокируются до проверки дубликатов, поэтому параллельные запросы
+    не создадут одинаковых записей.
+
+    Args:
+        doctor_id: ID врача; приемы других врачей отклоняются
+        drafts: Черновики RecordDraft
+
+    Returns:
+        RecordBatchResult: Созданные записи и пропущенные дубликаты
+
+    Raises:
+        Appointment.DoesNotExist: Прием не найден или принадлежит другому врачу
+    """
+    result = RecordBatchResult()
+    if not drafts:
+        return result
+
+    today_start = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    fingerprints = [MedicalRecord.make_fingerprint(draft.diagnosis) for draft in drafts]
+    appointment_ids = {draft.appointment_id for draft in drafts}
+
+    database = doctor_database(doctor_id)
+    with use_database(database), transaction.atomic(using=database):
+        appointments = {
+            appointment.id: appointment
+            for appointment in Appointment.objects.select_for_update()
+            .filter(id__in=appointment_ids, doctor_id=doctor_id)
+            .only('id', 'doctor_id', 'patient_id')
+        }
+        if len(appointments) != len(appointment_ids):
+            raise Appointment.DoesNotExist('Запись на прием не найдена')
+
+        seen = set(
+            MedicalRecord.objects.filter(
+                appointment_id__in=appointment_ids,
+                fingerprint__in=set(fingerprints),
+                created_at__gte=today_start,
+            ).values_list('appointment_id', 'fingerprint')
+        )
+
+        records, services = [], []
+        for draft, fingerprint in zip(drafts, fingerprints):
+            key = (draft.appointment_id, fingerprint)
+            if key in seen:
+                result.duplicates.append(draft)
+                continue
+            seen.add(key)
+            appointment = appointments[draft.appointment_id]
+            # bulk_create не вызывает save(), поэтому отпечаток задается явно
+            records.append(MedicalRecord(
+                appointment_id=appointment.id,
+                doctor_id=appointment.doctor_id,
+                patient_id=appointment.patient_id,
+                diagnosis=draft.diagnosis,
+                treatment=draft.treatment,
+                recommendations=draft.recommendations,
+                fingerprint=fingerprint,
+            ))
+            services.append(draft.service_ids)
+
+        # SQLite 3.35+ и PostgreSQL возвращают первичные ключи из bulk_create
+        MedicalRecord.objects.bulk_create(records)
+        Through = MedicalRecord.services.through
+        Through.objects.bulk_create(
+            Through(medicalrecord_id=record.pk, service_id=service_id)
+            for record, service_ids in zip(records, services)
+            for service_id in service_ids
+        )
+
+    result.created = records
+    return result
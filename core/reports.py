@@ -0,0 +1,335 @@
+"""
+Ежемесячные отчеты по врачам.
+
+Отчет врача за месяц содержит записи на прием по статусам, услуги,
+оказанные по медицинским записям (MedicalRecord.services), и долю
+хороших и плохих отзывов. Данные отчета собираются несколькими
+агрегирующими запросами в базе филиала врача (core.branches) без
+перебора отдельных записей.
+
+Отчеты строит команда ``manage.py build_reports``: врачи распределяются
+по пулу процессов, каждый процесс сохраняет отчет в файл каталога
+месяца ``REPORTS_ROOT/ГГГГ-ММ/``. Готовые файлы раздаются с диска
+(views.doctor_report).
+
+Перед сборкой для всех врачей одной группировкой на модель считается
+отпечаток входных данных: количества и максимальные ID строк месяца.
+Отпечатки сохраняются в manifest.json каталога месяца, и повторный
+запуск пропускает врачей, у которых отпечаток не изменился.
+"""
+
+import csv
+import datetime
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Max, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .branches import doctor_database, scatter
+from .models import Appointment, Doctor, MedicalRecord, Service, Testimonial
+
+
+logger = logging.getLogger(__name__)
+
+# Меняется при изменении содержимого или оформления отчета: все отчеты собираются заново
+REPORT_VERSION = 1
+
+FORMATS = ('html', 'csv')
+
+MANIFEST_NAME = 'manifest.json'
+
+STATUSES = [key for key, _ in Appointment.STATUS_CHOICES]
+
+
+def reports_root():
+    """Каталог отчетов."""
+    return Path(getattr(settings, 'REPORTS_ROOT', settings.BASE_DIR / 'var' / 'reports'))
+
+
+def parse_month(value):
+    """
+    Первый день месяца из строки ГГГГ-ММ.
+
+    Raises:
+        ValueError: Строка не в формате ГГГГ-ММ
+    """
+    return datetime.datetime.strptime(value, '%Y-%m').date()
+
+
+def previous_month(today=None):
+    """Первый день прошедшего месяца: отчеты строятся за завершенные месяцы."""
+    today = today or timezone.localdate()
+    return (today.replace(day=1) - datetime.timedelta(days=1)).replace(day=1)
+
+
+def month_bounds(month):
+    """
+    Границы месяца для дат и моментов времени.
+
+    Args:
+        month: Первый день месяца
+
+    Returns:
+        tuple: (первый день, первый день следующего месяца,
+        начало месяца, начало следующего месяца в текущем часовом поясе)
+    """
+    end = (month + datetime.timedelta(days=32)).replace(day=1)
+    start_at, end_at = (
+        timezone.make_aware(datetime.datetime.combine(day, datetime.time.min)) for day in (month, end)
+    )
+    return month, end, start_at, end_at
+
+
+def report_name(doctor_id, fmt):
+    """Имя файла отчета врача."""
+    return f'doctor-{doctor_id}.{fmt}'
+
+
+def report_path(month, doctor_id, fmt):
+    """Путь файла отчета врача за месяц."""
+    return reports_root() / month.strftime('%Y-%m') / report_name(doctor_id, fmt)
+
+
+def _month_querysets(month):
+    """Строки месяца, от которых зависят отчеты."""
+    start, end, start_at, end_at = month_bounds(month)
+    return (
+        Appointment.objects.filter(date__gte=start, date__lt=end),
+        MedicalRecord.services.through.objects.filter(
+            medicalrecord__created_at__gte=start_at, medicalrecord__created_at__lt=end_at,
+        ),
+        Testimonial.objects.filter(created_at__gte=start_at, created_at__lt=end_at, is_approved=True),
+    )
+
+
+def input_signatures(month, fmt):
+    """
+    Отпечатки входных данных отчетов всех врачей за месяц.
+
+    Три запроса GROUP BY по врачу в каждой базе филиала: количества
+    записей по статусам, связей с услугами и отзывов вместе
+    с максимальными ID (новая строка взамен удаленной меняет максимум).
+
+    Args:
+        month: Первый день месяца
+        fmt: Формат отчета
+
+    Returns:
+        dict: ID врача -> отпечаток
+    """
+    appointments, services, testimonials = _month_querysets(month)
+
+    def collect(database):
+        rows = {}
+        status_counts = {status: Count('id', filter=Q(status=status)) for status in STATUSES}
+        for row in appointments.using(database).values('doctor_id').annotate(
+            last=Max('id'), **status_counts,
+        ).order_by():
+            rows.setdefault(row.pop('doctor_id'), {})['appointments'] = row
+        for row in services.using(database).values('medicalrecord__doctor_id').annotate(
+            count=Count('id'), last=Max('id'),
+        ).order_by():
+            rows.setdefault(row.pop('medicalrecord__doctor_id'), {})['services'] = row
+        for row in testimonials.using(database).values('doctor_id').annotate(
+            count=Count('id'), good=Count('id', filter=Q(rating='good')), last=Max('id'),
+        ).order_by():
+            rows.setdefault(row.pop('doctor_id'), {})['testimonials'] = row
+        return rows
+
+    inputs = {}
+    for rows in scatter(collect):
+        inputs.update(rows)
+    # Названия услуг и данные врача тоже попадают в отчет
+    catalog = list(Service.objects.order_by('pk').values_list('pk', 'title'))
+    signatures = {}
+    for doctor_id, name, specialization in Doctor.objects.order_by('pk').values_list('pk', 'name', 'specialization'):
+        data = [REPORT_VERSION, fmt, name, specialization, catalog, inputs.get(doctor_id, {})]
+        encoded = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode()
+        signatures[doctor_id] = hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    return signatures
+
+
+def doctor_report(doctor, month):
+    """
+    Данные отчета врача за месяц: три агрегирующих запроса.
+
+    Args:
+        doctor: Врач
+        month: Первый день месяца
+
+    Returns:
+        dict: Записи по статусам, услуги и отзывы
+    """
+    appointments, services, testimonials = _month_querysets(month)
+    database = doctor_database(doctor)
+
+    by_status = dict(
+        appointments.using(database).filter(doctor_id=doctor.pk)
+        .values_list('status').annotate(count=Count('id')).order_by()
+    )
+    service_rows = list(
+        services.using(database).filter(medicalrecord__doctor_id=doctor.pk)
+        .values_list('service__title').annotate(count=Count('id')).order_by('-count', 'service__title')
+    )
+    feedback = testimonials.using(database).filter(doctor_id=doctor.pk).aggregate(
+        good=Count('id', filter=Q(rating='good')), bad=Count('id', filter=Q(rating='bad')),
+    )
+
+    total_feedback = feedback['good'] + feedback['bad']
+    return {
+        'doctor': doctor,
+        'month': month,
+        'statuses': [(label, by_status.get(key, 0)) for key, label in Appointment.STATUS_CHOICES],
+        'appointments_total': sum(by_status.values()),
+        'services': service_rows,
+        'services_total': sum(count for _, count in service_rows),
+        'good': feedback['good'],
+        'bad': feedback['bad'],
+        'good_share': round(feedback['good'] * 100 / total_feedback) if total_feedback else None,
+        'generated_at': timezone.localtime(),
+    }
+
+
+def _write_csv(path, report):
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(['Раздел', 'Показатель', 'Значение'])
+        writer.writerow(['Врач', report['doctor'].name, report['doctor'].specialization])
+        writer.writerow(['Месяц', report['month'].strftime('%Y-%m'), ''])
+        for label, count in report['statuses']:
+            writer.writerow(['Записи на прием', label, count])
+        writer.writerow(['Записи на прием', 'Всего', report['appointments_total']])
+        for title, count in report['services']:
+            writer.writerow(['Услуги', title, count])
+        writer.writerow(['Отзывы', 'Хорошо', report['good']])
+        writer.writerow(['Отзывы', 'Плохо', report['bad']])
+        writer.writerow(['Отзывы', 'Доля хороших, %', '' if report['good_share'] is None else report['good_share']])
+
+
+def render_report(report, path, fmt):
+    """
+    Сохраняет отчет в файл.
+
+    Файл пишется во временный и заменяется целиком, поэтому раздача
+    с диска не увидит частично записанный отчет.
+
+    Args:
+        report: Данные отчета (doctor_report)
+        path: Путь файла
+        fmt: ``html`` или ``csv``
+    """
+    temporary = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    if fmt == 'csv':
+        _write_csv(temporary, report)
+    else:
+        temporary.write_text(render_to_string('core/doctor_report.html', report), encoding='utf-8')
+    os.replace(temporary, path)
+
+
+def build_doctor_report(doctor_id, month, fmt):
+    """
+    Строит и сохраняет отчет одного врача (выполняется в процессе пула).
+
+    Args:
+        doctor_id: ID врача
+        month: Первый день месяца
+        fmt: Формат отчета
+
+    Returns:
+        str: Имя файла отчета
+    """
+    report = doctor_report(Doctor.objects.get(pk=doctor_id), month)
+    path = report_path(month, doctor_id, fmt)
+    render_report(report, path, fmt)
+    return path.name
+
+
+def _init_worker():
+    """Процесс пула: настройка Django при запуске через spawn и собственные соединения."""
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def load_manifest(directory):
+    """Отпечатки уже построенных отчетов каталога месяца: имя файла -> запись."""
+    try:
+        with open(directory / MANIFEST_NAME, encoding='utf-8') as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(directory, manifest):
+    temporary = directory / f'.{MANIFEST_NAME}.tmp'
+    temporary.write_text(json.dumps(manifest, ensure_ascii=False, indent=1, sort_keys=True), encoding='utf-8')
+    os.replace(temporary, directory / MANIFEST_NAME)
+
+
+def build_reports(month, fmt='html', workers=None, force=False, progress=None):
+    """
+    Строит отчеты всех врачей за месяц, пропуская неизмененные.
+
+    Args:
+        month: Первый день месяца
+        fmt: ``html`` или ``csv``
+        workers: Количество процессов (по умолчанию REPORT_WORKERS или число ядер)
+        force: Строить заново все отчеты
+        progress: Функция progress(doctor_id, result), вызываемая после каждого врача
+
+    Returns:
+        dict: Количество построенных, пропущенных и неудачных отчетов
+    """
+    workers = workers or getattr(settings, 'REPORT_WORKERS', None) or os.cpu_count() or 1
+    directory = reports_root() / month.strftime('%Y-%m')
+    directory.mkdir(parents=True, exist_ok=True)
+
+    signatures = input_signatures(month, fmt)
+    manifest = load_manifest(directory)
+    stale = [
+        doctor_id for doctor_id, signature in signatures.items()
+        if force
+        or manifest.get(report_name(doctor_id, fmt), {}).get('signature') != signature
+        or not (directory / report_name(doctor_id, fmt)).is_file()
+    ]
+    stats = {'built': 0, 'skipped': len(signatures) - len(stale), 'failed': 0}
+
+    def done(doctor_id, error=None):
+        name = report_name(doctor_id, fmt)
+        if error is None:
+            manifest[name] = {'signature': signatures[doctor_id], 'built_at': timezone.now().isoformat()}
+            stats['built'] += 1
+        else:
+            logger.error('Отчет врача #%s за %s не построен: %s', doctor_id, month.strftime('%Y-%m'), error)
+            stats['failed'] += 1
+        if progress:
+            progress(doctor_id, error)
+
+    if workers == 1 or len(stale) <= 1:
+        for doctor_id in stale:
+            try:
+                build_doctor_report(doctor_id, month, fmt)
+            except Exception as exc:
+                done(doctor_id, exc)
+            else:
+                done(doctor_id)
+    else:
+        # Соединения нельзя делить между процессами: пул открывает свои
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=min(workers, len(stale)), initializer=_init_worker) as pool:
+            futures = {pool.submit(build_doctor_report, doctor_id, month, fmt): doctor_id for doctor_id in stale}
+            for future in as_completed(futures):
+                done(futures[future], future.exception())
+
+    save_manifest(directory, manifest)
+    return stats
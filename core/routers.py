@@ -0,0 +1,129 @@
+"""
+Маршрутизация моделей по базам данных.
+
+Архивные модели (core.archive) хранятся в базе ARCHIVE_DATABASE. По
+умолчанию это основная база, и маршрутизатор ни на что не влияет;
+при отдельной базе архива ее таблицы создаются только в ней:
+``manage.py migrate --database archive``.
+
+Данные филиалов (core.branches) хранятся в базах BRANCH_DATABASES.
+Без настроенных баз филиалов BranchRouter тоже ни на что не влияет;
+в базе филиала создаются только таблицы данных филиалов, их архива
+и копии справочников: ``manage.py migrate --database branch_<код>``.
+Отдельная база архива с базами филиалов не используется.
+"""
+
+from django.conf import settings
+
+from .branches import branch_databases, current_database, doctor_database, is_sharded
+
+
+ARCHIVE_MODELS = {'archivedappointment', 'archivedmedicalrecord'}
+
+# Данные, которые хранятся в базе филиала врача (архив - вместе с горячими данными)
+BRANCH_MODELS = {
+    'appointment', 'medicalrecord', 'medicalrecord_services', 'notification', 'patient', 'testimonial',
+    'waitlistentry',
+} | ARCHIVE_MODELS
+# Справочники: изменяются в основной базе, копии есть в каждой базе филиала
+REPLICATED_MODELS = {'branch', 'doctor', 'service'}
+
+
+def archive_database():
+    """Имя подключения к базе архива."""
+    return getattr(settings, 'ARCHIVE_DATABASE', 'default')
+
+
+def is_archive_model(model):
+    """Архивная ли модель (класс или экземпляр)."""
+    return model._meta.app_label == 'core' and model._meta.model_name in ARCHIVE_MODELS
+
+
+class ArchiveRouter:
+    """Направляет архивные модели в базу ARCHIVE_DATABASE."""
+
+    def db_for_read(self, model, **hints):
+        if is_archive_model(model) and archive_database() != 'default':
+            return archive_database()
+        return None
+
+    def db_for_write(self, model, **hints):
+        if is_archive_model(model) and archive_database() != 'default':
+            return archive_database()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Связи между горячими и архивными моделями в разных базах невозможны
+        if is_archive_model(obj1) != is_archive_model(obj2) and archive_database() != 'default':
+            return False
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        archive = archive_database()
+        if archive == 'default':
+            return None
+        if app_label == 'core' and model_name in ARCHIVE_MODELS:
+            return db == archive
+        if db == archive:
+            return False
+        return None
+
+
+def is_branch_model(model):
+    """Хранится ли модель (класс или экземпляр) в базе филиала."""
+    return model._meta.app_label == 'core' and model._meta.model_name in BRANCH_MODELS
+
+
+def is_replicated_model(model):
+    """Есть ли у модели (класса или экземпляра) копии в базах филиалов."""
+    return model._meta.app_label == 'core' and model._meta.model_name in REPLICATED_MODELS
+
+
+class BranchRouter:
+    """Направляет данные филиалов в базы BRANCH_DATABASES (core.branches)."""
+
+    def _instance_database(self, instance):
+        """База данных филиала, к которой относится экземпляр-подсказка."""
+        if is_branch_model(instance) and instance._state.db:
+            return instance._state.db
+        if instance._meta.label_lower == 'core.doctor':
+            return doctor_database(instance)
+        doctor_id = getattr(instance, 'doctor_id', None)
+        if doctor_id is not None:
+            return doctor_database(doctor_id)
+        return current_database()
+
+    def db_for_read(self, model, **hints):
+        if not is_sharded() or not is_branch_model(model):
+            return None
+        instance = hints.get('instance')
+        if instance is not None:
+            return self._instance_database(instance)
+        return current_database()
+
+    def db_for_write(self, model, **hints):
+        if not is_sharded():
+            return None
+        if is_replicated_model(model):
+            # Копии в базах филиалов обновляются только из основной базы
+            return 'default'
+        if not is_branch_model(model):
+            return None
+        instance = hints.get('instance')
+        if instance is not None:
+            return self._instance_database(instance)
+        return current_database()
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not is_sharded():
+            return None
+        if is_replicated_model(obj1) or is_replicated_model(obj2):
+            return True
+        if is_branch_model(obj1) and is_branch_model(obj2):
+            return obj1._state.db == obj2._state.db
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db not in branch_databases():
+            return None
+        return app_label == 'core' and model_name in BRANCH_MODELS | REPLICATED_MODELS
@@ -0,0 +1,7 @@
+"""
+Движки сессий приложения Core.
+
+Каждый модуль пакета пригоден для настройки SESSION_ENGINE и отличается
+от стандартного движка Django только тем, что не записывает сессию,
+данные которой не изменились за время запроса.
+"""
@@ -0,0 +1,46 @@
+"""
+Общая логика движков сессий клиники.
+"""
+
+
+class SkipUnchangedSaveMixin:
+    """
+    Примесь к SessionStore, пропускающая запись неизмененной сессии.
+
+    Django помечает сессию измененной при любом присваивании, даже если
+    значение осталось прежним. Примесь запоминает сериализованный снимок
+    данных при загрузке и сохраняет сессию только при его изменении.
+    """
+
+    _loaded_snapshot = None
+
+    def _snapshot(self, data):
+        """Детерминированное представление данных сессии для сравнения."""
+        return self.serializer().dumps(data)
+
+    def _is_unchanged(self, must_create):
+        if must_create or self._session_key is None or self._loaded_snapshot is None:
+            return False
+        return self._snapshot(self._session) == self._loaded_snapshot
+
+    def load(self):
+        data = super().load()
+        self._loaded_snapshot = self._snapshot(data)
+        return data
+
+    async def aload(self):
+        data = await super().aload()
+        self._loaded_snapshot = self._snapshot(data)
+        return data
+
+    def save(self, must_create=False):
+        if self._is_unchanged(must_create):
+            return
+        super().save(must_create=must_create)
+        self._loaded_snapshot = self._snapshot(self._session)
+
+    async def asave(self, must_create=False):
+        if self._is_unchanged(must_create):
+            return
+        await super().asave(must_create=must_create)
+        self._loaded_snapshot = self._snapshot(self._session)
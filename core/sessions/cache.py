@@ -0,0 +1,11 @@
+"""
+Сессии в кэше SESSION_CACHE_ALIAS без обращений к базе данных.
+"""
+
+from django.contrib.sessions.backends.cache import SessionStore as BaseSessionStore
+
+from .base import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, BaseSessionStore):
+    """Хранилище сессий, не перезаписывающее неизмененные данные."""
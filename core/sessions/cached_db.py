@@ -0,0 +1,11 @@
+"""
+Сессии в кэше SESSION_CACHE_ALIAS с записью в базу данных для надежности.
+"""
+
+from django.contrib.sessions.backends.cached_db import SessionStore as BaseSessionStore
+
+from .base import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, BaseSessionStore):
+    """Хранилище сессий, не перезаписывающее неизмененные данные."""
@@ -0,0 +1,11 @@
+"""
+Сессии в базе данных (django_session).
+"""
+
+from django.contrib.sessions.backends.db import SessionStore as BaseSessionStore
+
+from .base import SkipUnchangedSaveMixin
+
+
+class SessionStore(SkipUnchangedSaveMixin, BaseSessionStore):
+    """Хранилище сессий, не перезаписывающее неизмененные данные."""
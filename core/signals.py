@@ -0,0 +1,113 @@
+"""
+Обработчики сигналов моделей приложения Core.
+
+Модуль подключается в CoreConfig.ready() и поддерживает в актуальном
+состоянии кэши, зависящие от данных моделей.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .branches import is_sharded, replicate, replicate_delete
+from .calendar import touch_calendar
+from .choices import bump_catalog_version
+from .identity import bump_doctor_version
+from .live import appointment_event, broker
+from .models import Appointment, Branch, Doctor, Service, Testimonial
+from .testimonials import bump_testimonials_version
+from .waitlist import promote
+
+
+@receiver(post_save, sender=Doctor, dispatch_uid='core_doctor_saved')
+@receiver(post_delete, sender=Doctor, dispatch_uid='core_doctor_deleted')
+def invalidate_doctor(sender, instance, using=None, **kwargs):
+    """Сбрасывает кэшированного врача, справочник врачей для форм и его ленту календаря."""
+    doctor_id = instance.pk
+    # После фиксации: иначе параллельный запрос закэширует прежние строки под новой версией
+    transaction.on_commit(lambda: bump_doctor_version(doctor_id), using=using)
+    transaction.on_commit(bump_catalog_version, using=using)
+    transaction.on_commit(lambda: touch_calendar(doctor_id), using=using)
+
+
+@receiver(post_save, sender=Branch, dispatch_uid='core_branch_replicated')
+@receiver(post_save, sender=Service, dispatch_uid='core_service_replicated')
+@receiver(post_save, sender=Doctor, dispatch_uid='core_doctor_replicated')
+def replicate_catalog(sender, instance, raw=False, using=None, **kwargs):
+    """Обновляет копии справочной строки в базах филиалов после фиксации транзакции."""
+    if raw or using != 'default' or not is_sharded():
+        return
+    transaction.on_commit(lambda: replicate(instance), using=using)
+
+
+@receiver(post_delete, sender=Branch, dispatch_uid='core_branch_replica_deleted')
+@receiver(post_delete, sender=Service, dispatch_uid='core_service_replica_deleted')
+@receiver(post_delete, sender=Doctor, dispatch_uid='core_doctor_replica_deleted')
+def delete_catalog_replicas(sender, instance, using=None, **kwargs):
+    """Удаляет копии справочной строки из баз филиалов после фиксации транзакции."""
+    if using != 'default' or not is_sharded():
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: replicate_delete(sender, pk), using=using)
+
+
+@receiver(post_save, sender=Appointment, dispatch_uid='core_appointment_live')
+def publish_appointment(sender, instance, created, raw=False, using=None, **kwargs):
+    """Рассылает изменение записи открытым кабинетам врача после фиксации транзакции."""
+    if raw or not broker.has_subscribers(instance.doctor_id):
+        return
+    event = appointment_event(instance, created)
+    transaction.on_commit(lambda: broker.publish(instance.doctor_id, event), using=using)
+
+
+@receiver(post_save, sender=Appointment, dispatch_uid='core_appointment_calendar_saved')
+@receiver(post_delete, sender=Appointment, dispatch_uid='core_appointment_calendar_deleted')
+def invalidate_calendar(sender, instance, raw=False, using=None, **kwargs):
+    """Отмечает изменение ленты календаря врача после фиксации транзакции."""
+    if raw:
+        return
+    doctor_id = instance.doctor_id
+    transaction.on_commit(lambda: touch_calendar(doctor_id), using=using)
+
+
+@receiver(post_save, sender=Appointment, dispatch_uid='core_appointment_waitlist')
+def promote_waitlist(sender, instance, raw=False, using=None, **kwargs):
+    """Отдает место отмененной записи первому из листа ожидания после фиксации транзакции."""
+    if raw or instance.status != 'cancelled':
+        return
+    # Ошибка записи из листа ожидания не должна ломать уже сохраненную отмену
+    transaction.on_commit(lambda: promote(instance), using=using, robust=True)
+
+
+def on_commit_once(func, using=None):
+    """
+    Как transaction.on_commit(), но не добавляет func повторно в ту же транзакцию.
+
+    Пакетное удаление или модерация списка вызывают сигнал для каждой
+    строки, а сбросить кэш после фиксации достаточно один раз.
+    Уже добавленный вызов переиспользуется, только если он не может
+    быть отменен откатом более вложенной точки сохранения.
+    """
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        savepoints = set(connection.savepoint_ids)
+        for registered_savepoints, registered, _ in connection.run_on_commit:
+            if registered is func and registered_savepoints <= savepoints:
+                return
+    transaction.on_commit(func, using=using)
+
+
+@receiver(post_save, sender=Testimonial, dispatch_uid='core_testimonial_saved')
+def invalidate_testimonials_on_save(sender, instance, created, raw=False, using=None, **kwargs):
+    """Сбрасывает кэш списка отзывов после фиксации; новые отзывы до модерации его не затрагивают."""
+    if raw or (created and not instance.is_approved):
+        return
+    # После фиксации: иначе параллельный запрос закэширует прежние строки под новой версией
+    on_commit_once(bump_testimonials_version, using=using)
+
+
+@receiver(post_delete, sender=Testimonial, dispatch_uid='core_testimonial_deleted')
+def invalidate_testimonials_on_delete(sender, instance, using=None, **kwargs):
+    """Сбрасывает кэш списка отзывов после фиксации удаления опубликованного отзыва."""
+    if instance.is_approved:
+        on_commit_once(bump_testimonials_version, using=using)
@@ -0,0 +1,65 @@
+"""
+Хранилище статики с хешами в именах и заранее сжатыми копиями.
+
+collectstatic сохраняет файлы под именами вида ``site.3f2a9c1b7e4d.css``
+(ManifestStaticFilesStorage) и рядом с текстовыми файлами кладет сжатые
+копии ``.gz`` и, если установлен пакет ``brotli``, ``.br``. Их отдает
+core.assets.serve_static или внешний веб-сервер (gzip_static в nginx)
+без сжатия на каждом запросе.
+"""
+
+import gzip
+import mimetypes
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+from .compression import brotli, is_compressible
+
+
+# Файлы меньше этого размера не выигрывают от сжатия
+PRECOMPRESS_MIN_SIZE = 256
+
+
+class PrecompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    ManifestStaticFilesStorage, создающее копии .gz и .br при collectstatic.
+
+    Без собранного манифеста (разработка, тесты) адреса строятся
+    по исходным именам файлов вместо ошибки ValueError.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Файла нет в STATIC_ROOT: collectstatic еще не запускался
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and not isinstance(processed, Exception) and hashed_name:
+                self._precompress(hashed_name)
+            yield name, hashed_name, processed
+
+    def _precompress(self, name):
+        content_type, encoding = mimetypes.guess_type(name)
+        if encoding or not is_compressible(content_type or ''):
+            return
+        with self.open(name) as source:
+            data = source.read()
+        if len(data) < PRECOMPRESS_MIN_SIZE:
+            return
+        # mtime=0: одинаковое содержимое дает одинаковый архив при каждой сборке
+        self._save_variant(name + '.gz', gzip.compress(data, compresslevel=9, mtime=0), len(data))
+        if brotli is not None:
+            self._save_variant(name + '.br', brotli.compress(data, quality=11), len(data))
+
+    def _save_variant(self, name, data, original_size):
+        if len(data) >= original_size:
+            return
+        if self.exists(name):
+            self.delete(name)
+        self._save(name, ContentFile(data))
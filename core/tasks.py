@@ -0,0 +1,81 @@
+"""
+Фоновые задачи приложения Core.
+
+Модуль автоматически импортируется командой ``manage.py run_workers``.
+Задачи ставятся в очередь из представлений методом ``enqueue()``.
+"""
+
+import datetime
+
+from django.utils import timezone
+
+from . import images, notifications, purge
+from .branches import use_database
+from .jobs import task
+from .models import Notification
+
+
+@task(queue='notifications', priority=10, max_attempts=5)
+def send_appointment_confirmation(appointment_id, database='default'):
+    """
+    Отправляет пациенту подтверждение новой записи на прием.
+
+    Args:
+        appointment_id: ID записи на прием
+        database: База филиала, в которой сохранена запись (core.branches)
+
+    Raises:
+        DeliveryError: Уведомление не отправлено; очередь повторит задачу
+    """
+    with use_database(database):
+        stats = notifications.deliver(Notification.KIND_CONFIRMATION, [appointment_id])
+    if stats['failed']:
+        # Повтор задачи повторно захватит уведомления со статусом «Ошибка отправки»
+        raise notifications.DeliveryError(f'Не отправлено уведомлений: {stats["failed"]}')
+
+
+@task(queue='notifications', max_attempts=3)
+def send_appointment_reminders(date=None, days_ahead=1):
+    """
+    Рассылает напоминания о приемах.
+
+    Args:
+        date: Дата приема в формате ISO (по умолчанию через days_ahead дней)
+        days_ahead: Через сколько дней прием, если дата не указана
+
+    Raises:
+        DeliveryError: Часть напоминаний не отправлена; очередь повторит задачу
+    """
+    if date:
+        target = datetime.date.fromisoformat(date)
+    else:
+        target = timezone.localdate() + datetime.timedelta(days=days_ahead)
+    stats = notifications.send_reminders(target)
+    if stats['failed']:
+        raise notifications.DeliveryError(f'Не отправлено напоминаний: {stats["failed"]}')
+    return stats
+
+
+@task(max_attempts=5)
+def purge_deleted(model_label, pk, database='default'):
+    """
+    Удаляет помеченного на удаление врача или пациента с зависимыми данными.
+
+    Args:
+        model_label: ``core.doctor`` или ``core.patient``
+        pk: ID строки
+        database: База, в которой хранится строка (пациенты - в базе филиала)
+    """
+    return purge.purge_deleted(model_label, pk, database)
+
+
+@task(max_attempts=3)
+def process_doctor_photo(doctor_id, source_name):
+    """
+    Создает уменьшенные копии загруженной фотографии врача.
+
+    Args:
+        doctor_id: ID врача
+        source_name: Имя файла исходной фотографии
+    """
+    return images.process_doctor_photo(doctor_id, source_name)
@@ -0,0 +1,23 @@
+"""
+Теги шаблонов для подключения сторонних библиотек.
+
+Пример использования::
+
+    {% load clinic_assets %}
+    <link href="{% asset_url 'bootstrap-css' %}" rel="stylesheet">
+
+Адрес указывает на локальную копию из static/vendor, если она скачана
+командой vendor_assets, иначе на CDN (core.assets.VENDOR_ASSETS).
+"""
+
+from django import template
+
+from core.assets import asset_url as resolve_asset_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def asset_url(name):
+    """Адрес сторонней библиотеки по ключу VENDOR_ASSETS."""
+    return resolve_asset_url(name)
@@ -0,0 +1,35 @@
+"""
+Теги шаблонов для обработки HTML.
+
+Пример использования::
+
+    {% load clinic_html %}
+    {% minify %}
+        ...разметка...
+    {% endminify %}
+
+Внутри {% cache %} кэшируется уже сжатая разметка, поэтому минификация
+выполняется один раз на время жизни фрагмента.
+"""
+
+from django import template
+
+from core.compression import minify_html
+
+register = template.Library()
+
+
+class MinifyNode(template.Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        return minify_html(self.nodelist.render(context))
+
+
+@register.tag
+def minify(parser, token):
+    """Сжимает пробелы в разметке между {% minify %} и {% endminify %} (HTML_MINIFY)."""
+    nodelist = parser.parse(('endminify',))
+    parser.delete_first_token()
+    return MinifyNode(nodelist)
@@ -0,0 +1,64 @@
+"""
+Теги шаблонов для адаптивных изображений.
+
+Пример использования::
+
+    {% load clinic_images %}
+    {% doctor_photo doctor sizes="(min-width: 768px) 33vw, 100vw" css_class="card-img-top" %}
+"""
+
+from django import template
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+DEFAULT_SIZES = '(min-width: 992px) 300px, (min-width: 768px) 33vw, 100vw'
+
+
+def _srcset(items):
+    return ', '.join(f'{default_storage.url(item["name"])} {item["width"]}w' for item in items)
+
+
+def _fallback(items):
+    """Копия для браузеров без srcset: ближайшая к DOCTOR_PHOTO_FALLBACK_WIDTH."""
+    target = getattr(settings, 'DOCTOR_PHOTO_FALLBACK_WIDTH', 320)
+    return min(items, key=lambda item: abs(item['width'] - target))
+
+
+@register.simple_tag
+def doctor_photo(doctor, sizes=DEFAULT_SIZES, css_class=''):
+    """
+    Разметка <picture> с копиями фотографии врача (core.images).
+
+    Атрибуты width и height задают пропорции заранее, поэтому загрузка
+    изображения не сдвигает карточки. Пока копии не созданы, выводится
+    заглушка тех же пропорций; исходная фотография не выводится никогда.
+
+    Args:
+        doctor: Врач
+        sizes: Значение атрибута sizes
+        css_class: CSS-классы изображения
+    """
+    sources = (doctor.photo_renditions or {}).get('sources') or {}
+    jpeg, webp = sources.get('jpeg'), sources.get('webp')
+    aspect_w, aspect_h = getattr(settings, 'DOCTOR_PHOTO_ASPECT', (4, 5))
+    if not jpeg:
+        return format_html(
+            '<div class="{} bg-light text-primary d-flex align-items-center justify-content-center" '
+            'style="aspect-ratio: {} / {}; font-size: 3rem;" role="img" aria-label="{}">{}</div>',
+            css_class, aspect_w, aspect_h, doctor.name, doctor.name[:1].upper(),
+        )
+
+    fallback = _fallback(jpeg)
+    webp_source = format_html(
+        '<source type="image/webp" srcset="{}" sizes="{}">', _srcset(webp), sizes
+    ) if webp else ''
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" '
+        'class="{}" style="height: auto;" loading="lazy" decoding="async"></picture>',
+        webp_source, default_storage.url(fallback['name']), _srcset(jpeg), sizes,
+        fallback['width'], fallback['height'], doctor.name, css_class,
+    )
@@ -0,0 +1,238 @@
+"""
+Публичный список отзывов: фильтры, курсорная пагинация и кэш.
+
+Страницы выбираются по индексам (is_approved, rating, created_at) и
+(is_approved, doctor, created_at) с курсором по отметке (created_at, id),
+поэтому глубокие страницы не требуют OFFSET. Количество отзывов по
+оценкам и врачам считается одним запросом GROUP BY и кэшируется;
+каждая страница кэшируется отдельно для своей комбинации фильтров.
+
+Все ключи содержат версию, которую увеличивают события модерации
+(сигналы Testimonial и действия админки). Новые отзывы до одобрения
+кэш не сбрасывают.
+
+Если у филиалов отдельные базы (core.branches), счетчики и страница
+запрашиваются в каждой базе параллельно: страницы баз сливаются
+по отметке, а счетчики суммируются.
+"""
+
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from .branches import gather, is_sharded, scatter
+from .choices import aget_doctor_catalog, get_doctor_catalog
+from .live import make_mark, parse_mark
+from .models import Testimonial
+
+
+VERSION_KEY = 'testimonials:version'
+FACETS_KEY_TEMPLATE = 'testimonials:facets:{}'
+PAGE_KEY_TEMPLATE = 'testimonials:page:{}:{}'
+
+RATING_LABELS = dict(Testimonial.RATING_CHOICES)
+RATING_STYLES = {
+    'good': ('success', 'fa-smile'),
+    'bad': ('danger', 'fa-frown'),
+}
+ROW_FIELDS = ('id', 'name', 'message', 'rating', 'created_at', 'doctor_id')
+
+
+def bump_testimonials_version():
+    """Сбрасывает кэш списка отзывов после модерации."""
+    cache.add(VERSION_KEY, 0, timeout=None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+def _timeout():
+    return getattr(settings, 'TESTIMONIALS_CACHE_TIMEOUT', 3600)
+
+
+def _page_size():
+    return getattr(settings, 'TESTIMONIALS_PAGE_SIZE', 10)
+
+
+class TestimonialFilters:
+    """
+    Проверенные параметры списка отзывов.
+
+    Некорректные значения отбрасываются, чтобы произвольные параметры
+    не порождали новые ключи кэша.
+
+    Attributes:
+        rating (str | None): Оценка из Testimonial.RATING_CHOICES
+        doctor (int | None): ID врача из справочника
+        cursor (str | None): Отметка последнего отзыва предыдущей страницы
+    """
+
+    def __init__(self, params, catalog):
+        rating = params.get('rating')
+        self.rating = rating if rating in RATING_LABELS else None
+        try:
+            doctor = int(params.get('doctor', ''))
+        except ValueError:
+            doctor = None
+        self.doctor = doctor if doctor in catalog else None
+        cursor = params.get('after')
+        self.cursor = cursor if parse_mark(cursor) else None
+
+    def cache_key(self, version):
+        raw = f'{self.rating}|{self.doctor}|{self.cursor}|{_page_size()}'
+        return PAGE_KEY_TEMPLATE.format(version, hashlib.md5(raw.encode()).hexdigest())
+
+    def queryset(self):
+        """Одобренные отзывы страницы: не больше page_size + 1 строк."""
+        queryset = Testimonial.objects.filter(is_approved=True)
+        if self.rating:
+            queryset = queryset.filter(rating=self.rating)
+        if self.doctor:
+            queryset = queryset.filter(doctor_id=self.doctor)
+        if self.cursor:
+            created_at, pk = parse_mark(self.cursor)
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        return queryset.order_by('-created_at', '-id').values_list(*ROW_FIELDS)[:_page_size() + 1]
+
+    def total(self, facets):
+        """Количество отзывов под фильтром по кэшированным счетчикам."""
+        if self.rating and self.doctor:
+            return facets['pairs'].get((self.doctor, self.rating), 0)
+        if self.rating:
+            return facets['ratings'].get(self.rating, 0)
+        if self.doctor:
+            return facets['doctors'].get(self.doctor, 0)
+        return facets['total']
+
+
+def _facets_queryset():
+    return (
+        Testimonial.objects.filter(is_approved=True)
+        .values_list('doctor_id', 'rating')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+
+
+def _gather_facets():
+    """Строки счетчиков из всех баз филиалов."""
+    return [row for rows in scatter(lambda database: list(_facets_queryset())) for row in rows]
+
+
+def _gather_page(filters):
+    """Строки страницы из всех баз филиалов, слитые по отметке (created_at, id)."""
+    return gather(filters.queryset(), key=lambda row: (row[4], row[0]), reverse=True)
+
+
+def _build_facets(pairs):
+    """Счетчики по оценкам, врачам и их парам из строк (doctor_id, rating, count)."""
+    facets = {'total': 0, 'ratings': {}, 'doctors': {}, 'pairs': {}}
+    for doctor_id, rating, count in pairs:
+        facets['total'] += count
+        facets['ratings'][rating] = facets['ratings'].get(rating, 0) + count
+        facets['doctors'][doctor_id] = facets['doctors'].get(doctor_id, 0) + count
+        facets['pairs'][(doctor_id, rating)] = facets['pairs'].get((doctor_id, rating), 0) + count
+    return facets
+
+
+def _build_page(rows):
+    """Строки страницы для шаблона и курсор следующей страницы."""
+    size = _page_size()
+    items = []
+    for pk, name, message, rating, created_at, doctor_id in rows[:size]:
+        css_class, icon = RATING_STYLES.get(rating, ('secondary', 'fa-comment'))
+        items.append({
+            'id': pk,
+            'name': name,
+            'message': message,
+            'rating': rating,
+            'rating_label': RATING_LABELS.get(rating, rating),
+            'rating_class': css_class,
+            'rating_icon': icon,
+            'created_at': created_at,
+            'doctor_id': doctor_id,
+        })
+    next_cursor = None
+    if len(rows) > size:
+        last = rows[size - 1]
+        next_cursor = make_mark(last[4], last[0])
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def _listing(filters, facets, page, catalog):
+    """Контекст шаблона списка отзывов."""
+    names = {pk: name for pk, name, _ in catalog.rows}
+    return {
+        'testimonials': [dict(item, doctor_name=names.get(item['doctor_id'], '')) for item in page['items']],
+        'next_cursor': page['next_cursor'],
+        'total': filters.total(facets),
+        'rating_filter': filters.rating or '',
+        'doctor_filter': filters.doctor,
+        'is_first_page': filters.cursor is None,
+        'rating_facets': [
+            (value, label, facets['ratings'].get(value, 0)) for value, label in Testimonial.RATING_CHOICES
+        ],
+        'doctor_facets': [
+            (pk, name, facets['doctors'][pk]) for pk, name, _ in catalog.rows if pk in facets['doctors']
+        ],
+    }
+
+
+def testimonials_listing(params):
+    """
+    Страница публичного списка отзывов.
+
+    Args:
+        params: Параметры запроса (rating, doctor, after)
+
+    Returns:
+        dict: Контекст шаблона core/testimonials.html
+    """
+    catalog = get_doctor_catalog()
+    filters = TestimonialFilters(params, catalog)
+    version = cache.get(VERSION_KEY, 0)
+    facets_key = FACETS_KEY_TEMPLATE.format(version)
+    page_key = filters.cache_key(version)
+    cached = cache.get_many([facets_key, page_key])
+
+    facets = cached.get(facets_key)
+    if facets is None:
+        facets = _build_facets(_gather_facets())
+        cache.set(facets_key, facets, _timeout())
+    page = cached.get(page_key)
+    if page is None:
+        page = _build_page(_gather_page(filters))
+        cache.set(page_key, page, _timeout())
+    return _listing(filters, facets, page, catalog)
+
+
+async def atestimonials_listing(params):
+    """Асинхронный вариант testimonials_listing()."""
+    catalog = await aget_doctor_catalog()
+    filters = TestimonialFilters(params, catalog)
+    version = await cache.aget(VERSION_KEY, 0)
+    facets_key = FACETS_KEY_TEMPLATE.format(version)
+    page_key = filters.cache_key(version)
+    cached = await cache.aget_many([facets_key, page_key])
+
+    facets = cached.get(facets_key)
+    if facets is None:
+        if is_sharded():
+            rows = await sync_to_async(_gather_facets)()
+        else:
+            rows = [row async for row in _facets_queryset()]
+        facets = _build_facets(rows)
+        await cache.aset(facets_key, facets, _timeout())
+    page = cached.get(page_key)
+    if page is None:
+        if is_sharded():
+            rows = await sync_to_async(_gather_page)(filters)
+        else:
+            rows = [row async for row in filters.queryset()]
+        page = _build_page(rows)
+        await cache.aset(page_key, page, _timeout())
+    return _listing(filters, facets, page, catalog)
@@ -1,3 +1,136 @@
+"""
+Тесты гарантий конкурентной обработки: лист ожидания и очередь задач.
+"""
+
+import datetime
+
 from django.test import TestCase
+from django.utils import timezone
+
+from . import jobs
+from .models import Appointment, Doctor, Job, WaitlistEntry
+from .waitlist import promote
+
+
+class WaitlistPromotionTests(TestCase):
+    """Запись из листа ожидания на место отмененного приема."""
+
+    def setUp(self):
+        self.doctor = Doctor.objects.create(name='Иванов', specialization='Терапевт', username='ivanov')
+        self.date = timezone.localdate() + datetime.timedelta(days=1)
+        self.appointment = Appointment.objects.create(
+            name='Пациент', phone='+79990000000', doctor=self.doctor, date=self.date,
+        )
+
+    def add_waiting(self, name, priority=0):
+        return WaitlistEntry.objects.create(
+            name=name, phone='+79990000001', doctor=self.doctor, date=self.date, priority=priority,
+        )
+
+    def cancel(self, appointment):
+        """Отменяет прием и выполняет обработчики после фиксации, как в рабочем режиме."""
+        appointment.status = 'cancelled'
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.save()
+
+    def promoted(self):
+        return WaitlistEntry.objects.filter(status=WaitlistEntry.STATUS_PROMOTED)
+
+    def test_cancellation_promotes_first_waiting_patient(self):
+        entry = self.add_waiting('Первый')
+        self.add_waiting('Второй')
+
+        self.cancel(self.appointment)
+
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, WaitlistEntry.STATUS_PROMOTED)
+        self.assertEqual(entry.freed_by_id, self.appointment.pk)
+        self.assertEqual(entry.appointment.date, self.date)
+        self.assertEqual(self.promoted().count(), 1)
+
+    def test_same_slot_promotes_exactly_one_entry(self):
+        self.add_waiting('Первый')
+        self.add_waiting('Второй')
+        self.cancel(self.appointment)
+
+        # Повторная обработка той же отмены (второй процесс) место не отдает
+        self.assertIsNone(promote(self.appointment))
+
+        self.assertEqual(self.promoted().count(), 1)
+        self.assertEqual(WaitlistEntry.objects.filter(status=WaitlistEntry.STATUS_WAITING).count(), 1)
+        self.assertEqual(Appointment.objects.filter(doctor=self.doctor).count(), 2)
+
+    def test_resaving_cancelled_appointment_does_not_promote_again(self):
+        self.add_waiting('Первый')
+        self.add_waiting('Второй')
+        self.cancel(self.appointment)
+
+        self.appointment.message = 'Отменена по телефону'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment.save()
+
+        self.assertEqual(self.promoted().count(), 1)
+        self.assertEqual(WaitlistEntry.objects.filter(status=WaitlistEntry.STATUS_WAITING).count(), 1)
+
+    def test_highest_priority_is_promoted_first(self):
+        regular = self.add_waiting('Обычный')
+        urgent = self.add_waiting('Срочный', priority=5)
+
+        self.cancel(self.appointment)
+
+        urgent.refresh_from_db()
+        regular.refresh_from_db()
+        self.assertEqual(urgent.status, WaitlistEntry.STATUS_PROMOTED)
+        self.assertEqual(regular.status, WaitlistEntry.STATUS_WAITING)
+
+    def test_empty_waitlist_promotes_nobody(self):
+        self.cancel(self.appointment)
+
+        self.assertFalse(self.promoted().exists())
+        self.assertEqual(Appointment.objects.filter(doctor=self.doctor).count(), 1)
+
+
+class JobQueueTests(TestCase):
+    """Захват задач обработчиками и возврат зависших задач в очередь."""
+
+    def create_job(self, **fields):
+        return Job.objects.create(task='core.tasks.purge_deleted', **fields)
+
+    def test_job_is_claimed_by_one_worker(self):
+        job = self.create_job()
+
+        first = jobs.claim_jobs('worker-1')
+        second = jobs.claim_jobs('worker-2')
+
+        self.assertEqual([claimed.pk for claimed in first], [job.pk])
+        self.assertEqual(second, [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.STATUS_RUNNING)
+        self.assertEqual(job.locked_by, 'worker-1')
+        self.assertEqual(job.attempts, 1)
+
+    def test_stale_running_job_is_requeued(self):
+        long_ago = timezone.now() - datetime.timedelta(minutes=10)
+        stale = self.create_job(
+            status=Job.STATUS_RUNNING, locked_by='worker-1', locked_at=long_ago, heartbeat_at=long_ago,
+        )
+
+        self.assertEqual(jobs.requeue_stale(60), 1)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.status, Job.STATUS_QUEUED)
+        self.assertEqual(stale.locked_by, '')
+        self.assertIsNone(stale.heartbeat_at)
+        self.assertEqual([claimed.pk for claimed in jobs.claim_jobs('worker-2')], [stale.pk])
+
+    def test_long_job_with_fresh_heartbeat_is_not_requeued(self):
+        long_ago = timezone.now() - datetime.timedelta(minutes=10)
+        running = self.create_job(
+            status=Job.STATUS_RUNNING, locked_by='worker-1', locked_at=long_ago, heartbeat_at=timezone.now(),
+        )
+
+        self.assertEqual(jobs.requeue_stale(60), 0)
 
-# Create your tests here.
+        running.refresh_from_db()
+        self.assertEqual(running.status, Job.STATUS_RUNNING)
+        self.assertEqual(running.locked_by, 'worker-1')
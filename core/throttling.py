@@ -0,0 +1,214 @@
+"""
+Ограничение частоты запросов (rate limiting).
+
+Модуль реализует приближенное скользящее окно на двух соседних
+фиксированных окнах: текущий счетчик складывается с долей предыдущего,
+пропорциональной перекрытию. Счетчики хранятся в настроенном кэше
+Django. Событие сначала учитывается атомарной операцией incr, и решение
+принимается по ее результату, поэтому параллельные запросы не проходят
+пачкой. incr атомарен в LocMemCache (в пределах процесса), Redis
+и Memcached; файловый кэш и кэш в базе выполняют его чтением и записью.
+
+Лимиты задаются параметром THROTTLE_RATES::
+
+    THROTTLE_RATES = {
+        'login_ip': (30, 300),       # 30 попыток за 5 минут с одного IP
+        'login_username': (5, 300),  # 5 попыток за 5 минут на один логин с любых адресов
+    }
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class SlidingWindowLimiter:
+    """
+    Ограничитель частоты событий в скользящем окне.
+
+    Attributes:
+        scope (str): Область ограничения (часть ключа кэша)
+        limit (int): Допустимое количество событий в окне
+        window (int): Длина окна в секундах
+    """
+
+    def __init__(self, scope, limit, window, cache_alias='default'):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.cache = caches[cache_alias]
+
+    def _key(self, ident, bucket):
+        digest = hashlib.md5(str(ident).encode()).hexdigest()
+        return f'throttle:{self.scope}:{digest}:{bucket}'
+
+    def _keys(self, ident, now):
+        """Ключи текущего и предыдущего окна."""
+        bucket = int(now // self.window)
+        return self._key(ident, bucket), self._key(ident, bucket - 1)
+
+    def _verdict(self, values, keys, now):
+        """Признак превышения и время ожидания по значениям счетчиков."""
+        current_key, previous_key = keys
+        elapsed = now % self.window
+        weight = 1 - elapsed / self.window
+        estimate = values.get(current_key, 0) + values.get(previous_key, 0) * weight
+        if estimate >= self.limit:
+            return True, max(1, math.ceil(self.window - elapsed))
+        return False, 0
+
+    def _incr(self, key):
+        """Атомарно увеличивает счетчик окна и возвращает новое значение."""
+        # add не перезаписывает существующий счетчик, incr атомарен в кэше
+        self.cache.add(key, 0, timeout=self.window * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # Ключ вытеснен между add и incr
+            self.cache.set(key, 1, timeout=self.window * 2)
+            return 1
+
+    async def _aincr(self, key):
+        await self.cache.aadd(key, 0, timeout=self.window * 2)
+        try:
+            return await self.cache.aincr(key)
+        except ValueError:
+            await self.cache.aset(key, 1, timeout=self.window * 2)
+            return 1
+
+    def acquire(self, ident):
+        """
+        Учитывает событие и проверяет лимит.
+
+        Сначала счетчик увеличивается, затем решение принимается по
+        возвращенному значению: каждый из параллельных запросов получает
+        свое значение счетчика, поэтому пропущено будет не больше limit
+        событий. Отклоненное событие не учитывается (счетчик уменьшается).
+
+        Args:
+            ident: Идентификатор клиента (IP, логин, телефон)
+
+        Returns:
+            tuple[int, str | None]: Время ожидания в секундах (0 - событие
+            разрешено) и ключ учтенного события для release()
+        """
+        now = time.time()
+        keys = self._keys(ident, now)
+        count = self._incr(keys[0])
+        values = {keys[0]: count - 1, keys[1]: self.cache.get(keys[1], 0)}
+        limited, wait = self._verdict(values, keys, now)
+        if limited:
+            self.release(keys[0])
+            return wait, None
+        return 0, keys[0]
+
+    async def aacquire(self, ident):
+        """Асинхронный вариант acquire()."""
+        now = time.time()
+        keys = self._keys(ident, now)
+        count = await self._aincr(keys[0])
+        values = {keys[0]: count - 1, keys[1]: await self.cache.aget(keys[1], 0)}
+        limited, wait = self._verdict(values, keys, now)
+        if limited:
+            await self.arelease(keys[0])
+            return wait, None
+        return 0, keys[0]
+
+    def release(self, key):
+        """Отменяет учтенное событие по ключу из acquire()."""
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
+
+    async def arelease(self, key):
+        """Асинхронный вариант release()."""
+        try:
+            await self.cache.adecr(key)
+        except ValueError:
+            pass
+
+    def reset(self, ident):
+        """Сбрасывает счетчики идентификатора (например, после успешного входа)."""
+        bucket = int(time.time() // self.window)
+        self.cache.delete_many([self._key(ident, bucket), self._key(ident, bucket - 1)])
+
+
+def get_limiter(scope):
+    """
+    Возвращает ограничитель для области из THROTTLE_RATES.
+
+    Args:
+        scope: Имя области
+
+    Returns:
+        SlidingWindowLimiter | None: Ограничитель или None, если лимит не задан
+    """
+    rate = getattr(settings, 'THROTTLE_RATES', {}).get(scope)
+    if not rate:
+        return None
+    limit, window = rate
+    return SlidingWindowLimiter(scope, limit, window, getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default'))
+
+
+def client_ip(request):
+    """IP-адрес клиента из REMOTE_ADDR."""
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def acquire_limits(checks):
+    """
+    Учитывает событие во всех ограничениях и возвращает наибольшее время ожидания.
+
+    Если хотя бы одно ограничение превышено, событие не учитывается
+    ни в одном из них.
+
+    Args:
+        checks: Пары (область, идентификатор); пустые идентификаторы пропускаются
+
+    Returns:
+        int: Время ожидания в секундах или 0, если событие разрешено
+    """
+    retry_after = 0
+    acquired = []
+    for scope, ident in checks:
+        limiter = get_limiter(scope)
+        if limiter is None or not ident:
+            continue
+        wait, key = limiter.acquire(ident)
+        if key is not None:
+            acquired.append((limiter, key))
+        retry_after = max(retry_after, wait)
+    if retry_after:
+        for limiter, key in acquired:
+            limiter.release(key)
+    return retry_after
+
+
+async def aacquire_limits(checks):
+    """Асинхронный вариант acquire_limits()."""
+    retry_after = 0
+    acquired = []
+    for scope, ident in checks:
+        limiter = get_limiter(scope)
+        if limiter is None or not ident:
+            continue
+        wait, key = await limiter.aacquire(ident)
+        if key is not None:
+            acquired.append((limiter, key))
+        retry_after = max(retry_after, wait)
+    if retry_after:
+        for limiter, key in acquired:
+            await limiter.arelease(key)
+    return retry_after
+
+
+def reset_limits(checks):
+    """Сбрасывает счетчики перечисленных ограничений."""
+    for scope, ident in checks:
+        limiter = get_limiter(scope)
+        if limiter is not None and ident:
+            limiter.reset(ident)
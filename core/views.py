@@ -7,18 +7,132 @@
 управления медицинскими картами.
 """
 
+import datetime
+from operator import attrgetter
+
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from .models import Service, Doctor, Testimonial, Appointment, MedicalRecord
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.http import require_POST, require_safe
+from .models import Service, Doctor, Testimonial, Appointment, MedicalRecord, AccessLog
 from .forms import AppointmentForm, TestimonialForm
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import login
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.forms import AuthenticationForm
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.contrib.auth.decorators import login_required
 from django.db.models import Q
 from .forms import MedicalRecordForm
 from django.utils import timezone
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+from django.conf import settings
+from .archive import patient_history
+from .audit import record_access
+from .branches import current_database, doctor_database, gather, is_sharded
+from .calendar import cached_feed, feed_url, feed_validators
+from .decorators import doctor_required
+from .identity import login_doctor, logout_doctor
+from .live import event_stream, make_mark, parse_mark
+from .records import RecordDraft, create_medical_records
+from .reports import FORMATS as REPORT_FORMATS, parse_month, report_path
+from .tasks import send_appointment_confirmation
+from .testimonials import testimonials_listing
+from .throttling import acquire_limits, client_ip, reset_limits
+
+
+# Сообщения формы записи (общие для синхронных и асинхронных представлений)
+DUPLICATE_APPOINTMENT_MESSAGE = 'У вас уже есть запись на это время к данному врачу.'
+APPOINTMENT_SUCCESS_MESSAGE = 'Ваша заявка успешно отправлена! Мы свяжемся с вами в ближайшее время.'
+
+
+def _throttled(retry_after, message):
+    """
+    Дешевый ответ на запрос сверх лимита.
+    
+    Не рендерит шаблонов и не обращается к базе данных, чтобы отказ
+    обходился дешевле любой полезной работы.
+    
+    Args:
+        retry_after: Время до следующей разрешенной попытки в секундах
+        message: Текст для пользователя
+        
+    Returns:
+        HttpResponse: Ответ со статусом 429 и заголовком Retry-After
+    """
+    response = HttpResponse(
+        f'{message} Повторите через {retry_after} с.',
+        status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def _normalize_phone(phone):
+    """Телефон без форматирования для использования в ключе ограничения."""
+    return ''.join(ch for ch in (phone or '') if ch.isdigit())
+
+
+def _shed_public_post(request, form_class, checks):
+    """
+    Отсев запросов к публичным формам до валидации и обращений к базе.
+    
+    Учитывает заявку в лимитах частоты (атомарно с проверкой), затем
+    проверяет поле-ловушку и время заполнения формы.
+    
+    Args:
+        request: HTTP-запрос (POST)
+        form_class: Класс формы с методом detect_spam()
+        checks: Пары (область ограничения, идентификатор)
+        
+    Returns:
+        HttpResponse | None: Ответ 429 для отсеянного запроса или None
+    """
+    return _shed_verdict(request, form_class, acquire_limits(checks))
+
+
+def _shed_verdict(request, form_class, retry_after):
+    """Ответ для отсеянного запроса по результату проверки лимитов или None."""
+    if retry_after:
+        return _throttled(retry_after, 'Слишком много заявок.')
+    if form_class.detect_spam(request.POST):
+        return _throttled(getattr(settings, 'SPAM_RETRY_AFTER', 60), 'Заявка отклонена.')
+    return None
+
+
+def _appointment_throttle_checks(request):
+    """Ограничения заявок на прием: по IP-адресу и по номеру телефона."""
+    return [
+        ('appointment_ip', client_ip(request)),
+        ('appointment_phone', _normalize_phone(request.POST.get('phone'))),
+    ]
+
+
+def _duplicate_appointments(cleaned_data):
+    """Записи того же пациента к тому же врачу на ту же дату (в базе филиала врача)."""
+    return Appointment.objects.using(doctor_database(cleaned_data['doctor'])).filter(
+        phone=cleaned_data['phone'],
+        doctor_id=cleaned_data['doctor'].id,
+        date=cleaned_data['date'],
+    )
+
+
+def _home_querysets():
+    """Наборы данных главной страницы (ленивые QuerySet)."""
+    return {
+        'services': Service.objects.all(),
+        'doctors': Doctor.objects.all(),
+        'testimonials': Testimonial.objects.select_related('doctor'),
+    }
+
+
+def _gather_testimonials(queryset):
+    """Отзывы всех филиалов, новые первыми: по одному запросу в каждую базу."""
+    return gather(queryset, key=attrgetter('created_at'), reverse=True)
+
 
 
 def home(request):
@@ -33,15 +147,10 @@ def home(request):
     Returns:
         HttpResponse: Рендер главной страницы с контекстом
     """
-    services = Service.objects.all()
-    testimonials = Testimonial.objects.all()
-    doctors = Doctor.objects.all()
-    
-    context = {
-        'services': services,
-        'doctors': doctors,
-        'testimonials': testimonials,
-    }
+    context = _home_querysets()
+    if is_sharded():
+        context['testimonials'] = _gather_testimonials(context['testimonials'])
+    context['form'] = AppointmentForm()
     return render(request, 'core/index.html', context)
 
 
@@ -58,22 +167,22 @@ def appointment_view(request):
         HttpResponse: Рендер страницы записи или редирект при успехе
     """
     if request.method == 'POST':
+        # Отсев спама и превышений лимита до любых обращений к базе данных
+        shed = _shed_public_post(request, AppointmentForm, _appointment_throttle_checks(request))
+        if shed:
+            return shed
+        
         form = AppointmentForm(request.POST)
         if form.is_valid():
             # Проверка на дублирующую запись
-            existing_appointment = Appointment.objects.filter(
-                Q(phone=form.cleaned_data['phone']) &
-                Q(doctor=form.cleaned_data['doctor']) &
-                Q(date=form.cleaned_data['date'])
-            ).exists()
-            
-            if existing_appointment:
-                messages.warning(request, 'У вас уже есть запись на это время к данному врачу.')
+            if _duplicate_appointments(form.cleaned_data).exists():
+                messages.warning(request, DUPLICATE_APPOINTMENT_MESSAGE)
                 return render(request, 'core/appointment.html', {'form': form})
             
-            # Сохранение записи
+            # Сохранение записи и отправка подтверждения в фоне
             appointment = form.save()
-            messages.success(request, 'Ваша заявка успешно отправлена! Мы свяжемся с вами в ближайшее время.')
+            send_appointment_confirmation.enqueue(appointment.id, database=appointment._state.db)
+            messages.success(request, APPOINTMENT_SUCCESS_MESSAGE)
             return redirect('appointment_success')
     else:
         form = AppointmentForm()
@@ -104,22 +213,26 @@ def add_testimonial(request):
         HttpResponse: Рендер формы отзыва или редирект при успехе
     """
     if request.method == 'POST':
+        # Отсев спама и превышений лимита до любых обращений к базе данных
+        shed = _shed_public_post(request, TestimonialForm, [
+            ('testimonial_ip', client_ip(request)),
+        ])
+        if shed:
+            return shed
+        
         form = TestimonialForm(request.POST)
         if form.is_valid():
-            # Проверка на дубликат отзыва
-            name = form.cleaned_data['name']
-            doctor = form.cleaned_data['doctor']
-            message = form.cleaned_data['message']
-            
-            recent_testimonial = Testimonial.objects.filter(
-                name=name,
-                doctor=doctor,
-                message=message
+            # Проверка на дубликат отзыва по отпечатку имени и текста
+            recent_testimonial = Testimonial.objects.using(doctor_database(form.cleaned_data['doctor'])).filter(
+                doctor_id=form.cleaned_data['doctor'].id,
+                fingerprint=Testimonial.make_fingerprint(
+                    form.cleaned_data['name'], form.cleaned_data['message']
+                ),
             ).exists()
             
             if recent_testimonial:
                 messages.error(request, 'Вы уже оставляли отзыв для этого врача с таким же сообщением.')
-                return redirect('testimonials')
+                return redirect('add_testimonial')
             
             # Сохранение отзыва
             testimonial = form.save(commit=False)
@@ -136,41 +249,33 @@ def add_testimonial(request):
 
 def all_testimonials(request):
     """
-    Отображение всех одобренных отзывов с фильтрацией.
+    Публичный список одобренных отзывов.
     
-    Поддерживает фильтрацию по рейтингу и поиск по тексту.
+    Поддерживает фильтры по оценке и врачу и курсорную пагинацию
+    (параметр after). Страницы и счетчики берутся из кэша.
     
     Args:
-        request: HTTP-запрос с параметрами фильтрации
+        request: HTTP-запрос с параметрами rating, doctor и after
         
     Returns:
-        HttpResponse: Рендер страницы с отфильтрованными отзывами
+        HttpResponse: Рендер страницы списка отзывов
     """
-    rating_filter = request.GET.get('rating')
-    search_query = request.GET.get('search', '')
-    
-    testimonials = Testimonial.objects.filter(is_approved=True)
-    
-    # Фильтрация по рейтингу
-    if rating_filter:
-        testimonials = testimonials.filter(rating=rating_filter)
-    
-    # Поиск по тексту
-    if search_query:
-        testimonials = testimonials.filter(
-            author_name__icontains=search_query
-        ) | testimonials.filter(
-            content__icontains=search_query
-        )
-    
-    testimonials = testimonials.order_by('-created_at')
+    return render(request, 'core/testimonials.html', testimonials_listing(request.GET))
+
+
+def _login_throttle_checks(request, username):
+    """
+    Ограничения попыток входа: по IP-адресу и по логину.
     
-    context = {
-        'testimonials': testimonials,
-        'rating_filter': rating_filter,
-        'search_query': search_query,
-    }
-    return render(request, 'core/index.html', context)
+    Логин учитывается независимо от адреса: перебор пароля к одной
+    учетной записи с множества адресов тоже ограничен.
+    """
+    ip = client_ip(request)
+    username = (username or '').strip().lower()
+    return [
+        ('login_ip', ip),
+        ('login_username', username),
+    ]
 
 
 def staff_login(request):
@@ -186,13 +291,20 @@ def staff_login(request):
         HttpResponse: Рендер формы входа или редирект в админку
     """
     if request.method == 'POST':
+        # Ограничение попыток проверяется до хеширования пароля
+        checks = _login_throttle_checks(request, request.POST.get('username'))
+        retry_after = acquire_limits(checks)
+        if retry_after:
+            return _throttled(retry_after, 'Слишком много попыток входа.')
+        
         form = AuthenticationForm(request, data=request.POST)
         if form.is_valid():
             username = form.cleaned_data.get('username')
-            password = form.cleaned_data.get('password')
-            user = authenticate(username=username, password=password)
+            # Форма уже выполнила authenticate(), повторная проверка не нужна
+            user = form.get_user()
             
             if user is not None and user.is_staff:
+                reset_limits(checks[1:])
                 login(request, user)
                 messages.success(request, f'Добро пожаловать, {username}!')
                 return redirect('admin:index')
@@ -225,15 +337,24 @@ def doctor_login(request):
             username = request.POST.get('username')
             password = request.POST.get('password')
             
+            # Ограничение попыток проверяется до хеширования пароля
+            checks = _login_throttle_checks(request, username)
+            retry_after = acquire_limits(checks)
+            if retry_after:
+                return _throttled(retry_after, 'Слишком много попыток входа.')
+            
             try:
                 doctor = Doctor.objects.filter(username=username).first()
                 
                 if doctor and doctor.check_password(password):
                     # Сохранение сессии врача
-                    request.session['doctor_id'] = doctor.id
-                    request.session['doctor_name'] = doctor.name
+                    reset_limits(checks[1:])
+                    login_doctor(request, doctor)
                     return redirect('doctor_dashboard')
                 else:
+                    if doctor is None:
+                        # Выравнивание времени ответа для несуществующего логина
+                        make_password(password)
                     messages.error(request, 'Неверный пароль')
             except Doctor.DoesNotExist:
                 messages.error(request, 'Врач с таким логином не найден')
@@ -244,13 +365,13 @@ def doctor_login(request):
     return redirect('staff_login')
 
 
-@login_required
+@doctor_required
 def doctor_dashboard(request):
     """
     Личный кабинет врача.
     
     Отображает записи на прием с фильтрацией по статусу и поиском.
-    Требует аутентификации.
+    Требует входа врача в систему.
     
     Args:
         request: HTTP-запрос с параметрами фильтрации
@@ -258,17 +379,13 @@ def doctor_dashboard(request):
     Returns:
         HttpResponse: Рендер личного кабинета врача
     """
-    doctor_id = request.session.get('doctor_id')
-    if not doctor_id:
-        return redirect('doctor_login')
-    
-    doctor = get_object_or_404(Doctor, id=doctor_id)
+    doctor = request.doctor
     
     # Параметры фильтрации
     status_filter = request.GET.get('status', 'all')
     search_query = request.GET.get('search', '')
     
-    base_query = Appointment.objects.filter(doctor=doctor)
+    base_query = Appointment.objects.filter(doctor_id=doctor.id)
     
     # Фильтрация по статусу
     if status_filter == 'confirmed':
@@ -294,10 +411,43 @@ def doctor_dashboard(request):
         'doctor': doctor,
         'appointments': appointments,
         'status_filter': status_filter,
-        'search_query': search_query
+        'search_query': search_query,
+        # Отметка для потока событий: все, что создано после отрисовки страницы
+        'live_since': make_mark(timezone.now(), 0),
+        'calendar_url': feed_url(request, doctor),
     })
 
 
+@doctor_required
+async def doctor_events(request):
+    """
+    Поток Server-Sent Events с изменениями записей текущего врача.
+    
+    Продолжает с отметки из заголовка Last-Event-ID (переподключение)
+    или параметра since (первое подключение со страницы кабинета).
+    Доступен только под ASGI: под WSGI поток занял бы рабочий поток
+    навсегда, поэтому возвращается 204, и браузер не переподключается.
+    
+    Args:
+        request: HTTP-запрос
+        
+    Returns:
+        StreamingHttpResponse: Поток text/event-stream
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    
+    mark = parse_mark(request.headers.get('Last-Event-ID') or request.GET.get('since'))
+    response = StreamingHttpResponse(
+        event_stream(request.doctor.id, mark, current_database()),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Отключает буферизацию ответа в nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 def doctor_logout(request):
     """
     Выход врача из системы.
@@ -307,20 +457,104 @@ def doctor_logout(request):
     Returns:
         HttpResponse: Редирект на страницу входа
     """
-    if 'doctor_id' in request.session:
-        del request.session['doctor_id']
-    if 'doctor_name' in request.session:
-        del request.session['doctor_name']
+    logout_doctor(request)
     return redirect('staff_login')
 
 
-@login_required
+@require_safe
+def doctor_calendar(request, token):
+    """
+    Лента приемов врача в формате iCalendar для подписки в календаре.
+    
+    Доступ по секретному ключу в адресе, без входа в систему: календари
+    не передают cookie. Повторный опрос без изменений получает 304 по
+    ETag или Last-Modified, а тело ленты берется из кэша (core.calendar).
+    
+    Args:
+        request: HTTP-запрос
+        token: Ключ ленты врача (Doctor.calendar_token)
+        
+    Returns:
+        HttpResponse: Файл .ics или 304 Not Modified
+    """
+    doctor = Doctor.objects.filter(calendar_token=token).only('id', 'name').first()
+    if doctor is None:
+        raise Http404('Лента не найдена')
+    
+    etag, last_modified, stamp, today = feed_validators(doctor)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(cached_feed(doctor, stamp, today), content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="appointments.ics"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Адрес содержит ключ доступа: ответ не сохраняется общими кэшами
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@doctor_required
+@require_POST
+def doctor_calendar_reset(request):
+    """
+    Выдает врачу новый адрес ленты календаря.
+    
+    Прежний адрес перестает работать, например, если им случайно поделились.
+    
+    Returns:
+        HttpResponse: Редирект в личный кабинет
+    """
+    request.doctor.rotate_calendar_token()
+    messages.success(request, 'Создан новый адрес календаря. Обновите подписку в приложении календаря.')
+    return redirect('doctor_dashboard')
+
+
+@require_safe
+def doctor_report(request, month, doctor_id, fmt):
+    """
+    Ежемесячный отчет врача, построенный командой build_reports.
+    
+    Файл раздается с диска без обращения к базе. Доступен персоналу
+    клиники и самому врачу; для остальных отчета как будто нет.
+    
+    Args:
+        request: HTTP-запрос
+        month: Месяц в формате ГГГГ-ММ
+        doctor_id: ID врача
+        fmt: ``html`` или ``csv``
+        
+    Returns:
+        FileResponse: Файл отчета (или 304 Not Modified)
+    """
+    is_staff = request.user.is_active and request.user.is_staff
+    if not is_staff and not (request.doctor and request.doctor.id == doctor_id):
+        raise Http404('Отчет не найден')
+    if fmt not in REPORT_FORMATS:
+        raise Http404('Отчет не найден')
+    try:
+        path = report_path(parse_month(month), doctor_id, fmt)
+        stat = path.stat()
+    except (ValueError, OSError):
+        raise Http404('Отчет не найден')
+    
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), stat.st_mtime):
+        return HttpResponseNotModified()
+    content_type = 'text/csv; charset=utf-8' if fmt == 'csv' else 'text/html; charset=utf-8'
+    response = FileResponse(open(path, 'rb'), content_type=content_type, as_attachment=fmt == 'csv')
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@doctor_required
 def patient_card(request, appointment_id):
     """
     Карта пациента с медицинской историей.
     
     Отображает информацию о пациенте и его медицинские записи.
-    Требует аутентификации.
+    Доступна только врачу, к которому относится запись на прием.
+    Просмотр отмечается в журнале доступа (core.audit). Параметр
+    ``?archive=1`` добавляет в историю записи из архива (core.archive).
     
     Args:
         request: HTTP-запрос
@@ -329,33 +563,37 @@ def patient_card(request, appointment_id):
     Returns:
         HttpResponse: Рендер карты пациента
     """
-    appointment = get_object_or_404(Appointment, id=appointment_id)
+    appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=request.doctor.id)
+    record_access(request, AccessLog.ACTION_PATIENT_CARD, appointment)
     
     # Медицинские записи
     medical_records = MedicalRecord.objects.filter(appointment=appointment)
     
-    # История посещений пациента
-    patient_history = Appointment.objects.filter(
-        Q(phone=appointment.phone)
-    ).order_by('-date')
+    # История посещений пациента; архив читается только по запросу (?archive=1)
+    include_archive = request.GET.get('archive') == '1'
+    history = patient_history(appointment, include_archive=include_archive)
+    
+    # Врач уже проверен и загружен из кэша, повторный запрос не нужен
+    appointment.doctor = request.doctor
     
     context = {
         'appointment': appointment,
         'medical_records': medical_records,
-        'patient_history': patient_history,
-        'doctor': appointment.doctor
+        'patient_history': history,
+        'include_archive': include_archive,
+        'doctor': request.doctor
     }
     
     return render(request, 'core/patient_card.html', context)
 
 
-@login_required
+@doctor_required
 def create_medical_record(request, appointment_id):
     """
     Создание новой медицинской записи.
     
     Обрабатывает форму создания медицинской карты с проверкой дубликатов.
-    Требует аутентификации.
+    Доступно только врачу, к которому относится запись на прием.
     
     Args:
         request: HTTP-запрос (GET/POST)
@@ -364,32 +602,25 @@ def create_medical_record(request, appointment_id):
     Returns:
         HttpResponse: Рендер формы или редирект к карте пациента
     """
-    appointment = get_object_or_404(Appointment, id=appointment_id)
+    appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=request.doctor.id)
     
     if request.method == 'POST':
         form = MedicalRecordForm(request.POST)
         if form.is_valid():
-            # Проверка на похожую запись
-            similar_record = MedicalRecord.objects.filter(
-                Q(appointment=appointment) &
-                Q(diagnosis__icontains=form.cleaned_data['diagnosis']) &
-                Q(created_at__date=timezone.now().date())
-            ).exists()
+            # Проверка дубликата, запись и связи с услугами - одна транзакция
+            try:
+                result = create_medical_records(request.doctor.id, [RecordDraft.from_form(appointment.id, form)])
+            except Appointment.DoesNotExist:
+                # Прием удален или перенесен в архив после загрузки страницы
+                raise Http404('Запись на прием не найдена')
             
-            if similar_record:
+            if result.duplicates:
                 messages.warning(request, 'Похожая медицинская запись уже существует сегодня.')
                 return render(request, 'core/create_medical_record.html', {
                     'form': form,
                     'appointment': appointment
                 })
             
-            # Сохранение медицинской записи
-            medical_record = form.save(commit=False)
-            medical_record.appointment = appointment
-            medical_record.doctor = appointment.doctor
-            medical_record.save()
-            form.save_m2m()
-            
             return redirect('patient_card', appointment_id=appointment.id)
     else:
         form = MedicalRecordForm()
@@ -400,13 +631,74 @@ def create_medical_record(request, appointment_id):
     })
 
 
-@login_required
+@doctor_required
+def create_medical_records_batch(request):
+    """
+    Пакетное создание медицинских записей по приемам за день.
+    
+    Показывает форму для каждого приема врача на выбранную дату
+    (параметр date, по умолчанию сегодня). Заполненные формы сохраняются
+    одной транзакцией; нетронутые пропускаются.
+    
+    Args:
+        request: HTTP-запрос (GET/POST)
+        
+    Returns:
+        HttpResponse: Рендер страницы пакета или редирект после сохранения
+    """
+    try:
+        day = datetime.date.fromisoformat(request.GET.get('date', ''))
+    except ValueError:
+        day = timezone.localdate()
+    
+    appointments = list(
+        Appointment.objects.filter(doctor_id=request.doctor.id, date=day)
+        .exclude(status='cancelled')
+        .order_by('created_at')
+    )
+    services = list(Service.objects.order_by('order', 'id'))
+    data = request.POST if request.method == 'POST' else None
+    rows = [
+        (appointment, MedicalRecordForm(
+            data, prefix=f'a{appointment.id}', empty_permitted=True,
+            use_required_attribute=False, services=services,
+        ))
+        for appointment in appointments
+    ]
+    
+    if data is not None:
+        filled = [(appointment, form) for appointment, form in rows if form.has_changed()]
+        if filled and all(form.is_valid() for _, form in filled):
+            try:
+                result = create_medical_records(request.doctor.id, [
+                    RecordDraft.from_form(appointment.id, form) for appointment, form in filled
+                ])
+            except Appointment.DoesNotExist:
+                # Прием удален или перенесен в архив после загрузки страницы: пакет не сохранен
+                messages.error(request, 'Один из приемов больше недоступен. Записи не сохранены, обновите страницу.')
+            else:
+                messages.success(request, f'Создано медицинских записей: {len(result.created)}')
+                if result.duplicates:
+                    messages.warning(request, f'Пропущено дубликатов за сегодня: {len(result.duplicates)}')
+                return redirect(f"{request.path}?date={day.isoformat()}")
+        if not filled:
+            messages.warning(request, 'Заполните хотя бы одну медицинскую запись.')
+    
+    return render(request, 'core/create_medical_records_batch.html', {
+        'rows': rows,
+        'day': day,
+        'doctor': request.doctor,
+    })
+
+
+@doctor_required
 def medical_records_list(request, appointment_id):
     """
     Список медицинских записей для конкретного приема.
     
     Отображает все медицинские записи, связанные с записью на прием.
-    Требует аутентификации.
+    Доступна только врачу, к которому относится запись на прием.
+    Просмотр отмечается в журнале доступа (core.audit).
     
     Args:
         request: HTTP-запрос
@@ -415,7 +707,8 @@ def medical_records_list(request, appointment_id):
     Returns:
         HttpResponse: Рендер списка медицинских записей
     """
-    appointment = get_object_or_404(Appointment, id=appointment_id)
+    appointment = get_object_or_404(Appointment, id=appointment_id, doctor_id=request.doctor.id)
+    record_access(request, AccessLog.ACTION_MEDICAL_RECORDS, appointment)
     
     # Получение медицинских записей
     medical_records = MedicalRecord.objects.filter(appointment=appointment)
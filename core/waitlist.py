@@ -0,0 +1,126 @@
+"""
+Лист ожидания: запись на места, освобожденные отменой приема.
+
+Когда запись на прием переходит в статус «Отменена», сигнал после
+фиксации транзакции вызывает promote(): первый ожидающий пациент
+в очереди (врач, дата) получает новую запись на прием, а подтверждение
+ставится в очередь фоновых задач.
+
+Очередь не блокируется и не загружается целиком. Следующий пациент
+захватывается одним условным UPDATE: «строка, первая в очереди, если
+она все еще ожидает». Подзапрос первой строки выполняется по частичному
+индексу очереди (core_waitlist_queue_idx), поэтому стоимость захвата
+логарифмическая при любой длине очереди. Если строку между подзапросом
+и обновлением забрал другой процесс, обновление затронет ноль строк
+и захват повторяется со следующей строкой. Уникальная ссылка на
+отмененную запись (freed_by) не дает одной отмене освободить место
+дважды, например при повторном сохранении записи.
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import Subquery
+from django.utils import timezone
+
+from .branches import doctor_database
+from .models import Appointment, WaitlistEntry
+from .tasks import send_appointment_confirmation
+
+
+logger = logging.getLogger(__name__)
+
+# Порядок очереди, совпадающий с индексом core_waitlist_queue_idx
+QUEUE_ORDER = ('-priority', 'created_at', 'id')
+
+# Повторы захвата, если первую строку очереди забрал другой процесс
+CLAIM_ATTEMPTS = 5
+
+PROMOTED_MESSAGE = 'Запись из листа ожидания'
+
+
+def waiting(doctor_id, date, database=None):
+    """
+    Ожидающие пациенты врача на дату в порядке очереди.
+
+    Args:
+        doctor_id: ID врача
+        date: Дата приема
+        database: База филиала (по умолчанию база филиала врача)
+
+    Returns:
+        QuerySet: Строки листа ожидания
+    """
+    database = database or doctor_database(doctor_id)
+    return WaitlistEntry.objects.using(database).filter(
+        doctor_id=doctor_id, date=date, status=WaitlistEntry.STATUS_WAITING,
+    ).order_by(*QUEUE_ORDER)
+
+
+def _claim(cancelled, database):
+    """
+    Захватывает первого ожидающего для места отмененной записи.
+
+    Returns:
+        WaitlistEntry: Захваченная строка или None (очередь пуста или место уже занято)
+    """
+    queue = waiting(cancelled.doctor_id, cancelled.date, database)
+    for _ in range(CLAIM_ATTEMPTS):
+        try:
+            with transaction.atomic(using=database):
+                claimed = WaitlistEntry.objects.using(database).filter(
+                    pk=Subquery(queue.values('pk')[:1]), status=WaitlistEntry.STATUS_WAITING,
+                ).update(
+                    status=WaitlistEntry.STATUS_PROMOTED, freed_by=cancelled.pk, promoted_at=timezone.now(),
+                )
+        except IntegrityError:
+            # Место этой отмены уже отдано другому пациенту
+            return None
+        if claimed:
+            return WaitlistEntry.objects.using(database).get(freed_by=cancelled.pk)
+        if not queue.exists():
+            return None
+    logger.warning('Лист ожидания: не удалось захватить место записи #%s', cancelled.pk)
+    return None
+
+
+def promote(cancelled):
+    """
+    Записывает первого ожидающего пациента на место отмененной записи.
+
+    Захват строки листа ожидания и создание записи на прием выполняются
+    в одной транзакции базы филиала; подтверждение отправляется фоновой
+    задачей после фиксации. Прошедшие даты не обрабатываются.
+
+    Args:
+        cancelled: Запись на прием в статусе «Отменена»
+
+    Returns:
+        WaitlistEntry: Строка записанного пациента или None
+    """
+    if cancelled.status != 'cancelled' or cancelled.date < timezone.localdate():
+        return None
+    database = cancelled._state.db or doctor_database(cancelled.doctor_id)
+    if WaitlistEntry.objects.using(database).filter(freed_by=cancelled.pk).exists():
+        return None
+
+    with transaction.atomic(using=database):
+        entry = _claim(cancelled, database)
+        if entry is None:
+            return None
+        appointment = Appointment.objects.using(database).create(
+            name=entry.name,
+            phone=entry.phone,
+            email=entry.email,
+            doctor_id=entry.doctor_id,
+            date=entry.date,
+            message=PROMOTED_MESSAGE,
+        )
+        WaitlistEntry.objects.using(database).filter(pk=entry.pk).update(appointment=appointment)
+        entry.appointment = appointment
+        transaction.on_commit(
+            lambda: send_appointment_confirmation.enqueue(appointment.id, database=database), using=database,
+        )
+
+    logger.info('Лист ожидания: %s записан на место записи #%s', entry, cancelled.pk)
+    return entry
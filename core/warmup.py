@@ -0,0 +1,185 @@
+"""
+Прогрев процесса приложения перед приемом запросов.
+
+После выкладки все кэши процесса пусты: шаблоны не скомпилированы,
+справочник врачей и кэш врачей (core.identity) не заполнены,
+соединение с базой не открыто. Первые запросы каждого процесса
+оказываются заметно медленнее обычных.
+
+warm_up() выполняет эту работу заранее: открывает соединения с базами,
+заполняет справочник и кэш врачей, компилирует шаблоны приложения
+и прогоняет через приложение запросы к WARMUP_PATHS (главная страница
+с услугами, врачами и фрагментами {% cache %}). Команда serve вызывает
+ее в главном процессе до fork, так что рабочие процессы получают
+прогретую память, а после fork открывают собственное соединение
+с базой (post_fork).
+
+Состояние прогрева текущего процесса отдает проверка готовности
+/readyz (core.health).
+"""
+
+import io
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+
+from .choices import get_doctor_catalog
+from .identity import get_doctor
+from .models import Doctor
+
+
+logger = logging.getLogger(__name__)
+
+# Состояние прогрева текущего процесса
+state = {
+    'pid': None,
+    'ready': False,
+    'warmed_at': None,
+    'steps': {},
+}
+
+
+def _open_connections():
+    for connection in connections.all():
+        connection.ensure_connection()
+    return len(connections.all())
+
+
+def _prime_doctors():
+    """Справочник врачей для форм и кэш врачей для личного кабинета."""
+    catalog = get_doctor_catalog()
+    limit = getattr(settings, 'DOCTOR_CACHE_SIZE', 128)
+    for doctor_id in Doctor.objects.order_by('id').values_list('id', flat=True)[:limit]:
+        get_doctor(doctor_id)
+    return len(catalog)
+
+
+def _compile_templates():
+    """Загружает все шаблоны приложений в кэш загрузчика (cached.Loader)."""
+    compiled = 0
+    for app_config in apps.get_app_configs():
+        root = Path(app_config.path) / 'templates'
+        if not root.is_dir():
+            continue
+        for path in root.rglob('*.html'):
+            name = path.relative_to(root).as_posix()
+            try:
+                get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+                logger.warning('Прогрев: шаблон %s не загружен: %s', name, exc)
+                continue
+            compiled += 1
+    return compiled
+
+
+def _warmup_host():
+    """Имя хоста для внутренних запросов из ALLOWED_HOSTS."""
+    for host in settings.ALLOWED_HOSTS:
+        host = host.lstrip('.')
+        if host and host != '*':
+            return host
+    return 'localhost'
+
+
+def _request_pages(application):
+    """Прогоняет GET-запросы к WARMUP_PATHS через WSGI-приложение."""
+    host = _warmup_host()
+    statuses = {}
+    for path in getattr(settings, 'WARMUP_PATHS', ('/',)):
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': host,
+            'SERVER_PORT': '80',
+            'HTTP_HOST': host,
+            'HTTP_ACCEPT_ENCODING': 'gzip',
+            'REMOTE_ADDR': '127.0.0.1',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'https' if getattr(settings, 'SECURE_SSL_REDIRECT', False) else 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': False,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        result = {}
+
+        def start_response(status, headers, exc_info=None, result=result):
+            result['status'] = int(status.split(' ', 1)[0])
+
+        body = application(environ, start_response)
+        try:
+            for _ in body:
+                pass
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+        statuses[path] = result.get('status')
+        if statuses[path] != 200:
+            logger.warning('Прогрев: %s ответил %s', path, statuses[path])
+    return statuses
+
+
+def warm_up(application=None):
+    """
+    Прогревает текущий процесс.
+
+    Ошибка отдельного шага записывается в журнал и не прерывает прогрев:
+    процесс с частично прогретыми кэшами лучше, чем не запущенный.
+
+    Args:
+        application: WSGI-приложение для прогрева страниц (None - без запросов)
+
+    Returns:
+        dict: Длительность (мс) и результат каждого шага
+    """
+    steps = [
+        ('database', _open_connections),
+        ('doctors', _prime_doctors),
+        ('templates', _compile_templates),
+    ]
+    if application is not None:
+        steps.append(('pages', lambda: _request_pages(application)))
+
+    report = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        try:
+            result = step()
+        except Exception as exc:
+            logger.exception('Прогрев: шаг %s завершился ошибкой', name)
+            result = f'ошибка: {exc}'
+        report[name] = {'ms': round((time.perf_counter() - started) * 1000, 1), 'result': result}
+
+    state.update(pid=os.getpid(), ready=True, warmed_at=time.time(), steps=report)
+    logger.info('Прогрев процесса %s завершен: %s', os.getpid(), report)
+    return report
+
+
+def prepare_fork():
+    """Закрывает соединения с базами перед fork: их нельзя делить между процессами."""
+    connections.close_all()
+
+
+def post_fork():
+    """
+    Подготовка рабочего процесса после fork.
+
+    Кэши в памяти унаследованы от прогретого главного процесса;
+    соединение с базой открывается заново до первого запроса.
+    """
+    started = time.perf_counter()
+    _open_connections()
+    steps = dict(state['steps'])
+    steps['database'] = {'ms': round((time.perf_counter() - started) * 1000, 1), 'result': len(connections.all())}
+    state.update(pid=os.getpid(), ready=True, steps=steps)